@@ -0,0 +1,197 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import text
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+from database import engine
+
+CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+# How often cache_versions is re-read, so writes from other processes (invoke tasks, other workers) are seen
+CACHE_VERSION_POLL_SECONDS = float(os.getenv("RESPONSE_CACHE_VERSION_POLL", "1"))
+
+# Cached GET endpoints and the data scopes their responses depend on
+CACHE_RULES = [
+    (re.compile(r"^/groups/?$"), ("groups",)),
+    (re.compile(r"^/groups/\d+/words/raw$"), ("groups", "words")),
+    (re.compile(r"^/study-activities/?$"), ("study_activities",)),
+    (re.compile(r"^/study-activities/\d+/launch$"), ("study_activities", "groups")),
+]
+
+
+class CacheEntry(NamedTuple):
+    body: bytes
+    media_type: str
+    etag: str
+    expires_at: float
+
+
+class ResponseCache:
+    """In-process LRU of serialized responses with a TTL per entry"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[tuple, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: tuple) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key: tuple, body: bytes, media_type: str) -> CacheEntry:
+        entry = CacheEntry(
+            body=body,
+            media_type=media_type,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            expires_at=time.monotonic() + self.ttl
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "not_modified": self.not_modified,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+response_cache = ResponseCache()
+
+# Committed versions from cache_versions, plus bumps committed by this process since the last poll
+_versions: Dict[str, int] = {}
+_local_bumps: Dict[str, int] = {}
+_versions_loaded_at = 0.0
+_versions_lock = threading.Lock()
+
+
+def bump_versions(db: Session, *scopes: str):
+    """
+    Invalidate cached responses depending on `scopes`.
+    Call inside the write's transaction: the bump is persisted with it, and this process
+    only starts using the new version once the transaction commits.
+    """
+    for scope in scopes:
+        db.execute(text('''
+            INSERT INTO cache_versions (scope, version) VALUES (:scope, 1)
+            ON CONFLICT(scope) DO UPDATE SET version = version + 1
+        '''), {"scope": scope})
+    db.info.setdefault("cache_scopes", set()).update(scopes)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_bumps(db: Session):
+    scopes = db.info.pop("cache_scopes", ())
+    with _versions_lock:
+        for scope in scopes:
+            _local_bumps[scope] = _local_bumps.get(scope, 0) + 1
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_bumps(db: Session):
+    db.info.pop("cache_scopes", None)
+
+
+def _load_versions():
+    global _versions_loaded_at
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(text('SELECT scope, version FROM cache_versions')).fetchall()
+    except OperationalError:
+        # cache_versions not created yet (run `invoke init-db`), fall back to in-process counters
+        rows = []
+    with _versions_lock:
+        _versions.clear()
+        _versions.update({scope: version for scope, version in rows})
+        _versions_loaded_at = time.monotonic()
+
+
+async def current_versions(scopes: Iterable[str]) -> Tuple[Tuple[int, int], ...]:
+    if time.monotonic() - _versions_loaded_at > CACHE_VERSION_POLL_SECONDS:
+        await run_in_threadpool(_load_versions)
+    with _versions_lock:
+        return tuple((_versions.get(scope, 0), _local_bumps.get(scope, 0)) for scope in scopes)
+
+
+def _match_rule(path: str) -> Optional[Tuple[str, ...]]:
+    for pattern, scopes in CACHE_RULES:
+        if pattern.match(path):
+            return scopes
+    return None
+
+
+class ResponseCacheMiddleware(BaseHTTPMiddleware):
+    """Serve CACHE_RULES endpoints from response_cache, with ETag / If-None-Match revalidation"""
+
+    async def dispatch(self, request: Request, call_next):
+        scopes = _match_rule(request.url.path) if request.method == "GET" else None
+        if scopes is None:
+            return await call_next(request)
+
+        versions = await current_versions(scopes)
+        key = (request.url.path, tuple(sorted(request.query_params.multi_items())), versions)
+        entry = response_cache.get(key)
+        cache_status = "HIT"
+
+        if entry is None:
+            cache_status = "MISS"
+            response = await call_next(request)
+            if response.status_code != 200:
+                return response
+            body = b"".join([chunk async for chunk in response.body_iterator])
+            entry = response_cache.set(key, body, response.headers.get("content-type", "application/json"))
+
+        headers = {"ETag": entry.etag, "X-Cache": cache_status}
+        if entry.etag in request.headers.get("if-none-match", ""):
+            response_cache.record_not_modified()
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type=entry.media_type, headers=headers)
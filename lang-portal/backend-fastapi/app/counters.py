@@ -0,0 +1,116 @@
+from typing import Dict, List
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import text
+
+# Denormalized counters read by the listing endpoints instead of aggregating on every page:
+# - groups.words_count follows word_groups
+# - study_sessions.review_items_count and last_activity_at follow word_review_items
+# - study_stats.total_vocabulary follows words
+# Columns added to tables created before the counters existed, as (table, column, definition)
+COUNTER_COLUMNS = [
+    ("study_sessions", "review_items_count", "INTEGER NOT NULL DEFAULT 0"),
+    ("study_sessions", "last_activity_at", "DATETIME"),
+    ("study_stats", "total_vocabulary", "INTEGER NOT NULL DEFAULT 0"),
+]
+
+# Latest review of a session, NULL when it has none
+LAST_ACTIVITY = "(SELECT MAX(created_at) FROM word_review_items WHERE study_session_id = {session_id})"
+
+COUNTER_TRIGGERS = [
+    '''CREATE TRIGGER IF NOT EXISTS word_groups_count_insert AFTER INSERT ON word_groups BEGIN
+        UPDATE groups SET words_count = COALESCE(words_count, 0) + 1 WHERE id = new.group_id;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS word_groups_count_delete AFTER DELETE ON word_groups BEGIN
+        UPDATE groups SET words_count = COALESCE(words_count, 0) - 1 WHERE id = old.group_id;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS word_groups_count_update AFTER UPDATE OF group_id ON word_groups BEGIN
+        UPDATE groups SET words_count = COALESCE(words_count, 0) - 1 WHERE id = old.group_id;
+        UPDATE groups SET words_count = COALESCE(words_count, 0) + 1 WHERE id = new.group_id;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS word_review_items_count_insert AFTER INSERT ON word_review_items BEGIN
+        UPDATE study_sessions
+        SET review_items_count = review_items_count + 1,
+            last_activity_at = CASE
+                WHEN last_activity_at IS NULL OR new.created_at > last_activity_at THEN new.created_at
+                ELSE last_activity_at
+            END
+        WHERE id = new.study_session_id;
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS word_review_items_count_delete AFTER DELETE ON word_review_items BEGIN
+        UPDATE study_sessions
+        SET review_items_count = review_items_count - 1,
+            last_activity_at = {LAST_ACTIVITY.format(session_id="old.study_session_id")}
+        WHERE id = old.study_session_id;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS words_count_insert AFTER INSERT ON words BEGIN
+        UPDATE study_stats SET total_vocabulary = total_vocabulary + 1 WHERE id = 1;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS words_count_delete AFTER DELETE ON words BEGIN
+        UPDATE study_stats SET total_vocabulary = total_vocabulary - 1 WHERE id = 1;
+    END''',
+]
+
+# Stored vs recomputed value for every counter, one row per drifted record
+DRIFT_QUERIES = {
+    "groups.words_count": '''
+        SELECT g.id, g.words_count AS stored, COUNT(wg.word_id) AS actual
+        FROM groups g
+        LEFT JOIN word_groups wg ON wg.group_id = g.id
+        GROUP BY g.id
+        HAVING stored IS NOT actual
+    ''',
+    "study_sessions.review_items_count": '''
+        SELECT s.id, s.review_items_count AS stored, COUNT(wri.id) AS actual
+        FROM study_sessions s
+        LEFT JOIN word_review_items wri ON wri.study_session_id = s.id
+        GROUP BY s.id
+        HAVING stored IS NOT actual
+    ''',
+    "study_sessions.last_activity_at": '''
+        SELECT s.id, s.last_activity_at AS stored, MAX(wri.created_at) AS actual
+        FROM study_sessions s
+        LEFT JOIN word_review_items wri ON wri.study_session_id = s.id
+        GROUP BY s.id
+        HAVING stored IS NOT actual
+    ''',
+    "study_stats.total_vocabulary": '''
+        SELECT id, total_vocabulary AS stored, (SELECT COUNT(*) FROM words) AS actual
+        FROM study_stats
+        WHERE stored IS NOT actual
+    ''',
+}
+
+REPAIR_STATEMENTS = [
+    '''UPDATE groups
+    SET words_count = (SELECT COUNT(*) FROM word_groups WHERE group_id = groups.id)''',
+    f'''UPDATE study_sessions
+    SET review_items_count = (SELECT COUNT(*) FROM word_review_items WHERE study_session_id = study_sessions.id),
+        last_activity_at = {LAST_ACTIVITY.format(session_id="study_sessions.id")}''',
+    '''UPDATE study_stats
+    SET total_vocabulary = (SELECT COUNT(*) FROM words)''',
+]
+
+
+def add_counter_columns(conn) -> bool:
+    """Add missing COUNTER_COLUMNS to existing tables, returns True if any column was added"""
+    added = False
+    for table, column, definition in COUNTER_COLUMNS:
+        existing = {row[1] for row in conn.execute(text(f'PRAGMA table_info({table})'))}
+        if column not in existing:
+            conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {definition}'))
+            added = True
+    return added
+
+
+def find_drift(db: Session) -> Dict[str, List[dict]]:
+    """Recompute every counter and return the records whose stored value differs, keyed by counter"""
+    return {
+        counter: [dict(row._mapping) for row in db.execute(text(query))]
+        for counter, query in DRIFT_QUERIES.items()
+    }
+
+
+def repair_counters(db: Session):
+    """Overwrite every counter with its recomputed value. Runs inside the caller's transaction, the caller commits."""
+    for statement in REPAIR_STATEMENTS:
+        db.execute(text(statement))
@@ -1,12 +1,72 @@
-from sqlalchemy import create_engine
+import os
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
-DATABASE_URL = "sqlite:///./words.db"
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./words.db")
+ASYNC_DATABASE_URL = DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# Engine profile, selected with DATABASE_PROFILE:
+# - "default": SQLite defaults (rollback journal, synchronous=FULL)
+# - "production": WAL so readers don't block the writer, relaxed fsync and a pre-pinged pool
+DATABASE_PROFILE = os.getenv("DATABASE_PROFILE", "default")
+
+PROFILES = {
+    "default": {
+        "pragmas": {},
+        "pool": {},
+    },
+    "production": {
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "mmap_size": 268435456,  # 256 MiB
+            "cache_size": -65536,  # 64 MiB, negative values are KiB
+            "temp_store": "MEMORY",
+            "busy_timeout": 5000,  # ms
+        },
+        "pool": {
+            "pool_size": int(os.getenv("DATABASE_POOL_SIZE", "8")),
+            "max_overflow": int(os.getenv("DATABASE_MAX_OVERFLOW", "8")),
+            "pool_pre_ping": True,
+        },
+    },
+}
+
+if DATABASE_PROFILE not in PROFILES:
+    raise ValueError(f"Unknown DATABASE_PROFILE '{DATABASE_PROFILE}', expected one of: {', '.join(PROFILES)}")
+
+profile = PROFILES[DATABASE_PROFILE]
+
+
+def _pool_args(poolclass) -> dict:
+    return {"poolclass": poolclass, **profile["pool"]} if profile["pool"] else {}
+
+
+engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False}, **_pool_args(QueuePool))
+
+# aiosqlite engine for the async read endpoints, same file and profile as the sync engine
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_pool_args(AsyncAdaptedQueuePool))
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply the profile pragmas to every new DBAPI connection"""
+    if not profile["pragmas"]:
+        return
+    cursor = dbapi_connection.cursor()
+    for name, value in profile["pragmas"].items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+event.listen(engine, "connect", set_sqlite_pragmas)
+event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -14,4 +74,9 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,11 +1,27 @@
+import os
 from fastapi import FastAPI
 from database import engine, Base
-from routes import dashboard, groups, study_activities, study_sessions, words
+from cache import ResponseCacheMiddleware, CACHE_ENABLED
+from routes import dashboard, groups, metrics, study_activities, study_sessions, words
+
+# Serve the read endpoints from the aiosqlite engine instead of the threadpool
+USE_ASYNC_DB = os.getenv("DATABASE_ASYNC", "false").lower() in ("1", "true", "yes")
 
 app = FastAPI()
 
+if CACHE_ENABLED:
+    app.add_middleware(ResponseCacheMiddleware)
+
+if USE_ASYNC_DB:
+    # Registered first so they take precedence over the sync routes on the same paths
+    app.include_router(dashboard.async_router)
+    app.include_router(groups.async_router)
+    app.include_router(study_activities.async_router)
+    app.include_router(words.async_router)
+
 app.include_router(dashboard.router)
 app.include_router(groups.router)
+app.include_router(metrics.router)
 app.include_router(study_activities.router)
 app.include_router(study_sessions.router)
 app.include_router(words.router)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, func, JSON
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Date, Boolean, func, JSON
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -30,7 +30,7 @@ class Group(Base):
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     name = Column(String, nullable=False)
-    words_count = Column(Integer, default=0)
+    words_count = Column(Integer, default=0)  # Maintained by the word_groups triggers in counters.py
     
     word_groups = relationship("WordGroup", back_populates="group")
     
@@ -42,6 +42,9 @@ class StudySession(Base):
     group_id = Column(Integer, ForeignKey("groups.id"), nullable=False)
     study_activity_id = Column(Integer, ForeignKey("study_activities.id"), nullable=False)
     created_at = Column(DateTime, default=func.now())
+    # Maintained by the word_review_items triggers in counters.py
+    review_items_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_activity_at = Column(DateTime, nullable=True)
 
     group = relationship("Group")
     study_activity = relationship("StudyActivity")
@@ -79,4 +82,49 @@ class WordReview(Base):
     last_reviewed = Column(DateTime, default=func.now())
 
     word = relationship("Word")
-    
\ No newline at end of file
+    
+
+class WordReviewStats(Base):
+    __tablename__ = "word_review_stats"
+
+    word_id = Column(Integer, ForeignKey("words.id"), primary_key=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    successes = Column(Integer, nullable=False, default=0)
+
+
+class DailyStudyStats(Base):
+    __tablename__ = "daily_study_stats"
+
+    study_date = Column(Date, primary_key=True)
+    group_id = Column(Integer, ForeignKey("groups.id"), primary_key=True)
+    sessions_count = Column(Integer, nullable=False, default=0)
+
+
+class StudyStats(Base):
+    __tablename__ = "study_stats"
+
+    id = Column(Integer, primary_key=True)
+    total_attempts = Column(Integer, nullable=False, default=0)
+    total_successes = Column(Integer, nullable=False, default=0)
+    words_studied = Column(Integer, nullable=False, default=0)
+    mastered_words = Column(Integer, nullable=False, default=0)
+    total_sessions = Column(Integer, nullable=False, default=0)
+    streak_days = Column(Integer, nullable=False, default=0)
+    last_study_date = Column(Date, nullable=True)
+    total_vocabulary = Column(Integer, nullable=False, default=0)
+
+
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+
+    scope = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class ImportProgress(Base):
+    __tablename__ = "import_progress"
+
+    source = Column(String, primary_key=True)
+    group_id = Column(Integer, ForeignKey("groups.id"), nullable=False)
+    rows_committed = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.now())
@@ -0,0 +1,52 @@
+import base64
+import binascii
+import json
+from typing import Any, Dict, Optional, Tuple
+from fastapi import HTTPException
+
+# SQL expressions behind each word sort_by option; the review counters come from a LEFT JOIN
+WORD_SORT_COLUMNS = {
+    "kanji": "w.kanji",
+    "romaji": "w.romaji",
+    "english": "w.english",
+    "correct_count": "COALESCE(r.correct_count, 0)",
+    "wrong_count": "COALESCE(r.wrong_count, 0)",
+}
+
+
+def encode_cursor(sort_by: str, order: str, value: Any, last_id: int) -> str:
+    """Build an opaque keyset cursor from the last row of a page"""
+    payload = json.dumps({"s": sort_by, "o": order, "v": value, "id": last_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, order: str) -> Optional[Tuple[Any, int]]:
+    """
+    Decode a cursor produced by encode_cursor.
+    An empty cursor starts from the first page and returns None.
+    Raises a 400 if the cursor is malformed or was issued for a different sort.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        value, last_id = payload["v"], int(payload["id"])
+        cursor_sort, cursor_order = payload["s"], payload["o"]
+    except (binascii.Error, ValueError, KeyError, TypeError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_sort != sort_by or cursor_order != order:
+        raise HTTPException(status_code=400, detail="Cursor does not match sort_by/order")
+    return value, last_id
+
+
+def keyset_clause(sort_expr: str, order: str, position: Optional[Tuple[Any, int]]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Return the SQL predicate and params that seek past `position`.
+    Rows are ordered by (sort_expr, w.id) so ties on the sort column stay stable.
+    """
+    if position is None:
+        return "1 = 1", {}
+    operator = ">" if order == "asc" else "<"
+    value, last_id = position
+    return f"({sort_expr}, w.id) {operator} (:after_value, :after_id)", {"after_value": value, "after_id": last_id}
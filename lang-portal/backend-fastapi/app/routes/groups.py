@@ -1,12 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import text
-from database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db, get_async_db
 from schemas import GroupResponse, WordResponse, StudySessionResponse
+from pagination import WORD_SORT_COLUMNS, decode_cursor, encode_cursor, keyset_clause
 from typing import List, Optional
 import json
 
 router = APIRouter(prefix="/groups", tags=["Groups"])
+async_router = APIRouter(prefix="/groups", tags=["Groups"])
+
+# sort_by options of /groups/{id}/study_sessions
+GROUP_SESSION_SORT_COLUMNS = {
+    "created_at": "s.created_at",
+    "last_activity_time": "s.last_activity_at",
+    "activity_name": "activity_name",
+    "group_name": "group_name",
+    "review_items_count": "s.review_items_count",
+}
 
 @router.get("/", response_model=List[GroupResponse])
 def get_groups(
@@ -54,33 +66,54 @@ def get_group(id: int, db: Session = Depends(get_db)):
 @router.get("/{id}/words", response_model=List[WordResponse])
 def get_group_words(
     id: int,
+    response: Response,
     db: Session = Depends(get_db),
     page: int = Query(1, alias="page"),
     sort_by: str = Query("kanji", regex="^(kanji|romaji|english|correct_count|wrong_count)$"),
-    order: str = Query("asc", regex="^(asc|desc)$")
+    order: str = Query("asc", regex="^(asc|desc)$"),
+    after: Optional[str] = Query(None, alias="after")
 ):
+    # Keyset mode: pass ?after= (empty) for the first page, the next cursor comes back in X-Next-Cursor
+    position = decode_cursor(after, sort_by, order) if after is not None else None
     try:
         words_per_page = 10
-        offset = (page - 1) * words_per_page
 
         # Check if group exists
         group_check = db.execute(text('SELECT name FROM groups WHERE id = :id'), {"id": id}).fetchone()
         if not group_check:
             raise HTTPException(status_code=404, detail="Group not found")
 
-        result = db.execute(text(f'''
-            SELECT w.*, COALESCE(wr.correct_count, 0) as correct_count, COALESCE(wr.wrong_count, 0) as wrong_count
-            FROM words w
-            JOIN word_groups wg ON w.id = wg.word_id
-            LEFT JOIN word_reviews wr ON w.id = wr.word_id
-            WHERE wg.group_id = :id
-            ORDER BY {sort_by} {order}
-            LIMIT :limit OFFSET :offset
-        '''), {"id": id, "limit": words_per_page, "offset": offset})
-        words = result.fetchall()
+        if after is not None:
+            sort_expr = WORD_SORT_COLUMNS[sort_by]
+            where, params = keyset_clause(sort_expr, order, position)
+            result = db.execute(text(f'''
+                SELECT w.*, COALESCE(r.correct_count, 0) as correct_count, COALESCE(r.wrong_count, 0) as wrong_count
+                FROM words w
+                JOIN word_groups wg ON w.id = wg.word_id
+                LEFT JOIN word_reviews r ON w.id = r.word_id
+                WHERE wg.group_id = :id AND {where}
+                ORDER BY {sort_expr} {order}, w.id {order}
+                LIMIT :limit
+            '''), {**params, "id": id, "limit": words_per_page + 1})
+            words = result.fetchall()
 
-        total_words = db.execute(text('SELECT COUNT(*) FROM word_groups WHERE group_id = :id'), {"id": id}).scalar()
-        total_pages = (total_words + words_per_page - 1) // words_per_page
+            if len(words) > words_per_page:
+                words = words[:words_per_page]
+                last = words[-1]
+                response.headers["X-Next-Cursor"] = encode_cursor(sort_by, order, getattr(last, sort_by), last.id)
+        else:
+            offset = (page - 1) * words_per_page
+
+            result = db.execute(text(f'''
+                SELECT w.*, COALESCE(r.correct_count, 0) as correct_count, COALESCE(r.wrong_count, 0) as wrong_count
+                FROM words w
+                JOIN word_groups wg ON w.id = wg.word_id
+                LEFT JOIN word_reviews r ON w.id = r.word_id
+                WHERE wg.group_id = :id
+                ORDER BY {sort_by} {order}
+                LIMIT :limit OFFSET :offset
+            '''), {"id": id, "limit": words_per_page, "offset": offset})
+            words = result.fetchall()
 
         return [{
             "id": word.id,
@@ -106,43 +139,33 @@ def get_group_study_sessions(
         sessions_per_page = 10
         offset = (page - 1) * sessions_per_page
 
+        # The review count and last activity are trigger-maintained columns, so the page needs no aggregation
         result = db.execute(text(f'''
             SELECT 
                 s.id, s.group_id, s.study_activity_id, s.created_at as start_time,
-                (
-                    SELECT MAX(created_at) FROM word_review_items WHERE study_session_id = s.id
-                ) as last_activity_time,
                 a.name as activity_name, g.name as group_name,
-                (
-                    SELECT COUNT(*) FROM word_review_items WHERE study_session_id = s.id
-                ) as review_count
+                s.last_activity_at as last_activity_time,
+                COALESCE(s.last_activity_at, datetime(s.created_at, '+30 minutes')) as end_time,
+                s.review_items_count
             FROM study_sessions s
             JOIN study_activities a ON s.study_activity_id = a.id
             JOIN groups g ON s.group_id = g.id
             WHERE s.group_id = :id
-            ORDER BY {sort_by} {order}
+            ORDER BY {GROUP_SESSION_SORT_COLUMNS[sort_by]} {order}
             LIMIT :limit OFFSET :offset
         '''), {"id": id, "limit": sessions_per_page, "offset": offset})
         sessions = result.fetchall()
 
-        total_sessions = db.execute(text('SELECT COUNT(*) FROM study_sessions WHERE group_id = :id'), {"id": id}).scalar()
-        total_pages = (total_sessions + sessions_per_page - 1) // sessions_per_page
-
-        sessions_data = []
-        for session in sessions:
-            end_time = session.last_activity_time or db.execute(text('SELECT datetime(:start, "+30 minutes")'), {"start": session.start_time}).scalar()
-            sessions_data.append({
-                "id": session.id,
-                "group_id": session.group_id,
-                "group_name": session.group_name,
-                "study_activity_id": session.study_activity_id,
-                "activity_name": session.activity_name,
-                "start_time": session.start_time,
-                "end_time": end_time,
-                "review_items_count": session.review_count
-            })
-        
-        return sessions_data
+        return [{
+            "id": session.id,
+            "group_id": session.group_id,
+            "group_name": session.group_name,
+            "activity_id": session.study_activity_id,
+            "activity_name": session.activity_name,
+            "start_time": session.start_time,
+            "end_time": session.end_time,
+            "review_items_count": session.review_items_count
+        } for session in sessions]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -185,4 +208,55 @@ def get_group_words_raw(id: int, db: Session = Depends(get_db)):
 
         return response
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Async variants of the read endpoints, mounted ahead of `router` when DATABASE_ASYNC is set.
+# They run the handlers above on the aiosqlite engine through AsyncSession.run_sync,
+# so the event loop serves requests without a threadpool hop per call.
+@async_router.get("/", response_model=List[GroupResponse])
+async def get_groups_async(
+    db: AsyncSession = Depends(get_async_db),
+    page: int = Query(1, alias="page"),
+    sort_by: str = Query("name", regex="^(name|words_count)$"),
+    order: str = Query("asc", regex="^(asc|desc)$")
+):
+    return await db.run_sync(lambda session: get_groups(db=session, page=page, sort_by=sort_by, order=order))
+
+
+@async_router.get("/{id}", response_model=GroupResponse)
+async def get_group_async(id: int, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(lambda session: get_group(id=id, db=session))
+
+
+@async_router.get("/{id}/words", response_model=List[WordResponse])
+async def get_group_words_async(
+    id: int,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    page: int = Query(1, alias="page"),
+    sort_by: str = Query("kanji", regex="^(kanji|romaji|english|correct_count|wrong_count)$"),
+    order: str = Query("asc", regex="^(asc|desc)$"),
+    after: Optional[str] = Query(None, alias="after")
+):
+    return await db.run_sync(lambda session: get_group_words(
+        id=id, response=response, db=session, page=page, sort_by=sort_by, order=order, after=after
+    ))
+
+
+@async_router.get("/{id}/study_sessions", response_model=List[StudySessionResponse])
+async def get_group_study_sessions_async(
+    id: int,
+    db: AsyncSession = Depends(get_async_db),
+    page: int = Query(1, alias="page"),
+    sort_by: str = Query("created_at", regex="^(created_at|last_activity_time|activity_name|group_name|review_items_count)$"),
+    order: str = Query("desc", regex="^(asc|desc)$")
+):
+    return await db.run_sync(lambda session: get_group_study_sessions(
+        id=id, db=session, page=page, sort_by=sort_by, order=order
+    ))
+
+
+@async_router.get("/{id}/words/raw")
+async def get_group_words_raw_async(id: int, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(lambda session: get_group_words_raw(id=id, db=session))
@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from cache import response_cache, current_versions, CACHE_ENABLED, CACHE_RULES
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+@router.get("/cache")
+async def get_cache_metrics():
+    scopes = sorted({scope for _, rule_scopes in CACHE_RULES for scope in rule_scopes})
+    versions = await current_versions(scopes)
+    return {
+        "enabled": CACHE_ENABLED,
+        **response_cache.stats(),
+        "versions": {scope: {"committed": committed, "local_bumps": local} for scope, (committed, local) in zip(scopes, versions)}
+    }
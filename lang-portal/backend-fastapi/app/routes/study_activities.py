@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import text
-from database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db, get_async_db
 from schemas import StudyActivityResponse, StudySessionResponse, PaginatedResponse
 from typing import List, Optional
 import math
 
 router = APIRouter(prefix="/study-activities", tags=["Study Activities"])
+async_router = APIRouter(prefix="/study-activities", tags=["Study Activities"])
 
 @router.get("/", response_model=List[StudyActivityResponse])
 def get_study_activities(db: Session = Depends(get_db)):
@@ -61,13 +63,11 @@ def get_study_activity_sessions(
             SELECT 
                 ss.id, ss.group_id, g.name as group_name, sa.name as activity_name, 
                 ss.created_at, ss.study_activity_id as activity_id,
-                COUNT(wri.id) as review_items_count
+                ss.review_items_count
             FROM study_sessions ss
             JOIN groups g ON g.id = ss.group_id
             JOIN study_activities sa ON sa.id = ss.study_activity_id
-            LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
             WHERE ss.study_activity_id = :id
-            GROUP BY ss.id, ss.group_id, g.name, sa.name, ss.created_at, ss.study_activity_id
             ORDER BY ss.created_at DESC
             LIMIT :limit OFFSET :offset
         '''), {"id": id, "limit": per_page, "offset": offset})
@@ -119,3 +119,33 @@ def get_study_activity_launch_data(id: int, db: Session = Depends(get_db)):
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# Async variants of the read endpoints, mounted ahead of `router` when DATABASE_ASYNC is set.
+# They run the handlers above on the aiosqlite engine through AsyncSession.run_sync,
+# so the event loop serves requests without a threadpool hop per call.
+@async_router.get("/", response_model=List[StudyActivityResponse])
+async def get_study_activities_async(db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(lambda session: get_study_activities(db=session))
+
+
+@async_router.get("/{id}", response_model=StudyActivityResponse)
+async def get_study_activity_async(id: int, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(lambda session: get_study_activity(id=id, db=session))
+
+
+@async_router.get("/{id}/sessions", response_model=PaginatedResponse[StudySessionResponse])
+async def get_study_activity_sessions_async(
+    id: int,
+    db: AsyncSession = Depends(get_async_db),
+    page: int = Query(1, alias="page"),
+    per_page: int = Query(10, alias="per_page")
+):
+    return await db.run_sync(lambda session: get_study_activity_sessions(
+        id=id, db=session, page=page, per_page=per_page
+    ))
+
+
+@async_router.get("/{id}/launch")
+async def get_study_activity_launch_data_async(id: int, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(lambda session: get_study_activity_launch_data(id=id, db=session))
@@ -2,8 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import text
 from database import get_db
-from schemas import StudySessionResponse, PaginatedResponse, WordResponse, StudySessionCreateRequest, ReviewLogRequest
-from typing import List
+from schemas import StudySessionResponse, PaginatedResponse, WordResponse, StudySessionCreateRequest, ReviewLogRequest, ReviewBatchItem
+from stats import record_reviews, record_session, reset_stats
+from cache import bump_versions
+from typing import List, Tuple
+from datetime import datetime
+import json
 import math
 
 router = APIRouter(prefix="/study-sessions", tags=["Study Sessions"])
@@ -25,12 +29,10 @@ def get_study_sessions(
             SELECT 
                 ss.id, ss.group_id, g.name as group_name,
                 sa.id as activity_id, sa.name as activity_name,
-                ss.created_at, COUNT(wri.id) as review_items_count
+                ss.created_at, ss.review_items_count
             FROM study_sessions ss
             JOIN groups g ON g.id = ss.group_id
             JOIN study_activities sa ON sa.id = ss.study_activity_id
-            LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
-            GROUP BY ss.id
             ORDER BY ss.created_at DESC
             LIMIT :limit OFFSET :offset
         '''), {"limit": per_page, "offset": offset})
@@ -63,13 +65,11 @@ def get_study_session(id: int, db: Session = Depends(get_db)):
             SELECT 
                 ss.id, ss.group_id, g.name as group_name,
                 sa.id as activity_id, sa.name as activity_name,
-                ss.created_at, COUNT(wri.id) as review_items_count
+                ss.created_at, ss.review_items_count
             FROM study_sessions ss
             JOIN groups g ON g.id = ss.group_id
             JOIN study_activities sa ON sa.id = ss.study_activity_id
-            LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
             WHERE ss.id = :id
-            GROUP BY ss.id
         '''), {"id": id})
         session = result.fetchone()
         
@@ -93,8 +93,11 @@ def get_study_session(id: int, db: Session = Depends(get_db)):
 @router.post("/reset")
 def reset_study_sessions(db: Session = Depends(get_db)):
     try:
-        db.execute(text('DELETE FROM word_review_items'))
+        # Sessions go first so the word_review_items delete trigger has no counters left to update
         db.execute(text('DELETE FROM study_sessions'))
+        db.execute(text('DELETE FROM word_review_items'))
+        reset_stats(db)
+        bump_versions(db, "study_sessions", "reviews")
         db.commit()
         
         return {"message": "Study history cleared successfully"}
@@ -115,14 +118,17 @@ def create_study_session(data: StudySessionCreateRequest, db: Session = Depends(
         if not activity_check:
             raise HTTPException(status_code=404, detail="Study activity not found")
 
+        created_at = datetime.now()
         result = db.execute(text('''
             INSERT INTO study_sessions (group_id, study_activity_id, created_at)
             VALUES (:group_id, :study_activity_id, :created_at)
         '''), {
             "group_id": data.group_id,
             "study_activity_id": data.study_activity_id,
-            "created_at": datetime.now()
+            "created_at": created_at
         })
+        record_session(db, data.group_id, created_at)
+        bump_versions(db, "study_sessions")
         db.commit()
 
         return {"session_id": result.lastrowid}
@@ -142,44 +148,82 @@ def log_review(id: int, data: ReviewLogRequest, db: Session = Depends(get_db)):
         if not session_check:
             raise HTTPException(status_code=404, detail="Study session not found")
 
-        db.execute(text('''
-            INSERT INTO word_review_items (word_id, correct, study_session_id)
-            VALUES (:word_id, :correct, :study_session_id)
-        '''), {
-            "word_id": data.word_id,
-            "correct": data.correct,
-            "study_session_id": id
-        })
+        _apply_reviews(db, id, [(data.word_id, data.correct, datetime.now())])
+        db.commit()
+        return {"message": "Review logged successfully"}
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
 
-        review_check = db.execute(text("SELECT * FROM word_reviews WHERE word_id = :word_id"), 
-                                  {"word_id": data.word_id}).fetchone()
-
-        if review_check:
-            if data.correct:
-                db.execute(text('''
-                    UPDATE word_reviews 
-                    SET correct_count = correct_count + 1, last_reviewed = :last_reviewed 
-                    WHERE word_id = :word_id
-                '''), {"last_reviewed": datetime.now(), "word_id": data.word_id})
-            else:
-                db.execute(text('''
-                    UPDATE word_reviews 
-                    SET wrong_count = wrong_count + 1, last_reviewed = :last_reviewed 
-                    WHERE word_id = :word_id
-                '''), {"last_reviewed": datetime.now(), "word_id": data.word_id})
-        else:
-            db.execute(text('''
-                INSERT INTO word_reviews (word_id, correct_count, wrong_count, last_reviewed)
-                VALUES (:word_id, :correct_count, :wrong_count, :last_reviewed)
-            '''), {
-                "word_id": data.word_id,
-                "correct_count": 1 if data.correct else 0,
-                "wrong_count": 0 if data.correct else 1,
-                "last_reviewed": datetime.now()
-            })
 
+@router.post("/{id}/reviews")
+def log_reviews(id: int, data: List[ReviewBatchItem], db: Session = Depends(get_db)):
+    try:
+        session_check = db.execute(text("SELECT id FROM study_sessions WHERE id = :id"), {"id": id}).fetchone()
+        if not session_check:
+            raise HTTPException(status_code=404, detail="Study session not found")
+
+        # Validate every word id with one set query, json_each keeps it to a single bound parameter
+        word_ids = sorted({review.word_id for review in data})
+        missing = db.execute(text('''
+            SELECT ids.value AS word_id
+            FROM json_each(:word_ids) ids
+            LEFT JOIN words w ON w.id = ids.value
+            WHERE w.id IS NULL
+        '''), {"word_ids": json.dumps(word_ids)}).scalars().all()
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Words not found: {missing}")
+
+        now = datetime.now()
+        _apply_reviews(db, id, [(review.word_id, review.correct, review.ts or now) for review in data])
         db.commit()
-        return {"message": "Review logged successfully"}
+        return {"message": "Reviews logged successfully", "count": len(data)}
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _apply_reviews(db: Session, session_id: int, reviews: List[Tuple[int, bool, datetime]]):
+    """
+    Write (word_id, correct, reviewed_at) reviews for an existing session: one executemany for the
+    review items, one upsert for the per-word word_reviews counters and the dashboard summary.
+    The caller validates the ids and commits.
+    """
+    if not reviews:
+        return
+    # Stored timestamps are naive local time (datetime.now()); client ts values may carry an offset
+    reviews = [
+        (word_id, correct, reviewed_at.astimezone().replace(tzinfo=None) if reviewed_at.tzinfo else reviewed_at)
+        for word_id, correct, reviewed_at in reviews
+    ]
+
+    db.execute(text('''
+        INSERT INTO word_review_items (word_id, correct, study_session_id, created_at)
+        VALUES (:word_id, :correct, :study_session_id, :created_at)
+    '''), [{
+        "word_id": word_id,
+        "correct": correct,
+        "study_session_id": session_id,
+        "created_at": reviewed_at
+    } for word_id, correct, reviewed_at in reviews])
+
+    counters = {}
+    for word_id, correct, reviewed_at in reviews:
+        counter = counters.setdefault(word_id, {"word_id": word_id, "correct_count": 0, "wrong_count": 0, "last_reviewed": reviewed_at})
+        counter["correct_count" if correct else "wrong_count"] += 1
+        counter["last_reviewed"] = max(counter["last_reviewed"], reviewed_at)
+
+    db.execute(text('''
+        INSERT INTO word_reviews (word_id, correct_count, wrong_count, last_reviewed)
+        VALUES (:word_id, :correct_count, :wrong_count, :last_reviewed)
+        ON CONFLICT(word_id) DO UPDATE SET
+            correct_count = correct_count + excluded.correct_count,
+            wrong_count = wrong_count + excluded.wrong_count,
+            last_reviewed = MAX(last_reviewed, excluded.last_reviewed)
+    '''), list(counters.values()))
+
+    record_reviews(db, [(word_id, correct) for word_id, correct, _ in reviews])
+    bump_versions(db, "reviews")
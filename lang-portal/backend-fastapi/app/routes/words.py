@@ -1,22 +1,97 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import text
-from database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db, get_async_db
 from schemas import WordResponse, PaginatedResponse
-from typing import List
+from pagination import WORD_SORT_COLUMNS, decode_cursor, encode_cursor, keyset_clause
+from typing import List, Optional
 import math
+import os
 
 router = APIRouter(prefix="/words", tags=["Words"])
 
+# bm25 has to score every match, so short prefixes ("a", "to") matching most of the table get expensive.
+# Queries with at most SEARCH_RANK_CANDIDATES matches are ranked in full. Broader ones rank only the first
+# SEARCH_RANK_CANDIDATES prefix matches by rowid; a single-term query first returns the words whose kanji or
+# romaji equal the term, so an exact hit is never lost to the cap.
+SEARCH_RANK_CANDIDATES = int(os.getenv("SEARCH_RANK_CANDIDATES", "1000"))
+
+# Ranked matches of :match; {cutoff} optionally limits them to the first :candidates rowids
+RANKED_SEARCH = '''
+    SELECT w.id, w.kanji, w.romaji, w.english,
+           COALESCE(r.correct_count, 0) AS correct_count,
+           COALESCE(r.wrong_count, 0) AS wrong_count
+    FROM (
+        SELECT rowid, bm25(words_fts, 10.0, 5.0, 5.0, 1.0) AS rank
+        FROM words_fts
+        WHERE words_fts MATCH :match {cutoff}
+        ORDER BY rank
+        LIMIT :limit
+    ) m
+    JOIN words w ON w.id = m.rowid
+    LEFT JOIN word_reviews r ON w.id = r.word_id
+    ORDER BY m.rank
+'''
+CANDIDATE_CUTOFF = '''AND rowid <= COALESCE(
+    (SELECT rowid FROM words_fts WHERE words_fts MATCH :match LIMIT 1 OFFSET :candidates),
+    9223372036854775807
+)'''
+# Words whose kanji or romaji equal the search term, kanji hits first
+EXACT_SEARCH = '''
+    SELECT w.id, w.kanji, w.romaji, w.english,
+           COALESCE(r.correct_count, 0) AS correct_count,
+           COALESCE(r.wrong_count, 0) AS wrong_count
+    FROM words w
+    LEFT JOIN word_reviews r ON w.id = r.word_id
+    WHERE w.kanji = :term OR w.romaji = :romaji
+    ORDER BY w.kanji != :term, w.id
+    LIMIT :limit
+'''
+
+async_router = APIRouter(prefix="/words", tags=["Words"])
+
 @router.get("/", response_model=PaginatedResponse[WordResponse])
 def get_words(
     db: Session = Depends(get_db),
     page: int = Query(1, alias="page"),
     per_page: int = Query(50, alias="per_page"),
     sort_by: str = Query("kanji", enum=["kanji", "romaji", "english", "correct_count", "wrong_count"]),
-    order: str = Query("asc", enum=["asc", "desc"])
+    order: str = Query("asc", enum=["asc", "desc"]),
+    after: Optional[str] = Query(None, alias="after")
 ):
+    # Keyset mode: pass ?after= (empty) for the first page, then the returned next_cursor
+    position = decode_cursor(after, sort_by, order) if after is not None else None
     try:
+        sort_expr = WORD_SORT_COLUMNS[sort_by]
+
+        if after is not None:
+            where, params = keyset_clause(sort_expr, order, position)
+            result = db.execute(text(f'''
+                SELECT w.id, w.kanji, w.romaji, w.english,
+                       COALESCE(r.correct_count, 0) AS correct_count,
+                       COALESCE(r.wrong_count, 0) AS wrong_count
+                FROM words w
+                LEFT JOIN word_reviews r ON w.id = r.word_id
+                WHERE {where}
+                ORDER BY {sort_expr} {order}, w.id {order}
+                LIMIT :limit
+            '''), {**params, "limit": per_page + 1})
+            words = result.fetchall()
+
+            next_cursor = None
+            if len(words) > per_page:
+                words = words[:per_page]
+                last = words[-1]
+                next_cursor = encode_cursor(sort_by, order, getattr(last, sort_by), last.id)
+
+            return PaginatedResponse(
+                items=[_word_item(word) for word in words],
+                page=page,
+                per_page=per_page,
+                next_cursor=next_cursor
+            )
+
         offset = (page - 1) * per_page
 
         total_count = db.execute(text("SELECT COUNT(*) FROM words")).scalar()
@@ -33,14 +108,7 @@ def get_words(
         words = result.fetchall()
 
         return PaginatedResponse(
-            items=[{
-                "id": word.id,
-                "kanji": word.kanji,
-                "romaji": word.romaji,
-                "english": word.english,
-                "correct_count": word.correct_count,
-                "wrong_count": word.wrong_count
-            } for word in words],
+            items=[_word_item(word) for word in words],
             total=total_count,
             page=page,
             per_page=per_page,
@@ -50,6 +118,55 @@ def get_words(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _word_item(word) -> dict:
+    return {
+        "id": word.id,
+        "kanji": word.kanji,
+        "romaji": word.romaji,
+        "english": word.english,
+        "correct_count": word.correct_count,
+        "wrong_count": word.wrong_count
+    }
+
+
+@router.get("/search", response_model=List[WordResponse])
+def search_words(
+    q: str = Query(..., min_length=1, alias="q"),
+    limit: int = Query(20, ge=1, le=100, alias="limit"),
+    db: Session = Depends(get_db)
+):
+    # Each whitespace-separated term is a quoted prefix match, so partial input works for type-ahead
+    terms = [term.replace('"', '') for term in q.split() if term.replace('"', '')]
+    match = " ".join(f'"{term}"*' for term in terms)
+    if not match:
+        return []
+    try:
+        # A match beyond the cap exists only for broad queries
+        broad = db.execute(
+            text("SELECT rowid FROM words_fts WHERE words_fts MATCH :match LIMIT 1 OFFSET :candidates"),
+            {"match": match, "candidates": SEARCH_RANK_CANDIDATES}
+        ).fetchone() is not None
+        if not broad:
+            rows = db.execute(text(RANKED_SEARCH.format(cutoff="")), {"match": match, "limit": limit}).fetchall()
+        else:
+            # Exact kanji/romaji hits come from the column indexes, so they cost no extra FTS scan. With several
+            # terms a word must match all of them, which an equality on one column cannot express.
+            rows = []
+            if len(terms) == 1:
+                rows = db.execute(text(EXACT_SEARCH), {
+                    "term": terms[0], "romaji": terms[0].lower(), "limit": limit
+                }).fetchall()
+            if len(rows) < limit:
+                seen = {row.id for row in rows}
+                rest = db.execute(text(RANKED_SEARCH.format(cutoff=CANDIDATE_CUTOFF)), {
+                    "match": match, "limit": limit + len(rows), "candidates": SEARCH_RANK_CANDIDATES
+                }).fetchall()
+                rows += [row for row in rest if row.id not in seen][:limit - len(rows)]
+        return [_word_item(word) for word in rows]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/{word_id}", response_model=WordResponse)
 def get_word(word_id: int, db: Session = Depends(get_db)):
     try:
@@ -90,3 +207,34 @@ def get_word(word_id: int, db: Session = Depends(get_db)):
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# Async variants of the read endpoints, mounted ahead of `router` when DATABASE_ASYNC is set.
+# They run the handlers above on the aiosqlite engine through AsyncSession.run_sync,
+# so the event loop serves requests without a threadpool hop per call.
+@async_router.get("/", response_model=PaginatedResponse[WordResponse])
+async def get_words_async(
+    db: AsyncSession = Depends(get_async_db),
+    page: int = Query(1, alias="page"),
+    per_page: int = Query(50, alias="per_page"),
+    sort_by: str = Query("kanji", enum=["kanji", "romaji", "english", "correct_count", "wrong_count"]),
+    order: str = Query("asc", enum=["asc", "desc"]),
+    after: Optional[str] = Query(None, alias="after")
+):
+    return await db.run_sync(lambda session: get_words(
+        db=session, page=page, per_page=per_page, sort_by=sort_by, order=order, after=after
+    ))
+
+
+@async_router.get("/search", response_model=List[WordResponse])
+async def search_words_async(
+    q: str = Query(..., min_length=1, alias="q"),
+    limit: int = Query(20, ge=1, le=100, alias="limit"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await db.run_sync(lambda session: search_words(q=q, limit=limit, db=session))
+
+
+@async_router.get("/{word_id}", response_model=WordResponse)
+async def get_word_async(word_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(lambda session: get_word(word_id=word_id, db=session))
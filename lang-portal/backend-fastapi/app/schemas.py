@@ -106,10 +106,11 @@ class StudyStatsResponse(BaseModel):
         
 class PaginatedResponse(BaseModel, Generic[T]):
     items: List[T]
-    total: int
+    total: Optional[int] = None
     page: int
     per_page: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -120,4 +121,9 @@ class StudySessionCreateRequest(BaseModel):
 
 class ReviewLogRequest(BaseModel):
     word_id: int
-    correct: bool
\ No newline at end of file
+    correct: bool
+
+class ReviewBatchItem(BaseModel):
+    word_id: int
+    correct: bool
+    ts: Optional[datetime] = None
@@ -0,0 +1,205 @@
+from datetime import date, datetime
+from typing import Iterable, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import text
+import json
+
+# A word counts as mastered after this many attempts at this success rate or better
+MASTERY_MIN_ATTEMPTS = 5
+MASTERY_SUCCESS_RATE = 0.8
+
+
+def _is_mastered(attempts: int, successes: int) -> bool:
+    return attempts >= MASTERY_MIN_ATTEMPTS and successes * 1.0 / attempts >= MASTERY_SUCCESS_RATE
+
+
+def _ensure_totals(db: Session):
+    # The word count is only taken when the row is missing, afterwards the words triggers keep it
+    db.execute(text('''
+        INSERT INTO study_stats
+            (id, total_attempts, total_successes, words_studied, mastered_words, total_sessions, streak_days,
+             last_study_date, total_vocabulary)
+        SELECT 1, 0, 0, 0, 0, 0, 0, NULL, (SELECT COUNT(*) FROM words)
+        WHERE NOT EXISTS (SELECT 1 FROM study_stats WHERE id = 1)
+    '''))
+
+
+def record_reviews(db: Session, reviews: Iterable[Tuple[int, bool]]):
+    """
+    Fold (word_id, correct) reviews into the summary tables.
+    Runs inside the caller's transaction, the caller commits.
+    """
+    per_word = {}
+    for word_id, correct in reviews:
+        attempts, successes = per_word.get(word_id, (0, 0))
+        per_word[word_id] = (attempts + 1, successes + (1 if correct else 0))
+    if not per_word:
+        return
+
+    existing = {
+        row.word_id: (row.attempts, row.successes)
+        for row in db.execute(
+            text('''
+                SELECT word_id, attempts, successes
+                FROM word_review_stats
+                WHERE word_id IN (SELECT value FROM json_each(:word_ids))
+            '''),
+            {"word_ids": json.dumps(list(per_word))}
+        )
+    }
+
+    rows = []
+    new_words = 0
+    mastered_delta = 0
+    for word_id, (attempts, successes) in per_word.items():
+        old_attempts, old_successes = existing.get(word_id, (0, 0))
+        if word_id not in existing:
+            new_words += 1
+        new_attempts, new_successes = old_attempts + attempts, old_successes + successes
+        mastered_delta += _is_mastered(new_attempts, new_successes) - _is_mastered(old_attempts, old_successes)
+        rows.append({"word_id": word_id, "attempts": new_attempts, "successes": new_successes})
+
+    db.execute(text('''
+        INSERT INTO word_review_stats (word_id, attempts, successes)
+        VALUES (:word_id, :attempts, :successes)
+        ON CONFLICT(word_id) DO UPDATE SET attempts = excluded.attempts, successes = excluded.successes
+    '''), rows)
+
+    _ensure_totals(db)
+    db.execute(text('''
+        UPDATE study_stats
+        SET total_attempts = total_attempts + :attempts,
+            total_successes = total_successes + :successes,
+            words_studied = words_studied + :new_words,
+            mastered_words = mastered_words + :mastered_delta
+        WHERE id = 1
+    '''), {
+        "attempts": sum(attempts for attempts, _ in per_word.values()),
+        "successes": sum(successes for _, successes in per_word.values()),
+        "new_words": new_words,
+        "mastered_delta": mastered_delta
+    })
+
+
+def record_session(db: Session, group_id: int, created_at: datetime):
+    """
+    Fold a new study session into the per-day counts, the session total and the streak.
+    Runs inside the caller's transaction, the caller commits.
+    """
+    study_date = created_at.date()
+    first_of_day = db.execute(
+        text('SELECT 1 FROM daily_study_stats WHERE study_date = :study_date LIMIT 1'),
+        {"study_date": study_date.isoformat()}
+    ).fetchone() is None
+
+    db.execute(text('''
+        INSERT INTO daily_study_stats (study_date, group_id, sessions_count)
+        VALUES (:study_date, :group_id, 1)
+        ON CONFLICT(study_date, group_id) DO UPDATE SET sessions_count = sessions_count + 1
+    '''), {"study_date": study_date.isoformat(), "group_id": group_id})
+
+    _ensure_totals(db)
+    last_study_date = db.execute(text('SELECT last_study_date FROM study_stats WHERE id = 1')).scalar()
+    last_study_date = date.fromisoformat(last_study_date) if last_study_date else None
+
+    # Same rule as the streak query in rebuild_stats: count days that directly follow the previous study day.
+    # Sessions arrive in date order, so a new day can only extend the latest one.
+    streak_delta = 0
+    if first_of_day and (last_study_date is None or (study_date - last_study_date).days == 1):
+        streak_delta = 1
+    if last_study_date is not None and study_date < last_study_date:
+        study_date = last_study_date
+
+    db.execute(text('''
+        UPDATE study_stats
+        SET total_sessions = total_sessions + 1,
+            streak_days = streak_days + :streak_delta,
+            last_study_date = :last_study_date
+        WHERE id = 1
+    '''), {"streak_delta": streak_delta, "last_study_date": study_date.isoformat()})
+
+
+def reset_stats(db: Session):
+    """Clear the summary tables along with the study history"""
+    db.execute(text('DELETE FROM word_review_stats'))
+    db.execute(text('DELETE FROM daily_study_stats'))
+    db.execute(text('DELETE FROM study_stats'))
+    _ensure_totals(db)
+
+
+def rebuild_stats(db: Session):
+    """Recompute every summary table from word_review_items and study_sessions"""
+    db.execute(text('DELETE FROM word_review_stats'))
+    db.execute(text('DELETE FROM daily_study_stats'))
+    db.execute(text('DELETE FROM study_stats'))
+
+    db.execute(text('''
+        INSERT INTO word_review_stats (word_id, attempts, successes)
+        SELECT word_id, COUNT(*), SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END)
+        FROM word_review_items
+        JOIN study_sessions ON word_review_items.study_session_id = study_sessions.id
+        GROUP BY word_id
+    '''))
+    db.execute(text('''
+        INSERT INTO daily_study_stats (study_date, group_id, sessions_count)
+        SELECT date(created_at), group_id, COUNT(*)
+        FROM study_sessions
+        WHERE created_at IS NOT NULL
+        GROUP BY date(created_at), group_id
+    '''))
+    db.execute(text('''
+        WITH streak_calc AS (
+            SELECT
+                study_date,
+                julianday(study_date) - julianday(lag(study_date, 1) over (order by study_date)) as days_diff
+            FROM (SELECT DISTINCT study_date FROM daily_study_stats)
+        )
+        INSERT INTO study_stats
+            (id, total_attempts, total_successes, words_studied, mastered_words, total_sessions, streak_days,
+             last_study_date, total_vocabulary)
+        SELECT
+            1,
+            (SELECT COALESCE(SUM(attempts), 0) FROM word_review_stats),
+            (SELECT COALESCE(SUM(successes), 0) FROM word_review_stats),
+            (SELECT COUNT(*) FROM word_review_stats),
+            (SELECT COUNT(*) FROM word_review_stats
+             WHERE attempts >= :min_attempts AND successes * 1.0 / attempts >= :min_rate),
+            (SELECT COUNT(*) FROM study_sessions),
+            (SELECT COUNT(*) FROM streak_calc WHERE days_diff = 1 OR days_diff IS NULL),
+            (SELECT MAX(study_date) FROM daily_study_stats),
+            (SELECT COUNT(*) FROM words)
+    '''), {"min_attempts": MASTERY_MIN_ATTEMPTS, "min_rate": MASTERY_SUCCESS_RATE})
+
+
+def read_stats(db: Session) -> dict:
+    """
+    Read the dashboard stats from the summary tables, without writing.
+    `invoke init-db` builds the summary on databases that predate it, until then every stat reads 0.
+    """
+    totals = db.execute(text('SELECT * FROM study_stats WHERE id = 1')).fetchone()
+    if not totals:
+        return {
+            "total_vocabulary": 0,
+            "total_words_studied": 0,
+            "mastered_words": 0,
+            "success_rate": 0,
+            "total_sessions": 0,
+            "active_groups": 0,
+            "current_streak": 0
+        }
+
+    active_groups = db.execute(text('''
+        SELECT COUNT(DISTINCT group_id)
+        FROM daily_study_stats
+        WHERE study_date >= date('now', '-30 days')
+    ''')).scalar()
+
+    return {
+        "total_vocabulary": totals.total_vocabulary,
+        "total_words_studied": totals.words_studied,
+        "mastered_words": totals.mastered_words,
+        "success_rate": totals.total_successes * 1.0 / totals.total_attempts if totals.total_attempts else 0,
+        "total_sessions": totals.total_sessions,
+        "active_groups": active_groups,
+        "current_streak": totals.streak_days
+    }
@@ -1,14 +1,117 @@
 from invoke import task
 from database import engine, Base, SessionLocal
 from models import Group, StudyActivity, StudySession, WordGroup, WordReviewItem, WordReview, Word
+from sqlalchemy.sql import text
+import stats
+from counters import COUNTER_TRIGGERS, REPAIR_STATEMENTS, add_counter_columns, find_drift, repair_counters
+from cache import bump_versions
+from datetime import datetime
+import itertools
 import json
+import os
+import time
+
+# Composite indexes backing keyset pagination on /words and /groups/{id}/words,
+# and the grouped session listings
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_words_kanji_id ON words (kanji, id)",
+    "CREATE INDEX IF NOT EXISTS ix_words_romaji_id ON words (romaji, id)",
+    "CREATE INDEX IF NOT EXISTS ix_words_english_id ON words (english, id)",
+    "CREATE INDEX IF NOT EXISTS ix_word_groups_group_id_word_id ON word_groups (group_id, word_id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_word_reviews_word_id ON word_reviews (word_id)",
+    "CREATE INDEX IF NOT EXISTS ix_word_review_items_session_created ON word_review_items (study_session_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_study_sessions_group_created ON study_sessions (group_id, created_at)",
+]
+
+# FTS5 index behind GET /words/search, kept in sync with words by triggers.
+# parts is indexed as the space-joined text values of its JSON (kanji and romaji pieces).
+FLATTEN_PARTS = "(SELECT group_concat(value, ' ') FROM json_tree({row}.parts) WHERE type = 'text')"
+
+SEARCH_INDEX = [
+    '''CREATE VIRTUAL TABLE IF NOT EXISTS words_fts USING fts5(
+        kanji, romaji, english, parts,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '1 2 3'
+    )''',
+    f'''CREATE TRIGGER IF NOT EXISTS words_fts_insert AFTER INSERT ON words BEGIN
+        INSERT INTO words_fts (rowid, kanji, romaji, english, parts)
+        VALUES (new.id, new.kanji, new.romaji, new.english, {FLATTEN_PARTS.format(row="new")});
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS words_fts_delete AFTER DELETE ON words BEGIN
+        DELETE FROM words_fts WHERE rowid = old.id;
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS words_fts_update AFTER UPDATE ON words BEGIN
+        DELETE FROM words_fts WHERE rowid = old.id;
+        INSERT INTO words_fts (rowid, kanji, romaji, english, parts)
+        VALUES (new.id, new.kanji, new.romaji, new.english, {FLATTEN_PARTS.format(row="new")});
+    END''',
+    # Backfill words that existed before the index
+    f'''INSERT INTO words_fts (rowid, kanji, romaji, english, parts)
+    SELECT w.id, w.kanji, w.romaji, w.english, {FLATTEN_PARTS.format(row="w")}
+    FROM words w
+    WHERE w.id NOT IN (SELECT rowid FROM words_fts)''',
+]
 
 @task
 def init_db(c):
     with engine.begin() as conn:
         print("Initilizing database...")
         Base.metadata.create_all(bind=conn)
+        counters_added = add_counter_columns(conn)
+        for statement in INDEXES + SEARCH_INDEX + COUNTER_TRIGGERS:
+            conn.execute(text(statement))
+        if counters_added:
+            # Backfill counter columns added to an existing database
+            for statement in REPAIR_STATEMENTS:
+                conn.execute(text(statement))
+        if conn.execute(text("SELECT 1 FROM study_stats WHERE id = 1")).fetchone() is None:
+            # Build the dashboard summary once, so reading it never has to
+            stats.rebuild_stats(conn)
         print("Database initialized.")
+
+
+@task
+def rebuild_stats(c):
+    """Rebuild the dashboard summary tables from the raw review history"""
+    db = SessionLocal()
+    try:
+        print("Rebuilding study stats...")
+        stats.rebuild_stats(db)
+        db.commit()
+        print("Study stats rebuilt.")
+    except Exception as e:
+        db.rollback()
+        print(f"Error rebuilding study stats: {e}")
+    finally:
+        db.close()
+
+
+@task(help={"fix": "Overwrite drifted counters with the recomputed values"})
+def check_counters(c, fix=False):
+    """Recompute the trigger-maintained counters and report any drift from the stored values"""
+    db = SessionLocal()
+    try:
+        drift = find_drift(db)
+        for counter, rows in drift.items():
+            if not rows:
+                print(f"{counter}: OK")
+                continue
+            print(f"{counter}: {len(rows)} drifted")
+            for row in rows[:20]:
+                print(f"  id={row['id']} stored={row['stored']} actual={row['actual']}")
+            if len(rows) > 20:
+                print(f"  ... {len(rows) - 20} more")
+
+        if fix and any(drift.values()):
+            repair_counters(db)
+            bump_versions(db, "groups", "study_sessions")
+            db.commit()
+            print("Counters repaired.")
+    except Exception as e:
+        db.rollback()
+        print(f"Error checking counters: {e}")
+    finally:
+        db.close()
         
 @task
 def import_json_data(c):
@@ -55,8 +158,8 @@ def import_json_data(c):
                         )
                         db.add(db_word_group)
                     
-                    # Update word count in the group
-                    db_group.words_count = len(words_data)
+                    # words_count is kept up to date by the word_groups triggers
+                    bump_versions(db, "groups", "words")
                     db.commit()
                     print(f"{len(words_data)} words were imported into the group '{group_name}'")
                 except FileNotFoundError:
@@ -81,6 +184,7 @@ def import_json_data(c):
                         )
                         db.add(db_activity)
                     
+                    bump_versions(db, "study_activities")
                     db.commit()
                     print(f"{len(activities_data)} study activities were imported")
                 except FileNotFoundError:
@@ -94,4 +198,106 @@ def import_json_data(c):
         db.rollback()
         print(f"General error loading data: {e}")
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def _iter_word_records(words_file: str):
+    """Yield word dicts one at a time from a JSON array or a JSONL file without loading it whole"""
+    if words_file.endswith((".jsonl", ".ndjson")):
+        with open(words_file, 'r', encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        try:
+            import ijson
+        except ImportError:
+            raise RuntimeError("Streaming JSON arrays requires ijson: pip install ijson")
+        with open(words_file, 'rb') as file:
+            yield from ijson.items(file, "item")
+
+
+def _insert_word_chunk(db, group_id: int, chunk: list) -> int:
+    """Insert one chunk of words and their word_groups rows, ids are assigned from MAX(id)"""
+    # The MAX(id) read and the inserts share one transaction, so a concurrent writer makes it fail instead of colliding
+    next_id = db.execute(text('SELECT COALESCE(MAX(id), 0) + 1 FROM words')).scalar()
+    words = [{
+        "id": next_id + offset,
+        "kanji": word_data.get('kanji', ''),
+        "romaji": word_data.get('romaji', ''),
+        "english": word_data.get('english', ''),
+        # ijson yields numbers as Decimal
+        "parts": json.dumps(word_data.get('parts', {}), default=float)
+    } for offset, word_data in enumerate(chunk)]
+
+    db.execute(text('''
+        INSERT INTO words (id, kanji, romaji, english, parts)
+        VALUES (:id, :kanji, :romaji, :english, :parts)
+    '''), words)
+    db.execute(text('''
+        INSERT INTO word_groups (word_id, group_id) VALUES (:word_id, :group_id)
+    '''), [{"word_id": word["id"], "group_id": group_id} for word in words])
+    return len(words)
+
+
+@task(help={
+    "words_file": "JSON array or JSONL file of {kanji, romaji, english, parts} entries",
+    "group_name": "Group the words are added to, created if the import is not being resumed",
+    "chunk_size": "Words inserted and committed per transaction",
+    "resume": "Continue after the last committed chunk of a previous run of the same file and group",
+})
+def import_words_stream(c, words_file, group_name, chunk_size=5000, resume=True):
+    """Stream a large vocabulary file into words/word_groups in batched, resumable chunks"""
+    chunk_size = int(chunk_size)
+    source = f"{os.path.abspath(words_file)}::{group_name}"
+    if not os.path.exists(words_file):
+        print(f"File not found: {words_file}")
+        return
+
+    db = SessionLocal()
+    try:
+        progress = db.execute(text('SELECT group_id, rows_committed FROM import_progress WHERE source = :source'),
+                              {"source": source}).fetchone()
+        if progress and resume:
+            group_id, skip = progress.group_id, progress.rows_committed
+            print(f"Resuming '{group_name}' after {skip} committed words")
+        else:
+            group_id = db.execute(text('INSERT INTO groups (name, words_count) VALUES (:name, 0)'),
+                                  {"name": group_name}).lastrowid
+            skip = 0
+            db.execute(text('''
+                INSERT INTO import_progress (source, group_id, rows_committed, updated_at)
+                VALUES (:source, :group_id, 0, :updated_at)
+                ON CONFLICT(source) DO UPDATE SET group_id = excluded.group_id, rows_committed = 0, updated_at = excluded.updated_at
+            '''), {"source": source, "group_id": group_id, "updated_at": datetime.now()})
+            db.commit()
+
+        committed = skip
+        imported = 0
+        started = time.perf_counter()
+        records = itertools.islice(_iter_word_records(words_file), skip, None)
+
+        while True:
+            chunk = list(itertools.islice(records, chunk_size))
+            if not chunk:
+                break
+            chunk_started = time.perf_counter()
+            inserted = _insert_word_chunk(db, group_id, chunk)
+            committed += inserted
+            db.execute(text('''
+                UPDATE import_progress SET rows_committed = :rows, updated_at = :updated_at WHERE source = :source
+            '''), {"rows": committed, "updated_at": datetime.now(), "source": source})
+            bump_versions(db, "groups", "words")
+            db.commit()
+
+            imported += inserted
+            chunk_rate = inserted / max(time.perf_counter() - chunk_started, 1e-9)
+            print(f"Committed {committed} words ({chunk_rate:,.0f} rows/sec)")
+
+        elapsed = time.perf_counter() - started
+        print(f"{imported} words were imported into the group '{group_name}' "
+              f"in {elapsed:.1f}s ({imported / max(elapsed, 1e-9):,.0f} rows/sec)")
+    except Exception as e:
+        db.rollback()
+        print(f"Error importing words for the group '{group_name}': {e}")
+    finally:
+        db.close()
@@ -0,0 +1,114 @@
+"""
+Latency of GET /words/search over a synthetic vocabulary.
+
+Builds a throwaway SQLite database with --words synthetic entries (default 500k),
+creates the schema, indexes and FTS triggers exactly as `invoke init-db` does,
+then times the search handler for random type-ahead prefixes.
+
+Run with:
+
+    python benchmarks/search_benchmark.py --words 500000 --queries 2000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+# Point the app at the throwaway database before it creates its engines
+_tmpdir = tempfile.mkdtemp(prefix="search_bench_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'words.db')}"
+
+from sqlalchemy.sql import text  # noqa: E402
+from database import Base, SessionLocal, engine  # noqa: E402
+from routes.words import search_words  # noqa: E402
+from tasks import INDEXES, SEARCH_INDEX  # noqa: E402
+
+KANA = "あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわん"
+ROMAJI = ["a", "i", "u", "e", "o", "ka", "ki", "ku", "ke", "ko", "sa", "shi", "su", "se", "so", "ta", "chi",
+          "tsu", "te", "to", "na", "ni", "nu", "ne", "no", "ha", "hi", "fu", "he", "ho", "ma", "mi", "mu", "me",
+          "mo", "ya", "yu", "yo", "ra", "ri", "ru", "re", "ro", "wa", "n"]
+ENGLISH = ["to go", "to eat", "to pay", "red", "blue", "house", "train", "station", "book", "to read",
+           "to write", "early", "late", "school", "teacher", "friend", "water", "mountain", "river", "city"]
+
+
+def synthetic_words(count: int, rng: random.Random):
+    for i in range(count):
+        syllables = [rng.randrange(len(KANA)) for _ in range(rng.randint(2, 4))]
+        kanji = "".join(KANA[s] for s in syllables)
+        romaji = "".join(ROMAJI[s] for s in syllables)
+        yield {
+            "kanji": kanji,
+            "romaji": romaji,
+            "english": f"{rng.choice(ENGLISH)} {i}",
+            "parts": json.dumps([{"kanji": KANA[s], "romaji": [ROMAJI[s]]} for s in syllables]),
+        }
+
+
+def build_database(count: int, rng: random.Random):
+    with engine.begin() as conn:
+        Base.metadata.create_all(bind=conn)
+        for statement in INDEXES + SEARCH_INDEX:
+            conn.execute(text(statement))
+
+    started = time.perf_counter()
+    batch = []
+    with engine.begin() as conn:
+        for word in synthetic_words(count, rng):
+            batch.append(word)
+            if len(batch) == 10000:
+                conn.execute(text("INSERT INTO words (kanji, romaji, english, parts) VALUES (:kanji, :romaji, :english, :parts)"), batch)
+                batch = []
+        if batch:
+            conn.execute(text("INSERT INTO words (kanji, romaji, english, parts) VALUES (:kanji, :romaji, :english, :parts)"), batch)
+    print(f"Inserted and indexed {count:,} words in {time.perf_counter() - started:.1f}s")
+
+
+def random_query(rng: random.Random) -> str:
+    kind = rng.random()
+    if kind < 0.4:
+        return "".join(rng.choice(ROMAJI) for _ in range(rng.randint(1, 2)))
+    if kind < 0.7:
+        return "".join(rng.choice(KANA) for _ in range(rng.randint(1, 2)))
+    word = rng.choice(ENGLISH)
+    return word[:rng.randint(2, len(word))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=500_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    build_database(args.words, rng)
+
+    db = SessionLocal()
+    try:
+        for _ in range(50):  # warm the page cache
+            search_words(q=random_query(rng), limit=args.limit, db=db)
+        latencies = []
+        for _ in range(args.queries):
+            query = random_query(rng)
+            started = time.perf_counter()
+            search_words(q=query, limit=args.limit, db=db)
+            latencies.append((time.perf_counter() - started) * 1000)
+    finally:
+        db.close()
+
+    latencies.sort()
+    print(f"{args.queries} queries over {args.words:,} words (limit {args.limit})")
+    print(f"p50 {statistics.median(latencies):.2f} ms | p95 {latencies[int(len(latencies) * 0.95) - 1]:.2f} ms | "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.2f} ms | max {latencies[-1]:.2f} ms")
+    print(f"Database left at {_tmpdir}")
+
+
+if __name__ == "__main__":
+    main()
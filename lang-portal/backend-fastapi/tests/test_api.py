@@ -1,6 +1,9 @@
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from counters import DRIFT_QUERIES, find_drift
+from database import SessionLocal
+from sqlalchemy.sql import text
 from datetime import datetime
 
 client = TestClient(app)
@@ -38,6 +41,73 @@ def test_get_words():
     assert response.status_code == 200
     assert "items" in response.json()
 
+def test_get_words_cursor_pages_do_not_overlap():
+    first = client.get("/words", params={"after": "", "per_page": 5})
+    assert first.status_code == 200
+    cursor = first.json()["next_cursor"]
+    assert cursor
+    second = client.get("/words", params={"after": cursor, "per_page": 5})
+    assert second.status_code == 200
+    first_ids = {word["id"] for word in first.json()["items"]}
+    second_ids = {word["id"] for word in second.json()["items"]}
+    assert first_ids and second_ids and not first_ids & second_ids
+
+def test_get_words_invalid_cursor():
+    response = client.get("/words", params={"after": "not-a-cursor"})
+    assert response.status_code == 400
+
+def test_search_words_prefix():
+    response = client.get("/words/search", params={"q": "to pa"})
+    assert response.status_code == 200
+    results = response.json()
+    assert results
+    assert results[0]["english"] == "to pay"
+
+def test_search_words_broad_query_keeps_exact_match(monkeypatch):
+    # More prefix matches than the ranking cap, with the exact match inserted last (highest rowid)
+    monkeypatch.setattr("routes.words.SEARCH_RANK_CANDIDATES", 2)
+    db = SessionLocal()
+    try:
+        for romaji in ["zzqa", "zzqb", "zzqc", "zzqd", "zzq"]:
+            db.execute(text(
+                "INSERT INTO words (kanji, romaji, english, parts) VALUES (:kanji, :romaji, 'test word', '[]')"
+            ), {"kanji": romaji.upper(), "romaji": romaji})
+        db.commit()
+        response = client.get("/words/search", params={"q": "zzq", "limit": 3})
+        assert response.status_code == 200
+        results = response.json()
+        assert len(results) == 3
+        assert results[0]["romaji"] == "zzq"
+    finally:
+        db.execute(text("DELETE FROM words WHERE romaji LIKE 'zzq%'"))
+        db.commit()
+        db.close()
+
+def test_search_words_broad_query_matches_every_term(monkeypatch):
+    # "zzq" equals a romaji but lacks the second term, so it must not be returned
+    monkeypatch.setattr("routes.words.SEARCH_RANK_CANDIDATES", 2)
+    db = SessionLocal()
+    try:
+        for romaji, english in [("zzqa", "zzw word"), ("zzqb", "zzw word"), ("zzqc", "zzw word"),
+                                ("zzqd", "zzw word"), ("zzq", "test word")]:
+            db.execute(text(
+                "INSERT INTO words (kanji, romaji, english, parts) VALUES (:kanji, :romaji, :english, '[]')"
+            ), {"kanji": romaji.upper(), "romaji": romaji, "english": english})
+        db.commit()
+        response = client.get("/words/search", params={"q": "zzq zzw", "limit": 3})
+        assert response.status_code == 200
+        results = response.json()
+        assert len(results) == 3
+        assert all(word["english"] == "zzw word" for word in results)
+    finally:
+        db.execute(text("DELETE FROM words WHERE romaji LIKE 'zzq%'"))
+        db.commit()
+        db.close()
+
+def test_search_words_requires_query():
+    response = client.get("/words/search")
+    assert response.status_code == 422
+
 def test_get_word_not_found():
     response = client.get("/words/9999")
     assert response.status_code == 404
@@ -48,6 +118,18 @@ def test_get_study_activities():
     assert response.status_code == 200
     assert isinstance(response.json(), list)
 
+def test_get_study_activities_etag_not_modified():
+    first = client.get("/study-activities/")
+    etag = first.headers["etag"]
+    response = client.get("/study-activities/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+def test_get_cache_metrics():
+    response = client.get("/metrics/cache")
+    assert response.status_code == 200
+    assert {"hits", "misses", "entries"} <= response.json().keys()
+
 def test_get_study_activity_not_found():
     response = client.get("/study-activities/9999")
     assert response.status_code == 404
@@ -64,6 +146,67 @@ def test_log_review_missing_fields():
     response = client.post("/study-sessions/1/review", json=payload)
     assert response.status_code == 422
 
+def test_log_review_updates_dashboard_stats():
+    before = client.get("/dashboard/stats").json()
+    session_id = client.post("/study-sessions/", json={"group_id": 1, "study_activity_id": 1}).json()["session_id"]
+    response = client.post(f"/study-sessions/{session_id}/review", json={"word_id": 1, "correct": True})
+    assert response.status_code == 200
+    after = client.get("/dashboard/stats").json()
+    assert after["total_sessions"] == before["total_sessions"] + 1
+    assert after["total_words_studied"] >= 1
+
+def test_dashboard_stats_vocabulary_follows_words():
+    db = SessionLocal()
+    try:
+        before = client.get("/dashboard/stats").json()["total_vocabulary"]
+        assert before == db.execute(text("SELECT COUNT(*) FROM words")).scalar()
+        db.execute(text("INSERT INTO words (kanji, romaji, english, parts) VALUES ('語彙', 'goi', 'vocabulary', '[]')"))
+        db.commit()
+        assert client.get("/dashboard/stats").json()["total_vocabulary"] == before + 1
+    finally:
+        db.execute(text("DELETE FROM words WHERE romaji = 'goi' AND english = 'vocabulary'"))
+        db.commit()
+        db.close()
+    assert client.get("/dashboard/stats").json()["total_vocabulary"] == before
+
+### Tests for `/study-sessions/{id}/reviews`
+def test_log_reviews_batch():
+    session_id = client.post("/study-sessions/", json={"group_id": 1, "study_activity_id": 1}).json()["session_id"]
+    payload = [
+        {"word_id": 1, "correct": True},
+        {"word_id": 2, "correct": False, "ts": datetime.now().isoformat()},
+        {"word_id": 1, "correct": False}
+    ]
+    response = client.post(f"/study-sessions/{session_id}/reviews", json=payload)
+    assert response.status_code == 200
+    assert response.json()["count"] == 3
+
+    session = client.get(f"/study-sessions/{session_id}").json()
+    assert session["review_items_count"] == 3
+
+def test_log_reviews_batch_mixed_timezones():
+    session_id = client.post("/study-sessions/", json={"group_id": 1, "study_activity_id": 1}).json()["session_id"]
+    payload = [
+        {"word_id": 3, "correct": True, "ts": "2024-05-01T09:00:00+09:00"},
+        {"word_id": 3, "correct": False}
+    ]
+    response = client.post(f"/study-sessions/{session_id}/reviews", json=payload)
+    assert response.status_code == 200
+    assert response.json()["count"] == 2
+
+def test_counters_have_no_drift():
+    db = SessionLocal()
+    try:
+        assert find_drift(db) == {counter: [] for counter in DRIFT_QUERIES}
+    finally:
+        db.close()
+
+def test_log_reviews_batch_unknown_word():
+    session_id = client.post("/study-sessions/", json={"group_id": 1, "study_activity_id": 1}).json()["session_id"]
+    payload = [{"word_id": 1, "correct": True}, {"word_id": 999999, "correct": True}]
+    response = client.post(f"/study-sessions/{session_id}/reviews", json=payload)
+    assert response.status_code == 404
+
 ### Tests for `/groups/{id}/words/raw`
 def test_get_group_words_raw():
     response = client.get("/groups/1/words/raw")
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql import text
+from app.main import app
+from database import Base, get_db
+from counters import COUNTER_TRIGGERS
+from tasks import INDEXES
+
+SESSIONS_PER_GROUP = 10_000
+
+### Regression benchmark for `/groups/{id}/study_sessions`: the statement count must not grow with the page size or depth
+@pytest.fixture(scope="module")
+def bench_client(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('bench') / 'words.db'}")
+    Base.metadata.create_all(bind=engine)
+    start = datetime(2025, 1, 1, 9, 0, 0)
+
+    with engine.begin() as conn:
+        for statement in INDEXES + COUNTER_TRIGGERS:
+            conn.execute(text(statement))
+        conn.execute(text("INSERT INTO groups (id, name, words_count) VALUES (1, 'Bench', 1)"))
+        conn.execute(text("INSERT INTO study_activities (id, name, url) VALUES (1, 'Bench', 'http://localhost')"))
+        conn.execute(text("INSERT INTO words (id, kanji, romaji, english, parts) VALUES (1, '行く', 'iku', 'to go', '[]')"))
+        conn.execute(text('''
+            INSERT INTO study_sessions (id, group_id, study_activity_id, created_at)
+            VALUES (:id, 1, 1, :created_at)
+        '''), [{"id": i, "created_at": start + timedelta(minutes=i)} for i in range(1, SESSIONS_PER_GROUP + 1)])
+        # Every other session gets three reviews, the rest fall back to start + 30 minutes
+        conn.execute(text('''
+            INSERT INTO word_review_items (word_id, study_session_id, correct, created_at)
+            VALUES (1, :session_id, 1, :created_at)
+        '''), [
+            {"session_id": i, "created_at": start + timedelta(minutes=i, seconds=10 * n)}
+            for i in range(2, SESSIONS_PER_GROUP + 1, 2) for n in range(1, 4)
+        ])
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    TestingSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = TestingSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app), statements
+    app.dependency_overrides.pop(get_db, None)
+    engine.dispose()
+
+
+@pytest.mark.parametrize("sort_by", ["created_at", "review_items_count", "last_activity_time"])
+@pytest.mark.parametrize("page", [1, 500, 1000])
+def test_group_study_sessions_constant_statements(bench_client, sort_by, page):
+    client, statements = bench_client
+    statements.clear()
+
+    response = client.get("/groups/1/study_sessions", params={"page": page, "sort_by": sort_by})
+
+    assert response.status_code == 200
+    sessions = response.json()
+    assert len(sessions) == 10
+    assert len(statements) == 1, statements
+
+
+def test_group_study_sessions_end_time_fallback(bench_client):
+    client, _ = bench_client
+    sessions = client.get("/groups/1/study_sessions", params={"sort_by": "created_at", "order": "asc"}).json()
+
+    without_reviews, with_reviews = sessions[0], sessions[1]
+    assert without_reviews["review_items_count"] == 0
+    start = datetime.fromisoformat(without_reviews["start_time"])
+    assert datetime.fromisoformat(without_reviews["end_time"]) == start.replace(microsecond=0) + timedelta(minutes=30)
+    assert with_reviews["review_items_count"] == 3
+    assert datetime.fromisoformat(with_reviews["end_time"]) > datetime.fromisoformat(with_reviews["start_time"])
@@ -1,29 +1,132 @@
-import boto3
+import hashlib
 import json
 import os
-from typing import Dict, List, Tuple
-import tempfile
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from google.cloud import texttospeech
-from azure.cognitiveservices.speech import SpeechConfig, SpeechSynthesizer
-from azure.cognitiveservices.speech.audio import AudioOutputConfig
+from backend.llm_cache import cached_call
+from backend import mp3
+from backend.tts_cache import ANNOUNCER_PHRASES, ClipCache, default_clip_cache
+from backend.tts_providers import TTS_PROVIDER, PollyProvider, TTSRegistry
+from backend.resources import aws_client
+
+# Parts synthesized concurrently per question
+TTS_MAX_WORKERS = int(os.getenv('TTS_MAX_WORKERS', '4'))
+# How the parts are joined: 'memory' (frame-level concatenation) or 'ffmpeg' (one remux through stdin)
+AUDIO_CONCAT = os.getenv('AUDIO_CONCAT', 'memory')
+# Parsed scripts kept in memory per question
+PARSE_MEMO_MAX_ENTRIES = int(os.getenv('PARSE_MEMO_MAX_ENTRIES', '512'))
+
+# A candidate speaker label such as 男性:, 女の人：, A: or 田中: at the start of a turn; a colon between
+# digits is a time or ratio (10:30), never a label
+SPEAKER_MARKER = re.compile(
+    r'(?:^|(?<=[\s。！？!?」]))([^\s:：。、！？!?「」]{1,10})\s*[:：](?!(?<=[0-9０-９][:：])[0-9０-９])\s*'
+)
+# Candidates accepted as labels without the Introduction naming them
+KNOWN_SPEAKER_LABEL = re.compile(r'(?:男|女)(?:の人|性|の子)?|[A-Za-zＡ-Ｚａ-ｚ]|[Mm]an|[Ww]oman')
+# Latin labels with a conventional gender
+LABEL_GENDERS = {'m': 'male', 'man': 'male', 'f': 'female', 'w': 'female', 'woman': 'female'}
+
+
+def question_key(question: Dict) -> str:
+    return hashlib.sha256(json.dumps(question, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _genders_in_order(text: str) -> List[str]:
+    """Genders in the order the text first mentions them, e.g. 男の先生と女の留学生 -> [male, female]"""
+    genders = []
+    for char in text:
+        gender = {'男': 'male', '女': 'female'}.get(char)
+        if gender and gender not in genders:
+            genders.append(gender)
+    return genders
+
+
+def _label_gender(label: str) -> Optional[str]:
+    if '女' in label:
+        return 'female'
+    if '男' in label:
+        return 'male'
+    return LABEL_GENDERS.get(label.lower())
+
+
+def parse_conversation_locally(question: Dict) -> Optional[List[Tuple[str, str, str]]]:
+    """
+    Split a question into (speaker, text, gender) parts without an LLM, or None when it cannot tell
+    who says what. Turns come from speaker labels in the Conversation (男性: ... 女性: ...): 男/女 forms, single
+    letters, or names the Introduction mentions. Labels without 男/女 (A:, names) get their gender from the
+    order the Introduction mentions them. An unlabelled
+    Conversation is only accepted when at most one gender is mentioned, and is read as a monologue.
+    """
+    introduction = (question.get('Introduction') or '').strip()
+    situation = (question.get('Situation') or '').strip()
+    conversation = (question.get('Conversation') or '').strip()
+    question_text = (question.get('Question') or '').strip()
+    if not question_text or not (introduction or situation):
+        return None
+
+    parts = []
+    if situation:
+        parts.append(('Announcer', situation, 'male'))
+    else:
+        # The standard opening line marks the start of the question for plan_audio's pauses
+        if '次の会話' not in introduction:
+            parts.append(('Announcer', ANNOUNCER_PHRASES[0], 'male'))
+        parts.append(('Announcer', introduction, 'male'))
+
+    if conversation:
+        mentioned = _genders_in_order(introduction)
+        # Any other short token before a colon ("...。時間は10:30") stays part of the turn it is in
+        markers = [
+            marker for marker in SPEAKER_MARKER.finditer(conversation)
+            if KNOWN_SPEAKER_LABEL.fullmatch(marker.group(1)) or marker.group(1) in introduction
+        ]
+        if len(markers) >= 2 and not conversation[:markers[0].start()].strip():
+            genders = {}
+            unassigned = list(mentioned)
+            for marker in markers:
+                label = marker.group(1)
+                if label in genders:
+                    continue
+                gender = _label_gender(label) or (unassigned[0] if unassigned else None)
+                if gender is None:
+                    return None
+                genders[label] = gender
+                if gender in unassigned:
+                    unassigned.remove(gender)
+            for marker, following in zip(markers, markers[1:] + [None]):
+                text = conversation[marker.end():following.start() if following else len(conversation)].strip()
+                if text:
+                    parts.append((marker.group(1), text, genders[marker.group(1)]))
+        elif len(mentioned) <= 1:
+            gender = mentioned[0] if mentioned else 'female'
+            parts.append(('Speaker', conversation, gender))
+        else:
+            # Two speakers without labels, only the LLM can split the turns
+            return None
+
+    parts.append(('Announcer', f"質問：{question_text}", 'male'))
+    return parts
+
 
 class AudioGenerator:
-    def __init__(self):
-        # AWS clients
-        self.bedrock = boto3.client('bedrock-runtime', region_name="us-east-1")
-        self.polly = boto3.client('polly')
+    def __init__(self, polly_client=None, clip_cache: Optional[ClipCache] = None):
+        """
+        `polly_client` replaces the Polly client, e.g. backend.fake_clients.FakePollyClient for offline runs.
+        `clip_cache` replaces the shared clip cache under frontend/static/audio/cache.
+        """
+        # Bedrock client is created on first use, see the property below
+        self._bedrock = None
         self.model_id = "amazon.nova-micro-v1:0"
         
-        # Google Cloud TTS client
-        self.google_client = texttospeech.TextToSpeechClient()
-        
-        # Azure TTS client
-        self.azure_speech_config = SpeechConfig(
-            subscription=os.getenv('AZURE_SPEECH_KEY'),
-            region=os.getenv('AZURE_SPEECH_REGION')
-        )
+        # TTS providers are imported and built on first use, by the name passed to synthesize_part
+        self.tts = TTSRegistry()
+        if polly_client is not None:
+            self.tts.register('aws', lambda: PollyProvider(client=polly_client))
         
         # Define Japanese neural voices by gender and service
         self.voices = {
@@ -44,37 +147,59 @@ class AudioGenerator:
             }
         }
         
-        # Service rotation for voice variety
-        self.tts_services = ['aws', 'google', 'azure']
-        self.current_service_index = 0
-        
         # Create audio output directory
         self.audio_dir = os.path.join(
             os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
             "frontend/static/audio"
         )
         os.makedirs(self.audio_dir, exist_ok=True)
+        
+        # Silence per (duration, MPEG format), built once
+        self._silence = {}
+        
+        # Synthesized clips by (engine, voice, text), checked before every TTS call
+        self.clip_cache = clip_cache or default_clip_cache()
+        
+        # Parsed scripts by question_key, and how each question was parsed
+        self._parsed: "OrderedDict[str, List[Tuple[str, str, str]]]" = OrderedDict()
+        self._parse_lock = threading.Lock()
+        self.parse_stats = {"memo": 0, "local": 0, "llm": 0}
+
+    @property
+    def bedrock(self):
+        """Bedrock runtime client, the process-wide one"""
+        if self._bedrock is None:
+            self._bedrock = aws_client('bedrock-runtime', region_name="us-east-1")
+        return self._bedrock
 
-    def _invoke_bedrock(self, prompt: str) -> str:
-        """Invoke Bedrock with the given prompt using converse API"""
+    def _invoke_bedrock(self, prompt: str, cache: bool = False, refresh: bool = False) -> str:
+        """
+        Invoke Bedrock with the given prompt using converse API.
+        With `cache`, identical prompts are answered from the shared LLM response cache;
+        `refresh` bypasses the cached answer and replaces it.
+        """
         messages = [{
             "role": "user",
             "content": [{
                 "text": prompt
             }]
         }]
-        
-        try:
+        inference_config = {
+            "temperature": 0.3,
+            "topP": 0.95,
+            "maxTokens": 2000
+        }
+
+        def call():
             response = self.bedrock.converse(
                 modelId=self.model_id,
                 messages=messages,
-                inferenceConfig={
-                    "temperature": 0.3,
-                    "topP": 0.95,
-                    "maxTokens": 2000
-                }
+                inferenceConfig=inference_config
             )
             return response['output']['message']['content'][0]['text']
+
+        try:
+            return cached_call(self.model_id, prompt, inference_config, call, opt_in=cache, refresh=refresh)
         except Exception as e:
             print(f"Error in Bedrock converse: {str(e)}")
             raise e
@@ -121,7 +246,40 @@ class AudioGenerator:
         """
         Convert question into a format for audio generation.
         Returns a list of (speaker, text, gender) tuples.
+        The local parser is tried first and the LLM only when it fails; results are memoized per question.
         """
+        key = question_key(question)
+        with self._parse_lock:
+            if key in self._parsed:
+                self._parsed.move_to_end(key)
+                self.parse_stats["memo"] += 1
+                return list(self._parsed[key])
+
+        parts = parse_conversation_locally(question)
+        if parts and self.validate_conversation_parts(parts):
+            source = "local"
+        else:
+            print("Local parser could not split the conversation, asking the LLM")
+            parts = self.parse_conversation_with_llm(question)
+            source = "llm"
+
+        with self._parse_lock:
+            self.parse_stats[source] += 1
+            self._parsed[key] = parts
+            while len(self._parsed) > PARSE_MEMO_MAX_ENTRIES:
+                self._parsed.popitem(last=False)
+        return list(parts)
+
+    def parse_report(self) -> Dict:
+        """How questions were parsed so far; `llm_free_fraction` counts memo hits as avoiding the LLM too"""
+        with self._parse_lock:
+            stats = dict(self.parse_stats)
+        total = sum(stats.values())
+        stats["llm_free_fraction"] = (stats["memo"] + stats["local"]) / total if total else 0.0
+        return stats
+
+    def parse_conversation_with_llm(self, question: Dict) -> List[Tuple[str, str, str]]:
+        """Have Nova format the question as a Speaker:/Text:/--- script, retrying until it validates"""
         max_retries = 3
         for attempt in range(max_retries):
             try:
@@ -160,7 +318,9 @@ class AudioGenerator:
                 Make sure to specify gender EXACTLY as shown in the example.
                 """
                 
-                response = self._invoke_bedrock(prompt)
+                # The script for a question does not need to vary between runs; a retry means the
+                # previous answer did not validate, so it bypasses and replaces the cached one
+                response = self._invoke_bedrock(prompt, cache=True, refresh=attempt > 0)
                 
                 # Parse the response into speaker parts
                 parts = []
@@ -238,131 +398,145 @@ class AudioGenerator:
         
         raise Exception("Failed to generate valid conversation format")
 
-    def get_voice_for_gender(self, gender: str) -> str:
+    def get_voice_for_gender(self, gender: str, service: Optional[str] = None) -> str:
         """Get an appropriate voice for the given gender"""
+        voices = self.voices[service or TTS_PROVIDER]
         if gender == 'male':
-            return 'Takumi'  # Male voice
+            return voices['male'][0]
         else:
-            return 'Kazuha'  # Female voice
-
-    def generate_audio_part(self, text: str, voice_name: str) -> str:
-        """Generate audio for a single part using Amazon Polly"""
-        response = self.polly.synthesize_speech(
-            Text=text,
-            OutputFormat='mp3',
-            VoiceId=voice_name,
-            Engine='neural',
-            LanguageCode='ja-JP'
-        )
-        
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as temp_file:
-            temp_file.write(response['AudioStream'].read())
-            return temp_file.name
-
-    def combine_audio_files(self, audio_files: List[str], output_file: str):
-        """Combine multiple audio files using ffmpeg"""
-        file_list = None
-        try:
-            # Create file list for ffmpeg
-            with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
-                for audio_file in audio_files:
-                    f.write(f"file '{audio_file}'\n")
-                file_list = f.name
-            
-            # Combine audio files
+            return voices['female'][0]
+
+    def synthesize_part(self, text: str, voice_name: str, service: Optional[str] = None) -> bytes:
+        """Synthesize a single part with the given TTS service (TTS_PROVIDER by default), returning the MP3 bytes"""
+        provider = self.tts.get(service)
+        if self.clip_cache:
+            cached = self.clip_cache.get(provider.engine, voice_name, text)
+            if cached:
+                return cached
+
+        audio = provider.synthesize(text, voice_name)
+        if self.clip_cache and audio:
+            self.clip_cache.put(provider.engine, voice_name, text, audio)
+        return audio
+
+    def prewarm_clip_cache(self, phrases: List[str] = ANNOUNCER_PHRASES, service: Optional[str] = None) -> int:
+        """Synthesize fixed announcer phrases into the clip cache, returns how many were not cached yet"""
+        if not self.clip_cache:
+            return 0
+        service = service or TTS_PROVIDER
+        # The voice plan_audio gives announcer parts, so the clips are keyed the way rendering looks them up
+        voice = self.get_voice_for_gender('male', service)
+        misses_before = self.clip_cache.misses
+        with ThreadPoolExecutor(max_workers=max(1, TTS_MAX_WORKERS)) as executor:
+            list(executor.map(lambda phrase: self.synthesize_part(phrase, voice, service), phrases))
+        return self.clip_cache.misses - misses_before
+
+    def generate_silence(self, duration_ms: int, reference: mp3.FrameHeader) -> bytes:
+        """Silent MP3 frames of the given duration, in the same format as the speech parts"""
+        key = (duration_ms, reference.version_bits, reference.sample_rate_index, reference.channel_mode)
+        if key not in self._silence:
+            self._silence[key] = mp3.silent_frames(duration_ms, reference)
+        return self._silence[key]
+
+    def combine_audio(self, chunks: List[bytes], output_file: str):
+        """
+        Join MP3 chunks frame by frame in memory and write the result.
+        With AUDIO_CONCAT=ffmpeg the joined stream is remuxed through a single ffmpeg process on stdin,
+        which also writes a seek header for the whole file.
+        """
+        joined = mp3.join(chunks)
+        if AUDIO_CONCAT == 'ffmpeg':
             subprocess.run([
-                'ffmpeg', '-f', 'concat', '-safe', '0',
-                '-i', file_list,
+                'ffmpeg', '-loglevel', 'error', '-y', '-f', 'mp3', '-i', 'pipe:0',
                 '-c', 'copy',
                 output_file
-            ], check=True)
+            ], input=joined, check=True)
+        else:
+            with open(output_file, 'wb') as f:
+                f.write(joined)
+
+    def plan_audio(self, parts: List[Tuple[str, str, str]], service: Optional[str] = None) -> List[Tuple[str, object]]:
+        """
+        Lay out the question as ('speech', (text, voice, service)) and ('pause', duration_ms) steps,
+        adding a long pause between sections and a short one between conversation turns.
+        """
+        service = service or TTS_PROVIDER
+        steps = []
+        current_section = None
+        for speaker, text, gender in parts:
+            # Detect section changes and add appropriate pauses
+            if speaker.lower() == 'announcer':
+                if '次の会話' in text:  # Introduction
+                    if current_section is not None:
+                        steps.append(('pause', 2000))
+                    current_section = 'intro'
+                elif '質問' in text or '選択肢' in text:  # Question or options
+                    steps.append(('pause', 2000))
+                    current_section = 'question'
+            elif current_section == 'intro':
+                steps.append(('pause', 2000))
+                current_section = 'conversation'
             
-            return True
-        except Exception as e:
-            print(f"Error combining audio files: {str(e)}")
-            if os.path.exists(output_file):
-                os.unlink(output_file)
-            return False
-        finally:
-            # Clean up temporary files
-            if file_list and os.path.exists(file_list):
-                os.unlink(file_list)
-            for audio_file in audio_files:
-                if os.path.exists(audio_file):
-                    try:
-                        os.unlink(audio_file)
-                    except Exception as e:
-                        print(f"Error cleaning up {audio_file}: {str(e)}")
-
-    def generate_silence(self, duration_ms: int) -> str:
-        """Generate a silent audio file of specified duration"""
-        output_file = os.path.join(self.audio_dir, f'silence_{duration_ms}ms.mp3')
-        if not os.path.exists(output_file):
-            subprocess.run([
-                'ffmpeg', '-f', 'lavfi', '-i',
-                f'anullsrc=r=24000:cl=mono:d={duration_ms/1000}',
-                '-c:a', 'libmp3lame', '-b:a', '48k',
-                output_file
-            ])
+            # Get appropriate voice for this speaker
+            voice = self.get_voice_for_gender(gender, service)
+            print(f"Using voice {voice} for {speaker} ({gender})")
+            steps.append(('speech', (text, voice, service)))
+            
+            # Add short pause between conversation turns
+            if current_section == 'conversation':
+                steps.append(('pause', 500))
+        return steps
+
+    def render_audio(self, parts: List[Tuple[str, str, str]], output_file: str, service: Optional[str] = None) -> str:
+        """
+        Synthesize all speech parts concurrently and write them, in order with their pauses, to output_file.
+        One TTS service voices the whole question, TTS_PROVIDER unless `service` names another.
+        """
+        service = service or TTS_PROVIDER
+        steps = self.plan_audio(parts, service)
+        speech = [args for kind, args in steps if kind == 'speech']
+        with ThreadPoolExecutor(max_workers=max(1, min(TTS_MAX_WORKERS, len(speech)))) as executor:
+            # map keeps the input order whatever order the syntheses finish in
+            clips = list(executor.map(lambda args: self.synthesize_part(*args), speech))
+        clips = iter(clips)
+
+        chunks = []
+        reference = None
+        for kind, args in steps:
+            if kind == 'speech':
+                clip = next(clips)
+                if not clip:
+                    raise Exception("Failed to generate audio part")
+                reference = reference or mp3.first_header(clip)
+                chunks.append(clip)
+            else:
+                chunks.append(args)
+        if reference is None:
+            raise Exception("No audio was synthesized")
+        # Pauses become silence once the speech format is known
+        chunks = [self.generate_silence(chunk, reference) if isinstance(chunk, int) else chunk for chunk in chunks]
+        self.combine_audio(chunks, output_file)
+        if self.clip_cache:
+            stats = self.clip_cache.stats()
+            print(f"Clip cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%})")
         return output_file
 
-    def generate_audio(self, question: Dict) -> str:
+    def generate_audio(self, question: Dict, service: Optional[str] = None) -> str:
         """
-        Generate audio for the entire question.
+        Generate audio for the entire question, voiced by `service` (TTS_PROVIDER by default).
         Returns the path to the generated audio file.
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Microseconds keep files apart when several questions are generated concurrently
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
         output_file = os.path.join(self.audio_dir, f"question_{timestamp}.mp3")
         
         try:
             # Parse conversation into parts
             parts = self.parse_conversation(question)
-            
-            # Generate audio for each part
-            audio_parts = []
-            current_section = None
-            
-            # Generate silence files for pauses
-            long_pause = self.generate_silence(2000)  # 2 second pause
-            short_pause = self.generate_silence(500)  # 0.5 second pause
-            
-            for speaker, text, gender in parts:
-                # Detect section changes and add appropriate pauses
-                if speaker.lower() == 'announcer':
-                    if '次の会話' in text:  # Introduction
-                        if current_section is not None:
-                            audio_parts.append(long_pause)
-                        current_section = 'intro'
-                    elif '質問' in text or '選択肢' in text:  # Question or options
-                        audio_parts.append(long_pause)
-                        current_section = 'question'
-                elif current_section == 'intro':
-                    audio_parts.append(long_pause)
-                    current_section = 'conversation'
-                
-                # Get appropriate voice for this speaker
-                voice = self.get_voice_for_gender(gender)
-                print(f"Using voice {voice} for {speaker} ({gender})")
-                
-                # Generate audio for this part
-                audio_file = self.generate_audio_part(text, voice)
-                if not audio_file:
-                    raise Exception("Failed to generate audio part")
-                audio_parts.append(audio_file)
-                
-                # Add short pause between conversation turns
-                if current_section == 'conversation':
-                    audio_parts.append(short_pause)
-            
-            # Combine all parts into final audio
-            if not self.combine_audio_files(audio_parts, output_file):
-                raise Exception("Failed to combine audio files")
-            
-            return output_file
+            return self.render_audio(parts, output_file, service)
             
         except Exception as e:
             # Clean up the output file if it exists
             if os.path.exists(output_file):
                 os.unlink(output_file)
-            raise Exception(f"Audio generation failed: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Audio generation failed: {str(e)}")
@@ -0,0 +1,72 @@
+"""
+Per-question audio generation wall time with a local fake TTS backend.
+
+Renders a typical question (announcer intro, six conversation turns, question, four options)
+through AudioGenerator.render_audio using backend.fake_clients.FakePollyClient, which answers
+after a simulated latency with silent MP3 frames, and compares TTS_MAX_WORKERS settings
+with a cold clip cache, then renders once more with a warm one.
+
+Run from listening-comp/:
+
+    python backend/benchmark_audio.py --latency 0.3 --runs 3
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+from backend import audio_generator, mp3
+from backend.audio_generator import AudioGenerator
+from backend.fake_clients import FakePollyClient
+from backend.tts_cache import ClipCache
+
+PARTS = [
+    ("Announcer", "次の会話を聞いて、質問に答えてください。", "male"),
+    ("Man", "すみません、この電車は新宿駅に止まりますか。", "male"),
+    ("Woman", "はい、次の駅が新宿です。", "female"),
+    ("Man", "ありがとうございます。何分くらいかかりますか。", "male"),
+    ("Woman", "そうですね、5分くらいです。", "female"),
+    ("Man", "そうですか。乗り換えは必要ですか。", "male"),
+    ("Woman", "いいえ、この電車で大丈夫ですよ。", "female"),
+    ("Announcer", "質問：新宿駅まで何分かかりますか。", "male"),
+    ("Announcer", "選択肢：1. 3分です。2. 5分です。3. 10分です。4. 15分です。", "male"),
+]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.3, help="Simulated seconds per synthesize_speech call")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    output_dir = tempfile.mkdtemp(prefix="audio_bench_")
+    print(f"{len(PARTS)} parts per question, {args.latency * 1000:.0f} ms per synthesis call")
+    for workers in args.workers:
+        audio_generator.TTS_MAX_WORKERS = workers
+        client = FakePollyClient(latency=args.latency)
+        timings = []
+        for run in range(args.runs):
+            # A fresh clip cache per run, so every part is synthesized
+            generator = AudioGenerator(polly_client=client, clip_cache=ClipCache(tempfile.mkdtemp(prefix="clips_")))
+            output_file = os.path.join(output_dir, f"question_{workers}_{run}.mp3")
+            started = time.perf_counter()
+            generator.render_audio(PARTS, output_file)
+            timings.append(time.perf_counter() - started)
+        with open(output_file, 'rb') as f:
+            data = f.read()
+        frames = sum(1 for _ in mp3.iter_frames(data))
+        duration = frames * mp3.first_header(data).samples / mp3.first_header(data).sample_rate
+        print(f"TTS_MAX_WORKERS={workers}: median {statistics.median(timings):.2f}s per question, "
+              f"peak {client.peak_in_flight} in flight, {len(data) / 1024:.0f} KiB, {duration:.1f}s of audio")
+
+    # Same question again with the last run's clips cached
+    hits_before = generator.clip_cache.hits
+    started = time.perf_counter()
+    generator.render_audio(PARTS, os.path.join(output_dir, "question_cached.mp3"))
+    hits = generator.clip_cache.hits - hits_before
+    print(f"Warm clip cache: {time.perf_counter() - started:.3f}s per question, {hits} cached parts")
@@ -0,0 +1,51 @@
+"""
+Fraction of questions AudioGenerator.parse_conversation can script without an LLM call.
+
+Runs the local parser (backend.audio_generator.parse_conversation_locally plus
+validate_conversation_parts) over the structured question files and the saved questions,
+and reports per source how many would still fall back to Bedrock.
+
+Run from listening-comp/:
+
+    python backend/benchmark_conversation_parser.py [--questions-dir backend/data/questions]
+"""
+import argparse
+import contextlib
+import glob
+import io
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.audio_generator import AudioGenerator, parse_conversation_locally
+from backend.question_store import QUESTION_STORE_PATH, QuestionStore
+from backend.vector_store import iter_questions_from_file
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions-dir", default="backend/data/questions")
+    args = parser.parse_args()
+
+    sources = {}
+    for filename in sorted(glob.glob(os.path.join(args.questions_dir, "*.txt"))):
+        sources[os.path.basename(filename)] = list(iter_questions_from_file(filename))
+    if os.path.exists(QUESTION_STORE_PATH):
+        store = QuestionStore()
+        sources["saved questions"] = [entry["question"] for entry in store.list(limit=store.count())]
+
+    generator = AudioGenerator()
+    local_total = questions_total = 0
+    started = time.perf_counter()
+    for source, questions in sources.items():
+        # validate_conversation_parts prints why a script is rejected, which is expected here
+        with contextlib.redirect_stdout(io.StringIO()):
+            local = sum(1 for question in questions
+                        if (parts := parse_conversation_locally(question)) and generator.validate_conversation_parts(parts))
+        local_total += local
+        questions_total += len(questions)
+        print(f"{source:<28} {local}/{len(questions)} without an LLM call")
+    elapsed = time.perf_counter() - started
+    if questions_total:
+        print(f"Total: {local_total}/{questions_total} ({local_total / questions_total:.0%}) avoid the LLM, "
+              f"local parsing took {elapsed / questions_total * 1000:.2f} ms per question")
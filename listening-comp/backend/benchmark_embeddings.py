@@ -0,0 +1,43 @@
+"""
+Offline throughput benchmark for BedrockEmbeddingFunction.
+
+Embeds synthetic texts through backend.fake_clients.FakeEmbeddingClient, which simulates
+per-call latency and throttles above a concurrency cap, and compares in-flight limits.
+
+Run from listening-comp/:
+
+    python backend/benchmark_embeddings.py --texts 400 --latency 0.05 --service-limit 6
+"""
+import argparse
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.fake_clients import FakeEmbeddingClient
+from backend.vector_store import BedrockEmbeddingFunction
+
+
+def run(texts, max_in_flight: int, args) -> dict:
+    client = FakeEmbeddingClient(latency=args.latency, max_concurrency=args.service_limit,
+                                 throttle_rate=args.throttle_rate)
+    embed = BedrockEmbeddingFunction(client=client, max_in_flight=max_in_flight, base_delay=args.latency)
+    embeddings = embed(texts)
+    assert len(embeddings) == len(texts)
+    return dict(embed.last_stats, peak_in_flight=client.peak_in_flight)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated seconds per invoke_model call")
+    parser.add_argument("--service-limit", type=int, default=6, help="Concurrent calls before the fake client throttles")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Extra random throttling probability")
+    parser.add_argument("--in-flight", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    texts = [f"会話 {i}: 男の人は明日何時に駅へ行きますか。" for i in range(args.texts)]
+    print(f"{args.texts} texts, {args.latency * 1000:.0f} ms per call, service limit {args.service_limit}")
+    for max_in_flight in args.in_flight:
+        stats = run(texts, max_in_flight, args)
+        print(f"max_in_flight={max_in_flight:>3}: {stats['seconds']:.2f}s, {stats['texts_per_second']:.1f} texts/s, "
+              f"peak {stats['peak_in_flight']}, throttles {stats['throttles']}, final limit {stats['final_limit']}")
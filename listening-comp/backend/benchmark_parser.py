@@ -0,0 +1,83 @@
+"""
+Benchmark for the streaming question-file parser on a synthetic corpus.
+
+Writes a --size-mb question file shaped like TranscriptStructurer output (section 2, multi-line
+conversations, four options), then parses it lazily with iter_questions_from_file and reports
+throughput and peak memory. The file is only read, never loaded whole.
+
+Run from listening-comp/:
+
+    python backend/benchmark_parser.py --size-mb 100
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.vector_store import iter_questions_from_file
+
+QUESTION = """<question>
+Introduction:
+会社で男の人と女の人が話しています。女の人はこのあと何をしますか。
+
+Conversation:
+男: 山田さん、会議の資料はもうできましたか。
+女: はい、さっきできました。{n}部コピーしますか。
+男: いえ、コピーはあとでいいです。先にメールで送ってください。
+女: わかりました。
+
+Question:
+女の人はこのあと何をしますか。
+
+Options:
+1. 資料を作ります
+2. 資料をコピーします
+3. 資料をメールで送ります
+4. 会議に出ます
+</question>
+
+"""
+
+
+def write_corpus(path: str, size_mb: int) -> int:
+    target = size_mb * 1024 * 1024
+    written = 0
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        while written < target:
+            block = QUESTION.format(n=count % 50)
+            f.write(block)
+            written += len(block.encode('utf-8'))
+            count += 1
+    return count
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=100)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="question_corpus_"), "synthetic_section2.txt")
+    started = time.perf_counter()
+    written = write_corpus(path, args.size_mb)
+    size_mb = os.path.getsize(path) / 1024 / 1024
+    print(f"Wrote {written:,} questions ({size_mb:.1f} MB) in {time.perf_counter() - started:.1f}s")
+
+    rss_before = peak_rss_mb()
+    errors = []
+    started = time.perf_counter()
+    parsed = sum(1 for _ in iter_questions_from_file(path, errors))
+    elapsed = time.perf_counter() - started
+
+    print(f"Parsed {parsed:,} questions in {elapsed:.2f}s: {size_mb / elapsed:.1f} MB/s, "
+          f"{parsed / elapsed:,.0f} questions/s, {len(errors)} errors")
+    print(f"Peak RSS {peak_rss_mb():.1f} MB (before parsing {rss_before:.1f} MB)")
+    os.remove(path)
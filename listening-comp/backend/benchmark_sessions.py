@@ -0,0 +1,103 @@
+"""
+Startup time and memory of N simulated Streamlit sessions, per-session resources vs shared ones.
+
+- per-session: what every session used to build, a QuestionVectorStore (its own Chroma client and
+  embedding function) plus a QuestionGenerator and an AudioGenerator with their own boto3 clients
+- shared: the backend.resources factories, so all sessions use one vector store and one pooled
+  client per AWS service
+
+Each mode runs in a fresh interpreter against an empty temporary vector store. No AWS call is made;
+creating a boto3 client needs no credentials.
+
+Run from listening-comp/:
+
+    python backend/benchmark_sessions.py --sessions 50
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPET = '''
+import json, os, sys, time
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+
+import boto3
+from backend.audio_generator import AudioGenerator
+from backend.question_generator import QuestionGenerator
+from backend.vector_store import BedrockEmbeddingFunction, QuestionVectorStore
+from backend import resources
+
+def per_session():
+    store = QuestionVectorStore(
+        os.environ["VECTOR_STORE_DIR"],
+        embedding_fn=BedrockEmbeddingFunction(client=boto3.client("bedrock-runtime", region_name="us-east-1"))
+    )
+    question_generator = QuestionGenerator(
+        vector_store=store, bedrock_client=boto3.client("bedrock-runtime", region_name="us-east-1")
+    )
+    audio_generator = AudioGenerator(polly_client=boto3.client("polly"))
+    audio_generator._bedrock = boto3.client("bedrock-runtime", region_name="us-east-1")
+    audio_generator.tts.get("aws")
+    return question_generator, audio_generator
+
+def shared():
+    audio_generator = resources.default_audio_generator()
+    audio_generator.bedrock
+    audio_generator.tts.get("aws")
+    return resources.default_question_generator(), audio_generator
+
+build = {"per-session": per_session, "shared": shared}[sys.argv[1]]
+sessions = int(sys.argv[2])
+baseline = rss_mb()
+started = time.perf_counter()
+first = None
+kept = []
+for session in range(sessions):
+    kept.append(build())
+    if session == 0:
+        first = time.perf_counter() - started
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "first_s": first,
+    "total_s": elapsed,
+    "rss_mb": rss_mb() - baseline,
+    "vector_stores": len({id(question_generator.vector_store) for question_generator, _ in kept}),
+}))
+'''
+
+
+def run(mode: str, sessions: int) -> dict:
+    env = dict(
+        os.environ,
+        VECTOR_STORE_DIR=tempfile.mkdtemp(prefix="vectorstore_"),
+        TTS_CACHE_DIR=tempfile.mkdtemp(prefix="clips_"),
+        AWS_DEFAULT_REGION=os.environ.get("AWS_DEFAULT_REGION", "us-east-1"),
+        ANONYMIZED_TELEMETRY="False",
+    )
+    result = subprocess.run([sys.executable, "-c", SNIPPET, mode, str(sessions)], cwd=ROOT, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{args.sessions} simulated sessions")
+    for mode in ("per-session", "shared"):
+        stats = run(mode, args.sessions)
+        print(f"{mode:<12} first session {stats['first_s'] * 1000:7.1f} ms, all sessions {stats['total_s']:6.2f}s, "
+              f"+{stats['rss_mb']:6.1f} MB RSS, {stats['vector_stores']} vector store(s)")
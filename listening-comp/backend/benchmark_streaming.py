@@ -0,0 +1,72 @@
+"""
+Time to first token and first complete field vs total latency for question generation.
+"first text" is the first partial field the UI can render, a header plus its first characters.
+
+Runs QuestionGenerator.generate_similar_question (blocking converse) and
+generate_similar_question_stream (converse_stream) against backend.fake_clients.FakeStreamingBedrockClient,
+which sends its first token after --ttft seconds and then --chars-per-second.
+
+Run from listening-comp/:
+
+    python backend/benchmark_streaming.py --ttft 0.6 --chars-per-second 60 --runs 3
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.fake_clients import FakeStreamingBedrockClient
+from backend.question_generator import QuestionGenerator
+
+EXAMPLES = [{
+    "Introduction": "次の会話を聞いて、質問に答えてください。",
+    "Conversation": "女性: 明日の会議は何時からですか。 男性: 10時からです。",
+    "Question": "会議は何時からですか。",
+    "Options": ["9時", "10時", "11時", "12時"],
+}]
+
+
+class ExampleStore:
+    """Answers the similar-question search with fixed examples, so only the LLM call is timed"""
+
+    def search_similar_questions(self, section_num, query, n_results=5):
+        return EXAMPLES
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ttft", type=float, default=0.6)
+    parser.add_argument("--chars-per-second", type=float, default=60.0)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    client = FakeStreamingBedrockClient(ttft=args.ttft, chars_per_second=args.chars_per_second)
+    generator = QuestionGenerator(vector_store=ExampleStore(), bedrock_client=client)
+    print(f"{len(client.reply)} character reply, {args.ttft * 1000:.0f} ms to first token")
+
+    blocking = []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        question = generator.generate_similar_question(2, "Travel")
+        blocking.append(time.perf_counter() - started)
+    print(f"converse:        first content {statistics.median(blocking):.2f}s, total {statistics.median(blocking):.2f}s")
+
+    first_token, first_field, total = [], [], []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        token_at = field_at = None
+        for event, payload in generator.generate_similar_question_stream(2, "Travel"):
+            now = time.perf_counter() - started
+            if event == 'partial' and token_at is None:
+                token_at = now
+            if event == 'field' and field_at is None:
+                field_at = now
+            if event == 'done':
+                assert payload == question, "streamed and blocking questions differ"
+        first_token.append(token_at)
+        first_field.append(field_at)
+        total.append(time.perf_counter() - started)
+    print(f"converse_stream: first text {statistics.median(first_token):.2f}s, "
+          f"first field {statistics.median(first_field):.2f}s, total {statistics.median(total):.2f}s")
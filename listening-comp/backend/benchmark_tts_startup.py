@@ -0,0 +1,82 @@
+"""
+Startup cost of AudioGenerator and of each TTS provider.
+
+Every measurement runs in a fresh interpreter, so no SDK is already imported:
+- AudioGenerator(): importing backend.audio_generator and constructing the generator, which
+  no longer touches any TTS SDK
+- one row per provider: SDK import and client construction, as timed by TTSRegistry.get.
+  A provider without credentials reports the error its construction raised.
+
+Run from listening-comp/:
+
+    python backend/benchmark_tts_startup.py --runs 3
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from backend.tts_providers import PROVIDERS
+
+GENERATOR_SNIPPET = '''
+import json, time
+started = time.perf_counter()
+from backend.audio_generator import AudioGenerator
+imported = time.perf_counter()
+generator = AudioGenerator()
+print(json.dumps({"import_s": imported - started, "init_s": time.perf_counter() - imported,
+                  "loaded": generator.tts.loaded()}))
+'''
+
+PROVIDER_SNIPPET = '''
+import json
+from backend.tts_providers import TTSRegistry
+registry = TTSRegistry()
+try:
+    registry.get({name!r})
+    error = None
+except Exception as e:
+    error = type(e).__name__
+timings = registry.timings.get({name!r}, {{}})
+print(json.dumps(dict(timings, error=error)))
+'''
+
+
+def measure(snippet: str) -> dict:
+    result = subprocess.run([sys.executable, "-c", snippet], cwd=ROOT, capture_output=True, text=True,
+                            env=dict(os.environ, AWS_DEFAULT_REGION=os.environ.get("AWS_DEFAULT_REGION", "us-east-1")))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(label: str, samples: list):
+    imports = [sample.get("import_s", 0.0) for sample in samples]
+    inits = [sample.get("init_s", 0.0) for sample in samples]
+    error = samples[-1].get("error")
+    init = f"init failed ({error})" if error else f"init {statistics.median(inits) * 1000:7.1f} ms"
+    print(f"{label:<16} import {statistics.median(imports) * 1000:7.1f} ms   {init}")
+    return statistics.median(imports) + (0.0 if error else statistics.median(inits))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    generator = [measure(GENERATOR_SNIPPET) for _ in range(args.runs)]
+    summarize("AudioGenerator()", generator)
+    print(f"{'':<16} providers loaded at construction: {generator[-1]['loaded'] or 'none'}")
+
+    eager = 0.0
+    for name in PROVIDERS:
+        try:
+            eager += summarize(name, [measure(PROVIDER_SNIPPET.format(name=name)) for _ in range(args.runs)])
+        except RuntimeError as e:
+            print(f"{name:<16} unavailable: {e}")
+    print(f"Loading every provider up front would add about {eager * 1000:.0f} ms to a cold start")
@@ -0,0 +1,192 @@
+import hashlib
+import io
+import json
+import random
+import threading
+import time
+from typing import Optional
+
+
+class FakeThrottlingError(Exception):
+    """Shaped like botocore's ClientError so callers can read response['Error']['Code']"""
+
+    def __init__(self, code: str = "ThrottlingException"):
+        super().__init__(f"An error occurred ({code}): Rate exceeded")
+        self.response = {"Error": {"Code": code, "Message": "Rate exceeded"}}
+
+
+class FakeEmbeddingClient:
+    """
+    Offline stand-in for the bedrock-runtime client's invoke_model, for benchmarks and tests.
+    Returns deterministic pseudo-random embeddings after a simulated latency, and throttles
+    when more than `max_concurrency` calls are in flight or at random with `throttle_rate`.
+    """
+
+    def __init__(self, dimensions: int = 1536, latency: float = 0.05, max_concurrency: Optional[int] = None,
+                 throttle_rate: float = 0.0, seed: int = 0):
+        self.dimensions = dimensions
+        self.latency = latency
+        self.max_concurrency = max_concurrency
+        self.throttle_rate = throttle_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.calls = 0
+        self.throttled = 0
+
+    def _embedding(self, text: str) -> list:
+        rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+        return [rng.uniform(-1.0, 1.0) for _ in range(self.dimensions)]
+
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> dict:
+        text = json.loads(body)["inputText"]
+        with self._lock:
+            self.calls += 1
+            over_limit = self.max_concurrency is not None and self.in_flight >= self.max_concurrency
+            if over_limit or self._random.random() < self.throttle_rate:
+                self.throttled += 1
+                raise FakeThrottlingError()
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            payload = {"embedding": self._embedding(text), "inputTextTokenCount": len(text)}
+            return {"body": io.BytesIO(json.dumps(payload).encode("utf-8"))}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class _FakeMessage:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class _FakeChoice:
+    def __init__(self, content: str):
+        self.message = _FakeMessage(content)
+
+
+class _FakeCompletion:
+    def __init__(self, content: str):
+        self.choices = [_FakeChoice(content)]
+
+
+class _FakeCompletions:
+    def __init__(self, owner: "FakeChatClient"):
+        self._owner = owner
+
+    def create(self, model: str, messages: list, **kwargs) -> _FakeCompletion:
+        return self._owner._complete(messages)
+
+
+class _FakeChat:
+    def __init__(self, owner: "FakeChatClient"):
+        self.completions = _FakeCompletions(owner)
+
+
+class FakeChatClient:
+    """
+    Offline stand-in for the Groq client's chat.completions.create, for benchmarks and tests.
+    Latency grows with the prompt size (`latency` + `seconds_per_kchar` per 1000 prompt characters),
+    and the reply is a fixed <question> block unless `reply` is given.
+    """
+
+    def __init__(self, latency: float = 0.5, seconds_per_kchar: float = 0.0, reply: Optional[str] = None):
+        self.latency = latency
+        self.seconds_per_kchar = seconds_per_kchar
+        self.reply = reply or "<question>\nSituation:\n駅で\n\nQuestion:\n何と言いますか\n</question>"
+        self.chat = _FakeChat(self)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompt_chars = 0
+
+    def _complete(self, messages: list) -> _FakeCompletion:
+        chars = sum(len(message["content"]) for message in messages)
+        with self._lock:
+            self.calls += 1
+            self.prompt_chars += chars
+        time.sleep(self.latency + self.seconds_per_kchar * chars / 1000)
+        return _FakeCompletion(self.reply)
+
+
+class FakePollyClient:
+    """
+    Offline stand-in for the Polly client's synthesize_speech, for benchmarks and tests.
+    After `latency` seconds it returns valid silent 24 kHz mono MP3 frames lasting
+    `ms_per_char` per character of text, like Polly's neural voices output.
+    """
+
+    # MPEG-2 Layer III, 48 kbps, 24 kHz, mono
+    REFERENCE_HEADER = bytes([0xFF, 0xF3, 0x64, 0xC0])
+
+    def __init__(self, latency: float = 0.3, ms_per_char: int = 150):
+        self.latency = latency
+        self.ms_per_char = ms_per_char
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def synthesize_speech(self, Text: str, OutputFormat: str = "mp3", VoiceId: str = "Takumi", **kwargs) -> dict:
+        from backend.mp3 import parse_header, silent_frames
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            reference = parse_header(self.REFERENCE_HEADER + bytes(4))
+            audio = silent_frames(len(Text) * self.ms_per_char, reference)
+            return {"AudioStream": io.BytesIO(audio), "ContentType": "audio/mpeg"}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class FakeStreamingBedrockClient:
+    """
+    Offline stand-in for the bedrock-runtime client's converse and converse_stream, for benchmarks and tests.
+    The first token arrives after `ttft` seconds and the rest of `reply` follows at `chars_per_second`, in
+    chunks of `chunk_chars`; converse returns the whole reply after the same total time.
+    """
+
+    DEFAULT_REPLY = (
+        "Introduction: 次の会話を聞いて、質問に答えてください。\n"
+        "Conversation: 男性: すみません、この電車は新宿駅に止まりますか。 女性: はい、次の駅が新宿です。 "
+        "男性: ありがとうございます。何分くらいかかりますか。 女性: そうですね、5分くらいです。\n"
+        "Question: 新宿駅まで何分かかりますか。\n"
+        "Options:\n1. 3分です。\n2. 5分です。\n3. 10分です。\n4. 15分です。\n"
+    )
+
+    def __init__(self, ttft: float = 0.6, chars_per_second: float = 60.0, chunk_chars: int = 4,
+                 reply: Optional[str] = None):
+        self.ttft = ttft
+        self.chars_per_second = chars_per_second
+        self.chunk_chars = chunk_chars
+        self.reply = reply or self.DEFAULT_REPLY
+        self.calls = 0
+
+    def _chunks(self):
+        time.sleep(self.ttft)
+        for start in range(0, len(self.reply), self.chunk_chars):
+            if start:
+                time.sleep(self.chunk_chars / self.chars_per_second)
+            yield self.reply[start:start + self.chunk_chars]
+
+    def converse_stream(self, modelId: str, messages: list, **kwargs) -> dict:
+        self.calls += 1
+
+        def events():
+            yield {"messageStart": {"role": "assistant"}}
+            for chunk in self._chunks():
+                yield {"contentBlockDelta": {"delta": {"text": chunk}, "contentBlockIndex": 0}}
+            yield {"contentBlockStop": {"contentBlockIndex": 0}}
+            yield {"messageStop": {"stopReason": "end_turn"}}
+        return {"stream": events()}
+
+    def converse(self, modelId: str, messages: list, **kwargs) -> dict:
+        self.calls += 1
+        text = "".join(self._chunks())
+        return {"output": {"message": {"role": "assistant", "content": [{"text": text}]}}}
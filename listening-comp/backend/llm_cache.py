@@ -0,0 +1,219 @@
+"""
+Persistent cache of LLM responses shared by TranscriptStructurer, QuestionGenerator and AudioGenerator.
+
+Entries are keyed by (model, prompt hash, inference params) and stored in SQLite. A call is only served
+from the cache when its settings are deterministic (temperature 0) or the caller opts in explicitly.
+
+Inspect and prune it from listening-comp/:
+
+    python backend/llm_cache.py stats
+    python backend/llm_cache.py list [--limit 20]
+    python backend/llm_cache.py prune [--max-entries N]
+    python backend/llm_cache.py clear
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_PATH = os.environ.get(
+    "LLM_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "llm_cache.sqlite3")
+)
+LLM_CACHE_TTL_SECONDS = float(os.environ.get("LLM_CACHE_TTL", str(30 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "5000"))
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS llm_responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    prompt_hash TEXT NOT NULL,
+    params TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_llm_responses_last_used ON llm_responses (last_used_at);
+'''
+
+
+def is_deterministic(params: Dict) -> bool:
+    """Temperature 0 gives repeatable output, anything else only caches on explicit opt-in"""
+    return params.get("temperature", 1) == 0
+
+
+class LLMResponseCache:
+    """SQLite-backed LLM response cache with a TTL per entry and least-recently-used size eviction"""
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl: float = LLM_CACHE_TTL_SECONDS,
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # One short-lived connection per operation, so the cache can be shared across threads;
+        # committed (or rolled back) and closed when the block exits
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(model: str, prompt: str, params: Dict) -> Dict[str, str]:
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        params_json = json.dumps(params, sort_keys=True)
+        key = hashlib.sha256(f"{model}\0{prompt_hash}\0{params_json}".encode("utf-8")).hexdigest()
+        return {"key": key, "model": model, "prompt_hash": prompt_hash, "params": params_json}
+
+    def get(self, model: str, prompt: str, params: Dict) -> Optional[str]:
+        key = self.make_key(model, prompt, params)["key"]
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT response FROM llm_responses WHERE key = ? AND created_at > ?",
+                (key, now - self.ttl)
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE llm_responses SET last_used_at = ?, hits = hits + 1 WHERE key = ?", (now, key))
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return row[0] if row else None
+
+    def put(self, model: str, prompt: str, params: Dict, response: str):
+        entry = self.make_key(model, prompt, params)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('''
+                INSERT INTO llm_responses (key, model, prompt_hash, params, response, created_at, last_used_at, hits)
+                VALUES (:key, :model, :prompt_hash, :params, :response, :now, :now, 0)
+                ON CONFLICT(key) DO UPDATE SET response = excluded.response,
+                    created_at = excluded.created_at, last_used_at = excluded.last_used_at
+            ''', dict(entry, response=response, now=now))
+        self.prune(expired_only=True)
+
+    def prune(self, expired_only: bool = False, max_entries: Optional[int] = None) -> int:
+        """Delete expired entries and, unless expired_only, the least recently used beyond max_entries"""
+        max_entries = self.max_entries if max_entries is None else max_entries
+        with self._connect() as conn:
+            deleted = conn.execute("DELETE FROM llm_responses WHERE created_at <= ?", (time.time() - self.ttl,)).rowcount
+            count = conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+            if count > max_entries and (not expired_only or count > max_entries * 1.1):
+                # Outside an explicit prune, let the table overshoot by 10% so evictions happen in batches
+                deleted += conn.execute('''
+                    DELETE FROM llm_responses WHERE key IN (
+                        SELECT key FROM llm_responses ORDER BY last_used_at ASC LIMIT ?
+                    )
+                ''', (count - max_entries,)).rowcount
+        return deleted
+
+    def clear(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM llm_responses").rowcount
+
+    def stats(self) -> Dict:
+        with self._connect() as conn:
+            entries, stored_hits, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hits), 0), COALESCE(SUM(LENGTH(response)), 0) FROM llm_responses"
+            ).fetchone()
+            models = dict(conn.execute("SELECT model, COUNT(*) FROM llm_responses GROUP BY model").fetchall())
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "response_chars": size,
+            "hits_all_time": stored_hits,
+            "models": models,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def entries(self, limit: int = 20) -> List[Dict]:
+        with self._connect() as conn:
+            rows = conn.execute('''
+                SELECT key, model, params, created_at, last_used_at, hits, LENGTH(response)
+                FROM llm_responses ORDER BY last_used_at DESC LIMIT ?
+            ''', (limit,)).fetchall()
+        return [{
+            "key": key[:16], "model": model, "params": params, "created_at": created_at,
+            "last_used_at": last_used_at, "hits": hits, "response_chars": size
+        } for key, model, params, created_at, last_used_at, hits, size in rows]
+
+
+_default_cache: Optional[LLMResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def default_cache() -> Optional[LLMResponseCache]:
+    """Process-wide cache at LLM_CACHE_PATH, None when LLM_CACHE_ENABLED is off"""
+    global _default_cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMResponseCache()
+        return _default_cache
+
+
+def cached_call(model: str, prompt: str, params: Dict, call: Callable[[], Optional[str]], opt_in: bool = False,
+                refresh: bool = False, validate: Optional[Callable[[str], bool]] = None,
+                cache: Optional[LLMResponseCache] = None) -> Optional[str]:
+    """
+    Return the cached response for (model, prompt, params) or make the call and store its result.
+    Only deterministic params or `opt_in` use the cache; `refresh` skips the lookup but stores the new
+    response, and responses failing `validate` are not stored.
+    """
+    cache = cache or default_cache()
+    if cache is None or not (opt_in or is_deterministic(params)):
+        return call()
+    if not refresh:
+        response = cache.get(model, prompt, params)
+        if response is not None:
+            return response
+    response = call()
+    if response is not None and (validate is None or validate(response)):
+        cache.put(model, prompt, params, response)
+    return response
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["stats", "list", "prune", "clear"])
+    parser.add_argument("--limit", type=int, default=20, help="Entries shown by list")
+    parser.add_argument("--max-entries", type=int, default=None, help="Size prune keeps, defaults to LLM_CACHE_MAX_ENTRIES")
+    args = parser.parse_args()
+
+    cache = LLMResponseCache()
+    if args.command == "stats":
+        print(json.dumps(cache.stats(), indent=2, ensure_ascii=False))
+    elif args.command == "list":
+        for entry in cache.entries(args.limit):
+            print(f"{entry['key']}  {entry['model']:<28} {entry['params']:<48} hits={entry['hits']:<4} "
+                  f"chars={entry['response_chars']:<6} last_used={time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['last_used_at']))}")
+    elif args.command == "prune":
+        print(f"Deleted {cache.prune(max_entries=args.max_entries)} entries")
+    else:
+        print(f"Deleted {cache.clear()} entries")
@@ -0,0 +1,103 @@
+from typing import Iterator, List, NamedTuple, Optional
+
+# Bitrates in kbps by [MPEG-1][bitrate index] and [MPEG-2/2.5][bitrate index], Layer III only
+BITRATES = {
+    True: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    False: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+# Sample rates by MPEG version bits: 0b11 = MPEG-1, 0b10 = MPEG-2, 0b00 = MPEG-2.5
+SAMPLE_RATES = {0b11: [44100, 48000, 32000], 0b10: [22050, 24000, 16000], 0b00: [11025, 12000, 8000]}
+# Tags a LAME/Fraunhofer header frame carries; it describes the whole file, so it is wrong once files are joined
+VBR_TAGS = (b"Xing", b"Info", b"VBRI")
+
+
+class FrameHeader(NamedTuple):
+    version_bits: int
+    bitrate_index: int
+    sample_rate_index: int
+    channel_mode: int
+    sample_rate: int
+    length: int
+
+    @property
+    def mpeg1(self) -> bool:
+        return self.version_bits == 0b11
+
+    @property
+    def samples(self) -> int:
+        return 1152 if self.mpeg1 else 576
+
+
+def parse_header(data: bytes, offset: int = 0) -> Optional[FrameHeader]:
+    """Decode the 4-byte Layer III frame header at `offset`, None if there is no valid one"""
+    if offset + 4 > len(data) or data[offset] != 0xFF or (data[offset + 1] & 0xE0) != 0xE0:
+        return None
+    version_bits = (data[offset + 1] >> 3) & 0b11
+    layer_bits = (data[offset + 1] >> 1) & 0b11
+    bitrate_index = data[offset + 2] >> 4
+    sample_rate_index = (data[offset + 2] >> 2) & 0b11
+    padding = (data[offset + 2] >> 1) & 0b1
+    channel_mode = data[offset + 3] >> 6
+    if version_bits == 0b01 or layer_bits != 0b01 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    mpeg1 = version_bits == 0b11
+    sample_rate = SAMPLE_RATES[version_bits][sample_rate_index]
+    bitrate = BITRATES[mpeg1][bitrate_index] * 1000
+    length = (144 if mpeg1 else 72) * bitrate // sample_rate + padding
+    return FrameHeader(version_bits, bitrate_index, sample_rate_index, channel_mode, sample_rate, length)
+
+
+def _skip_id3v2(data: bytes) -> int:
+    if data[:3] != b"ID3" or len(data) < 10:
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def iter_frames(data: bytes) -> Iterator[bytes]:
+    """Yield the audio frames of an MP3, skipping ID3 tags, VBR header frames and garbage between frames"""
+    offset = _skip_id3v2(data)
+    end = len(data) - 128 if data[-128:-125] == b"TAG" else len(data)
+    first = True
+    while offset < end:
+        header = parse_header(data, offset)
+        if header is None or offset + header.length > end:
+            offset += 1
+            continue
+        frame = data[offset:offset + header.length]
+        offset += header.length
+        if first:
+            first = False
+            if any(tag in frame[:64] for tag in VBR_TAGS):
+                continue
+        yield frame
+
+
+def silent_frames(duration_ms: int, reference: FrameHeader) -> bytes:
+    """
+    Silence as frames matching `reference`'s MPEG version, sample rate and channel mode.
+    An all-zero side info and main data decode to silence, so no encoder is needed.
+    """
+    header = bytes([
+        0xFF,
+        0xE0 | (reference.version_bits << 3) | (0b01 << 1) | 0b1,  # Layer III, no CRC
+        (reference.bitrate_index << 4) | (reference.sample_rate_index << 2),  # no padding
+        reference.channel_mode << 6,
+    ])
+    length = parse_header(header + bytes(4)).length
+    frame = header + bytes(length - 4)
+    count = max(1, round(duration_ms / 1000 * reference.sample_rate / reference.samples))
+    return frame * count
+
+
+def join(chunks: List[bytes]) -> bytes:
+    """Concatenate MP3 streams frame by frame; the inputs must share a sample rate"""
+    return b"".join(frame for chunk in chunks for frame in iter_frames(chunk))
+
+
+def first_header(data: bytes) -> Optional[FrameHeader]:
+    for frame in iter_frames(data):
+        return parse_header(frame)
+    return None
@@ -1,18 +1,123 @@
-import boto3
 import json
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from backend.vector_store import QuestionVectorStore
+from backend.llm_cache import cached_call
+from backend.resources import aws_client, default_vector_store
+
+
+def _is_json(response: str) -> bool:
+    try:
+        json.loads(response.strip())
+        return True
+    except ValueError:
+        return False
+
+
+# Field headers of a generated question, in the order the model writes them
+QUESTION_HEADERS = ("Introduction", "Conversation", "Situation", "Question", "Options")
+
+
+class QuestionTextParser:
+    """
+    Incremental parser for the "Field: value" question format the model writes.
+    `feed` takes text chunks as they stream in and returns the (field, value) pairs completed by them;
+    a field is complete once the next header starts, or at `close`. Options are a list, other fields text.
+    """
 
-class QuestionGenerator:
     def __init__(self):
-        """Initialize Bedrock client and vector store"""
-        self.bedrock_client = boto3.client('bedrock-runtime', region_name="us-east-1")
-        self.vector_store = QuestionVectorStore()
+        self.question: Dict = {}
+        self.current_key: Optional[str] = None
+        self.current_value: List[str] = []
+        self._buffer = ""
+
+    def _finish_field(self) -> List[Tuple[str, object]]:
+        if not self.current_key:
+            return []
+        value = self.current_value if self.current_key == 'Options' else ' '.join(self.current_value)
+        self.question[self.current_key] = value
+        return [(self.current_key, value)]
+
+    def _line(self, line: str) -> List[Tuple[str, object]]:
+        line = line.strip()
+        if not line:
+            return []
+        for header in QUESTION_HEADERS:
+            if line.startswith(f"{header}:"):
+                completed = self._finish_field()
+                self.current_key = header
+                self.current_value = [] if header == 'Options' else [line.replace(f"{header}:", "").strip()]
+                return completed
+        if self.current_key == 'Options' and len(line) > 1 and line[0].isdigit() and line[1] == ".":
+            self.current_value.append(line[2:].strip())
+        elif self.current_key:
+            self.current_value.append(line)
+        return []
+
+    def feed(self, chunk: str) -> List[Tuple[str, object]]:
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split('\n')
+        completed = []
+        for line in lines:
+            completed.extend(self._line(line))
+        return completed
+
+    def close(self) -> List[Tuple[str, object]]:
+        completed = self._line(self._buffer)
+        self._buffer = ""
+        completed.extend(self._finish_field())
+        self.current_key = None
+        return completed
+
+    def partial(self) -> Optional[Tuple[str, object]]:
+        """The field still being written, with its text so far"""
+        buffered = self._buffer.strip()
+        for header in QUESTION_HEADERS:
+            # A header whose line has not ended yet already starts the next field
+            if buffered.startswith(f"{header}:"):
+                return header, [] if header == 'Options' else buffered[len(header) + 1:].strip()
+        if not self.current_key:
+            return None
+        if self.current_key == 'Options':
+            return self.current_key, list(self.current_value)
+        return self.current_key, ' '.join(self.current_value + [buffered]).strip()
+
+
+def parse_question_text(text: str) -> Dict:
+    parser = QuestionTextParser()
+    parser.feed(text.strip())
+    parser.close()
+    return parser.question
+
+
+def _with_default_options(question: Dict) -> Dict:
+    # Ensure we have exactly 4 options
+    if 'Options' not in question or len(question.get('Options', [])) != 4:
+        # Use default options if we don't have exactly 4
+        question['Options'] = [
+            "ピザを食べる",
+            "ハンバーガーを食べる",
+            "サラダを食べる",
+            "パスタを食べる"
+        ]
+    return question
+
+
+class QuestionGenerator:
+    def __init__(self, vector_store: Optional[QuestionVectorStore] = None, bedrock_client=None):
+        """Initialize Bedrock client and vector store, the process-wide ones unless given"""
+        self.bedrock_client = bedrock_client or aws_client('bedrock-runtime', region_name="us-east-1")
+        self.vector_store = vector_store or default_vector_store()
         self.model_id = "amazon.nova-lite-v1:0"
 
-    def _invoke_bedrock(self, prompt: str) -> Optional[str]:
-        """Invoke Bedrock with the given prompt"""
-        try:
+    def _invoke_bedrock(self, prompt: str, cache: bool = False, validate=None) -> Optional[str]:
+        """
+        Invoke Bedrock with the given prompt.
+        With `cache`, identical prompts are answered from the shared LLM response cache;
+        responses failing `validate` are not cached.
+        """
+        inference_config = {"temperature": 0.7}
+
+        def call():
             messages = [{
                 "role": "user",
                 "content": [{
@@ -23,16 +128,36 @@ class QuestionGenerator:
             response = self.bedrock_client.converse(
                 modelId=self.model_id,
                 messages=messages,
-                inferenceConfig={"temperature": 0.7}
+                inferenceConfig=inference_config
             )
             
             return response['output']['message']['content'][0]['text']
+
+        try:
+            return cached_call(self.model_id, prompt, inference_config, call, opt_in=cache, validate=validate)
         except Exception as e:
             print(f"Error invoking Bedrock: {str(e)}")
             return None
 
-    def generate_similar_question(self, section_num: int, topic: str) -> Dict:
-        """Generate a new question similar to existing ones on a given topic"""
+    def _invoke_bedrock_stream(self, prompt: str) -> Iterator[str]:
+        """Invoke Bedrock with converse_stream, yielding the response text as it arrives"""
+        response = self.bedrock_client.converse_stream(
+            modelId=self.model_id,
+            messages=[{
+                "role": "user",
+                "content": [{
+                    "text": prompt
+                }]
+            }],
+            inferenceConfig={"temperature": 0.7}
+        )
+        for event in response['stream']:
+            delta = event.get('contentBlockDelta', {}).get('delta', {})
+            if delta.get('text'):
+                yield delta['text']
+
+    def _similar_question_prompt(self, section_num: int, topic: str) -> Optional[str]:
+        """Prompt for a new question on `topic`, with similar stored questions as examples; None without examples"""
         # Get similar questions for context
         similar_questions = self.vector_store.search_similar_questions(section_num, topic, n_results=3)
         
@@ -74,6 +199,13 @@ class QuestionGenerator:
         
         New Question:
         """
+        return prompt
+
+    def generate_similar_question(self, section_num: int, topic: str) -> Dict:
+        """Generate a new question similar to existing ones on a given topic"""
+        prompt = self._similar_question_prompt(section_num, topic)
+        if not prompt:
+            return None
 
         # Generate new question
         response = self._invoke_bedrock(prompt)
@@ -82,67 +214,41 @@ class QuestionGenerator:
 
         # Parse the generated question
         try:
-            lines = response.strip().split('\n')
-            question = {}
-            current_key = None
-            current_value = []
-            
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                if line.startswith("Introduction:"):
-                    if current_key:
-                        question[current_key] = ' '.join(current_value)
-                    current_key = 'Introduction'
-                    current_value = [line.replace("Introduction:", "").strip()]
-                elif line.startswith("Conversation:"):
-                    if current_key:
-                        question[current_key] = ' '.join(current_value)
-                    current_key = 'Conversation'
-                    current_value = [line.replace("Conversation:", "").strip()]
-                elif line.startswith("Situation:"):
-                    if current_key:
-                        question[current_key] = ' '.join(current_value)
-                    current_key = 'Situation'
-                    current_value = [line.replace("Situation:", "").strip()]
-                elif line.startswith("Question:"):
-                    if current_key:
-                        question[current_key] = ' '.join(current_value)
-                    current_key = 'Question'
-                    current_value = [line.replace("Question:", "").strip()]
-                elif line.startswith("Options:"):
-                    if current_key:
-                        question[current_key] = ' '.join(current_value)
-                    current_key = 'Options'
-                    current_value = []
-                elif line[0].isdigit() and line[1] == "." and current_key == 'Options':
-                    current_value.append(line[2:].strip())
-                elif current_key:
-                    current_value.append(line)
-            
-            if current_key:
-                if current_key == 'Options':
-                    question[current_key] = current_value
-                else:
-                    question[current_key] = ' '.join(current_value)
-            
-            # Ensure we have exactly 4 options
-            if 'Options' not in question or len(question.get('Options', [])) != 4:
-                # Use default options if we don't have exactly 4
-                question['Options'] = [
-                    "ピザを食べる",
-                    "ハンバーガーを食べる",
-                    "サラダを食べる",
-                    "パスタを食べる"
-                ]
-            
-            return question
+            return _with_default_options(parse_question_text(response))
         except Exception as e:
             print(f"Error parsing generated question: {str(e)}")
             return None
 
+    def generate_similar_question_stream(self, section_num: int, topic: str) -> Iterator[Tuple[str, object]]:
+        """
+        Streaming generate_similar_question, yielding events as the model writes:
+        ('partial', (field, text so far)) on every chunk, ('field', (field, value)) when a field is complete,
+        and finally ('done', question) with the same result generate_similar_question would return.
+        """
+        prompt = self._similar_question_prompt(section_num, topic)
+        if not prompt:
+            yield 'done', None
+            return
+
+        parser = QuestionTextParser()
+        received = False
+        try:
+            for chunk in self._invoke_bedrock_stream(prompt):
+                received = True
+                for completed in parser.feed(chunk):
+                    yield 'field', completed
+                partial = parser.partial()
+                if partial:
+                    yield 'partial', partial
+            for completed in parser.close():
+                yield 'field', completed
+        except Exception as e:
+            print(f"Error streaming from Bedrock: {str(e)}")
+            yield 'done', None
+            return
+
+        yield 'done', _with_default_options(parser.question) if received else None
+
     def get_feedback(self, question: Dict, selected_answer: int) -> Dict:
         """Generate feedback for the selected answer"""
         if not question or 'Options' not in question:
@@ -170,8 +276,8 @@ class QuestionGenerator:
         prompt += "- explanation: brief explanation of why the answer is correct/incorrect\n"
         prompt += "- correct_answer: the number of the correct option (1-4)\n"
 
-        # Get feedback
-        response = self._invoke_bedrock(prompt)
+        # Get feedback; the same question and answer always get the same explanation, so it is cached
+        response = self._invoke_bedrock(prompt, cache=True, validate=_is_json)
         if not response:
             return None
 
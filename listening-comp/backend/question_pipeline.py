@@ -0,0 +1,167 @@
+"""
+Background pre-generation of practice questions and their audio.
+
+QuestionPipeline keeps a small queue of ready items per (practice type, topic). Items are built on a
+worker pool with QuestionGenerator.generate_similar_question and AudioGenerator.generate_audio, so
+"Generate New Question" pops one in milliseconds instead of waiting 10-30 s for the LLM and TTS calls.
+Every pop schedules a refill. Audio of items that are never served, because the pipeline shut down or
+the queue was already full, is deleted.
+"""
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+# Ready items kept per (practice type, topic)
+QUESTION_QUEUE_DEPTH = int(os.getenv('QUESTION_QUEUE_DEPTH', '2'))
+# Items generated at once, across all queues
+QUESTION_PIPELINE_WORKERS = int(os.getenv('QUESTION_PIPELINE_WORKERS', '2'))
+# Refill latencies kept per queue for the metrics
+LATENCY_WINDOW = 50
+
+SECTION_BY_PRACTICE_TYPE = {
+    "Dialogue Practice": 2,
+    "Phrase Matching": 3,
+}
+
+
+class _Queue:
+    def __init__(self):
+        self.ready = deque()
+        self.in_flight = 0
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+
+class QuestionPipeline:
+    """Bounded per-(practice type, topic) queues of ready questions with audio, refilled in the background"""
+
+    def __init__(self, question_generator, audio_generator, depth: int = QUESTION_QUEUE_DEPTH,
+                 max_workers: int = QUESTION_PIPELINE_WORKERS, with_audio: bool = True):
+        self.question_generator = question_generator
+        self.audio_generator = audio_generator
+        self.depth = depth
+        self.with_audio = with_audio
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="question-pipeline")
+        self._queues: Dict[Tuple[str, str], _Queue] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _queue(self, key: Tuple[str, str]) -> _Queue:
+        # Callers hold self._lock
+        if key not in self._queues:
+            self._queues[key] = _Queue()
+        return self._queues[key]
+
+    def prefill(self, practice_type: str, topic: str):
+        """Start filling the queue for (practice_type, topic) up to `depth` items, without waiting"""
+        key = (practice_type, topic)
+        with self._lock:
+            if self._closed:
+                return
+            queue = self._queue(key)
+            missing = self.depth - len(queue.ready) - queue.in_flight
+            queue.in_flight += max(0, missing)
+            # Submitted under the lock, so shutdown cannot close the executor in between
+            for _ in range(missing):
+                self._executor.submit(self._produce, key)
+
+    def pop(self, practice_type: str, topic: str) -> Optional[Dict]:
+        """
+        Take a ready item ({question, audio_file, practice_type, topic, generated_s}) or None if the
+        queue is empty; either way the queue is topped up again in the background.
+        """
+        key = (practice_type, topic)
+        with self._lock:
+            queue = self._queue(key)
+            item = queue.ready.popleft() if queue.ready else None
+            if item:
+                queue.hits += 1
+            else:
+                queue.misses += 1
+        self.prefill(practice_type, topic)
+        return item
+
+    def _produce(self, key: Tuple[str, str]):
+        practice_type, topic = key
+        started = time.perf_counter()
+        item = None
+        try:
+            question = self.question_generator.generate_similar_question(
+                SECTION_BY_PRACTICE_TYPE[practice_type], topic
+            )
+            if question:
+                audio_file = None
+                if self.with_audio:
+                    try:
+                        audio_file = self.audio_generator.generate_audio(question)
+                    except Exception as e:
+                        # The question is still usable, the learner can generate its audio on demand
+                        print(f"Pre-generated audio failed for {practice_type} / {topic}: {str(e)}")
+                item = {
+                    "question": question,
+                    "audio_file": audio_file,
+                    "practice_type": practice_type,
+                    "topic": topic,
+                    "generated_s": time.perf_counter() - started,
+                }
+        except Exception as e:
+            print(f"Pre-generating a question failed for {practice_type} / {topic}: {str(e)}")
+
+        evicted = None
+        with self._lock:
+            queue = self._queue(key)
+            queue.in_flight -= 1
+            if not item:
+                queue.failures += 1
+            elif self._closed or len(queue.ready) >= self.depth:
+                evicted = item
+            else:
+                queue.ready.append(item)
+                queue.latencies.append(item["generated_s"])
+        if evicted:
+            self._discard(evicted)
+
+    @staticmethod
+    def _discard(item: Dict):
+        """Delete the audio of an item no learner will get"""
+        audio_file = item.get("audio_file")
+        if audio_file and os.path.exists(audio_file):
+            try:
+                os.unlink(audio_file)
+            except OSError as e:
+                print(f"Could not delete pre-generated audio {audio_file}: {str(e)}")
+
+    def metrics(self) -> Dict[str, Dict]:
+        """Queue depth, in-flight refills, pop hits/misses and refill latency per "practice type / topic" """
+        with self._lock:
+            result = {}
+            for (practice_type, topic), queue in self._queues.items():
+                latencies = sorted(queue.latencies)
+                result[f"{practice_type} / {topic}"] = {
+                    "depth": len(queue.ready),
+                    "in_flight": queue.in_flight,
+                    "hits": queue.hits,
+                    "misses": queue.misses,
+                    "failures": queue.failures,
+                    "refill_p50_s": statistics.median(latencies) if latencies else None,
+                    "refill_p95_s": latencies[int(0.95 * (len(latencies) - 1))] if latencies else None,
+                    "refill_last_s": queue.latencies[-1] if latencies else None,
+                }
+            return result
+
+    def shutdown(self, wait: bool = False):
+        """Stop refilling and delete the audio of unserved items; items still generating are discarded when done"""
+        with self._lock:
+            self._closed = True
+            unserved = [item for queue in self._queues.values() for item in queue.ready]
+            for queue in self._queues.values():
+                queue.ready.clear()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        for item in unserved:
+            self._discard(item)
@@ -0,0 +1,179 @@
+"""
+Saved practice questions, in SQLite instead of one JSON file rewritten on every save.
+
+Each save is a single INSERT, ids are unique even within a second, and the sidebar pages through
+the newest questions per practice type and topic through an index. An existing
+backend/data/stored_questions.json is imported on first use and renamed to stored_questions.json.migrated.
+
+From listening-comp/:
+
+    python backend/question_store.py stats
+    python backend/question_store.py migrate [--json path/to/stored_questions.json]
+"""
+import argparse
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+QUESTION_STORE_PATH = os.environ.get("QUESTION_STORE_PATH", os.path.join(DATA_DIR, "questions.sqlite3"))
+LEGACY_QUESTIONS_FILE = os.path.join(DATA_DIR, "stored_questions.json")
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS questions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    practice_type TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    audio_file TEXT,
+    question TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_questions_type_topic ON questions (practice_type, topic, seq);
+'''
+
+
+def new_question_id() -> str:
+    """Timestamp for readability plus a random suffix, so ids created in the same second differ"""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+
+class QuestionStore:
+    def __init__(self, path: str = QUESTION_STORE_PATH, legacy_json: Optional[str] = LEGACY_QUESTIONS_FILE):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+        if legacy_json and os.path.exists(legacy_json):
+            imported = self.migrate_json(legacy_json)
+            os.replace(legacy_json, f"{legacy_json}.migrated")
+            print(f"Imported {imported} questions from {legacy_json}")
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # One short-lived connection per operation, so the store can be shared across threads and sessions;
+        # committed (or rolled back) and closed when the block exits
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.row_factory = sqlite3.Row
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _row(row: sqlite3.Row) -> Dict:
+        return {
+            "id": row["id"],
+            "question": json.loads(row["question"]),
+            "practice_type": row["practice_type"],
+            "topic": row["topic"],
+            "created_at": row["created_at"],
+            "audio_file": row["audio_file"],
+        }
+
+    def add(self, question: Dict, practice_type: str, topic: str, audio_file: Optional[str] = None) -> str:
+        """Store a question and return its id"""
+        question_id = new_question_id()
+        with self._connect() as conn:
+            conn.execute('''
+                INSERT INTO questions (id, practice_type, topic, created_at, audio_file, question)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (question_id, practice_type, topic, datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                  audio_file, json.dumps(question, ensure_ascii=False)))
+        return question_id
+
+    def set_audio(self, question_id: str, audio_file: Optional[str]) -> bool:
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE questions SET audio_file = ? WHERE id = ?", (audio_file, question_id)
+            ).rowcount > 0
+
+    def get(self, question_id: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM questions WHERE id = ?", (question_id,)).fetchone()
+        return self._row(row) if row else None
+
+    @staticmethod
+    def _filter(practice_type: Optional[str], topic: Optional[str]):
+        clauses, params = [], []
+        if practice_type is not None:
+            clauses.append("practice_type = ?")
+            params.append(practice_type)
+        if topic is not None:
+            clauses.append("topic = ?")
+            params.append(topic)
+        return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    def list(self, practice_type: Optional[str] = None, topic: Optional[str] = None,
+             limit: int = 20, offset: int = 0) -> List[Dict]:
+        """Newest questions first, optionally for one practice type and topic"""
+        where, params = self._filter(practice_type, topic)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM questions {where} ORDER BY seq DESC LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def count(self, practice_type: Optional[str] = None, topic: Optional[str] = None) -> int:
+        where, params = self._filter(practice_type, topic)
+        with self._connect() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM questions {where}", params).fetchone()[0]
+
+    def migrate_json(self, json_path: str) -> int:
+        """
+        Import a stored_questions.json ({id: {question, practice_type, topic, created_at, audio_file}}),
+        oldest first and keeping the old ids; ids already in the store are skipped, so it can be rerun.
+        """
+        with open(json_path, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+        entries = sorted(stored.items(), key=lambda item: (item[1].get("created_at", ""), item[0]))
+        with self._connect() as conn:
+            return conn.executemany('''
+                INSERT OR IGNORE INTO questions (id, practice_type, topic, created_at, audio_file, question)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [(
+                question_id, data.get("practice_type", ""), data.get("topic", ""), data.get("created_at", ""),
+                data.get("audio_file"), json.dumps(data.get("question"), ensure_ascii=False)
+            ) for question_id, data in entries]).rowcount
+
+
+_default_store: Optional[QuestionStore] = None
+_default_store_lock = threading.Lock()
+
+
+def default_question_store() -> QuestionStore:
+    """Process-wide store at QUESTION_STORE_PATH"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = QuestionStore()
+        return _default_store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["stats", "migrate"])
+    parser.add_argument("--json", default=LEGACY_QUESTIONS_FILE, help="JSON file migrate imports")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        store = QuestionStore()
+        with store._connect() as conn:
+            rows = conn.execute(
+                "SELECT practice_type, topic, COUNT(*) FROM questions GROUP BY practice_type, topic"
+            ).fetchall()
+        print(f"{store.count()} questions in {store.path}")
+        for practice_type, topic, count in rows:
+            print(f"  {practice_type} / {topic}: {count}")
+    else:
+        # The constructor imports and renames the default JSON file; another path is imported as is
+        store = QuestionStore(legacy_json=None)
+        print(f"Imported {store.migrate_json(args.json)} questions from {args.json}")
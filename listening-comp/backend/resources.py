@@ -0,0 +1,89 @@
+"""
+Process-wide shared resources: one pooled boto3 client per (service, region), one embedding call limiter,
+one QuestionVectorStore per directory, and one QuestionGenerator, AudioGenerator and QuestionPipeline
+for every Streamlit session.
+
+Every factory is safe to call from any thread and builds its resource once. boto3 clients are
+thread-safe; sessions are not, so all clients come from a single session created under the lock.
+"""
+import atexit
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+# HTTP connections per boto3 client, shared by every session and worker thread using it
+AWS_MAX_POOL_CONNECTIONS = int(os.getenv('AWS_MAX_POOL_CONNECTIONS', '50'))
+VECTOR_STORE_DIR = os.getenv('VECTOR_STORE_DIR', 'backend/data/vectorstore')
+
+_lock = threading.RLock()
+_boto_session = None
+_resources: Dict[tuple, object] = {}
+# Seconds each resource took to build, by name
+timings: Dict[str, float] = {}
+
+
+def _shared(key: tuple, factory):
+    resource = _resources.get(key)
+    if resource is not None:
+        return resource
+    # Reentrant, since building a generator builds the clients and vector store it uses
+    with _lock:
+        if key not in _resources:
+            started = time.perf_counter()
+            _resources[key] = factory()
+            timings[":".join(str(part) for part in key if part is not None)] = time.perf_counter() - started
+        return _resources[key]
+
+
+def aws_client(service: str, region_name: Optional[str] = None):
+    """Shared boto3 client for `service`, with a connection pool sized for concurrent sessions"""
+    def build():
+        global _boto_session
+        import boto3
+        from botocore.config import Config
+        if _boto_session is None:
+            _boto_session = boto3.session.Session()
+        return _boto_session.client(
+            service, region_name=region_name, config=Config(max_pool_connections=AWS_MAX_POOL_CONNECTIONS)
+        )
+    return _shared(("aws", service, region_name), build)
+
+
+def embedding_limiter(max_in_flight: int):
+    """Process-wide AdaptiveLimiter for invoke_model calls on the shared bedrock-runtime client"""
+    from backend.vector_store import AdaptiveLimiter
+    return _shared(("embedding_limiter", max_in_flight), lambda: AdaptiveLimiter(max_in_flight))
+
+
+def default_vector_store(persist_directory: str = VECTOR_STORE_DIR):
+    """The QuestionVectorStore for `persist_directory`, so one Chroma client per directory"""
+    from backend.vector_store import QuestionVectorStore
+    return _shared(("vector_store", os.path.abspath(persist_directory)), lambda: QuestionVectorStore(persist_directory))
+
+
+def default_question_generator():
+    from backend.question_generator import QuestionGenerator
+    return _shared(("question_generator",), QuestionGenerator)
+
+
+def default_audio_generator():
+    from backend.audio_generator import AudioGenerator
+    return _shared(("audio_generator",), AudioGenerator)
+
+
+def default_question_pipeline():
+    """One pre-generation pipeline, so every learner draws from and refills the same queues; shut down at exit"""
+    from backend.question_pipeline import QuestionPipeline
+
+    def build():
+        pipeline = QuestionPipeline(default_question_generator(), default_audio_generator())
+        atexit.register(pipeline.shutdown)
+        return pipeline
+    return _shared(("question_pipeline",), build)
+
+
+def loaded() -> Dict[str, float]:
+    """Resources built so far, with the seconds each took"""
+    with _lock:
+        return dict(timings)
@@ -1,21 +1,122 @@
 from typing import Optional, Dict, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import os
+import random
+import re
+import sys
+import threading
 from groq import Groq
 import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.llm_cache import cached_call
 
 # Groq configuration
 GROQ_API_KEY = os.environ.get("GROQ_API_KEY")  # Configure your API key environment variable
 GROQ_MODEL = "llama-3.3-70b-versatile"  # Add your preferred model
+# Requests per minute allowed by the Groq plan, shared by every call of a structurer
+GROQ_REQUESTS_PER_MINUTE = float(os.environ.get("GROQ_REQUESTS_PER_MINUTE", "30"))
+# Section calls in flight at once across all transcripts of a batch
+GROQ_MAX_CONCURRENCY = int(os.environ.get("GROQ_MAX_CONCURRENCY", "3"))
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second on average, bursts of up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, sleeping until one is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# 問題1 / 問題１ / 問題一 ... section headings, and the first real question ("1番") that ends the 例 example
+SECTION_MARKERS = {
+    1: re.compile(r"問題\s*[1１一]"),
+    2: re.compile(r"問題\s*[2２二]"),
+    3: re.compile(r"問題\s*[3３三]"),
+}
+# Both markers must start a line, so 例えば, 例のところ, どれが一番いい or 11番 inside the text do not match.
+# 一番 only counts as a whole line, since 一番いい is everywhere in the dialogues
+EXAMPLE_MARKER = re.compile(r"(?m)^[ \t\u3000]*例[ \t\u3000。]*$")
+FIRST_QUESTION_MARKER = re.compile(
+    r"(?m)^[ \t\u3000]*(?:[1１][ \t\u3000]*番(?![0-9０-９])|一[ \t\u3000]*番[ \t\u3000。]*$)"
+)
+
+
+def segment_transcript(transcript: str) -> Dict[int, str]:
+    """
+    Split a transcript into its 問題1/2/3 sections, dropping each section's 例 practice example.
+    Sections run from their heading to the next heading found; a section whose heading is not found
+    is left out, so the caller can fall back to the full transcript for it.
+    """
+    starts = {}
+    position = 0
+    for section_num, marker in SECTION_MARKERS.items():
+        match = marker.search(transcript, position)
+        if match:
+            starts[section_num] = match.start()
+            position = match.end()
+
+    segments = {}
+    ordered = sorted(starts.items(), key=lambda item: item[1])
+    for idx, (section_num, start) in enumerate(ordered):
+        end = ordered[idx + 1][1] if idx + 1 < len(ordered) else len(transcript)
+        segment = transcript[start:end]
+
+        # The example sits between the section instructions and question 1; without both markers
+        # the segment is kept whole
+        example = EXAMPLE_MARKER.search(segment)
+        if example:
+            first_question = FIRST_QUESTION_MARKER.search(segment, example.end())
+            if first_question:
+                segment = segment[:example.start()] + segment[first_question.start():]
+        segments[section_num] = segment
+    return segments
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds the API asked us to wait in a 429 response, if any"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
 
 class TranscriptStructurer:
-    def __init__(self, model_id: str = GROQ_MODEL):
-        """Initialize Groq client using the official library"""
-        self.api_key = GROQ_API_KEY
-        if not self.api_key:
-            raise ValueError("GROQ_API_KEY environment variable must be set")
-        
+    def __init__(self, model_id: str = GROQ_MODEL, client=None,
+                 requests_per_minute: float = GROQ_REQUESTS_PER_MINUTE, max_concurrency: int = GROQ_MAX_CONCURRENCY):
+        """
+        Initialize Groq client using the official library.
+        `client` replaces the Groq client, e.g. backend.fake_clients.FakeChatClient for offline runs.
+        """
         self.model_id = model_id
-        self.client = Groq(api_key=self.api_key)
+        if client is None:
+            self.api_key = GROQ_API_KEY
+            if not self.api_key:
+                raise ValueError("GROQ_API_KEY environment variable must be set")
+            client = Groq(api_key=self.api_key)
+        self.client = client
+        self.max_concurrency = max(1, max_concurrency)
+        # Allow a burst of one transcript's three sections, then hold the average rate
+        self.rate_limiter = TokenBucket(requests_per_minute / 60, capacity=3) if requests_per_minute else None
+        # One entry per section call: section, input size in characters, whether it was a slice, seconds
+        self.call_log: List[Dict] = []
         
         self.prompts = {
             1: """Extract questions from section 問題1 of this JLPT transcript where the answer can be determined solely from the conversation without needing visual aids.
@@ -137,18 +238,15 @@ class TranscriptStructurer:
             
             for attempt in range(max_retries):
                 try:
-                    completion = self.client.chat.completions.create(
-                        model=self.model_id,
-                        messages=[
-                            {"role": "user", "content": full_prompt}
-                        ],
-                        temperature=0
-                    )
-                    return completion.choices[0].message.content
+                    # Temperature 0 extraction is deterministic, so cached_call serves repeats from the LLM cache
+                    return cached_call(self.model_id, full_prompt, {"temperature": 0},
+                                       lambda: self._complete(full_prompt))
                 except Exception as e:
                     if attempt < max_retries - 1:
-                        print(f"Retry {attempt+1}/{max_retries} after error: {str(e)}")
-                        time.sleep(retry_delay)
+                        # Honour the server's retry-after on rate limits, otherwise jittered exponential backoff
+                        delay = _retry_after(e) or random.uniform(retry_delay / 2, retry_delay)
+                        print(f"Retry {attempt+1}/{max_retries} in {delay:.1f}s after error: {str(e)}")
+                        time.sleep(delay)
                         retry_delay *= 2  # exponential backoff
                     else:
                         raise
@@ -156,19 +254,123 @@ class TranscriptStructurer:
             print(f"Error invoking Groq API: {str(e)}")
             return None
 
+    def _section_inputs(self, transcript: str) -> Dict[int, str]:
+        """The text each section prompt is sent: its own slice, or the full transcript if its heading is missing"""
+        segments = segment_transcript(transcript)
+        if not segments:
+            print("No 問題 markers found, sending the full transcript to every section")
+        return {section_num: segments.get(section_num, transcript) for section_num in range(1, 4)}
+
+    def _complete(self, full_prompt: str) -> str:
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        completion = self.client.chat.completions.create(
+            model=self.model_id,
+            messages=[
+                {"role": "user", "content": full_prompt}
+            ],
+            temperature=0
+        )
+        return completion.choices[0].message.content
+
+    def _process_section(self, section_num: int, section_text: str, transcript_chars: int) -> Optional[str]:
+        print(f"Processing section {section_num}...")
+        started = time.perf_counter()
+        result = self._invoke_groq(self.prompts[section_num], section_text)
+        elapsed = time.perf_counter() - started
+        self.call_log.append({
+            "section": section_num,
+            "input_chars": len(section_text),
+            "transcript_chars": transcript_chars,
+            "segmented": len(section_text) < transcript_chars,
+            "seconds": elapsed
+        })
+        if result:
+            print(f"Successfully processed section {section_num} "
+                  f"({len(section_text)}/{transcript_chars} transcript chars, {elapsed:.1f}s)")
+        else:
+            print(f"Failed to process section {section_num}")
+        return result
+
     def structure_transcript(self, transcript: str) -> Dict[int, str]:
-        """Structure the transcript into three sections using separate prompts"""
+        """Structure the transcript into three sections, extracting the sections concurrently"""
         results = {}
-        # Process all sections (1, 2, 3)
-        for section_num in range(1, 4):
-            print(f"Processing section {section_num}...")
-            result = self._invoke_groq(self.prompts[section_num], transcript)
-            if result:
-                results[section_num] = result
-                print(f"Successfully processed section {section_num}")
-            else:
-                print(f"Failed to process section {section_num}")
-        return results
+        section_inputs = self._section_inputs(transcript)
+        with ThreadPoolExecutor(max_workers=min(3, self.max_concurrency)) as executor:
+            futures = {
+                executor.submit(self._process_section, section_num, section_text, len(transcript)): section_num
+                for section_num, section_text in section_inputs.items()
+            }
+            for future in as_completed(futures):
+                result = future.result()
+                if result:
+                    results[futures[future]] = result
+        return dict(sorted(results.items()))
+
+    def usage_report(self) -> Dict[str, float]:
+        """Totals over call_log: characters sent vs. sending the full transcript every time, and call timing"""
+        calls = len(self.call_log)
+        sent = sum(call["input_chars"] for call in self.call_log)
+        full = sum(call["transcript_chars"] for call in self.call_log)
+        seconds = sum(call["seconds"] for call in self.call_log)
+        return {
+            "calls": calls,
+            "segmented_calls": sum(1 for call in self.call_log if call["segmented"]),
+            "input_chars": sent,
+            "full_transcript_chars": full,
+            "input_reduction": 1 - sent / full if full else 0.0,
+            "avg_seconds": seconds / calls if calls else 0.0,
+        }
+
+    def structure_directory(self, transcripts_dir: str, questions_dir: str, skip_existing: bool = True) -> Dict[str, int]:
+        """
+        Structure every .txt transcript in `transcripts_dir` into `questions_dir`.
+        All section calls share one pool of max_concurrency workers and the rate limiter,
+        and each transcript is saved as soon as its three sections are done.
+        """
+        pending = {}
+        for name in sorted(os.listdir(transcripts_dir)):
+            if not name.endswith('.txt'):
+                continue
+            output_path = os.path.join(questions_dir, name)
+            if skip_existing and all(
+                os.path.exists(f"{os.path.splitext(output_path)[0]}_section{section_num}.txt") for section_num in range(1, 4)
+            ):
+                continue
+            transcript = self.load_transcript(os.path.join(transcripts_dir, name))
+            if transcript:
+                pending[output_path] = transcript
+
+        summary = {"transcripts": len(pending), "saved": 0, "failed": 0}
+        started = time.perf_counter()
+        sections = {output_path: {} for output_path in pending}
+        remaining = {output_path: 3 for output_path in pending}
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            futures = {}
+            for output_path, transcript in pending.items():
+                for section_num, section_text in self._section_inputs(transcript).items():
+                    future = executor.submit(self._process_section, section_num, section_text, len(transcript))
+                    futures[future] = (output_path, section_num)
+            for future in as_completed(futures):
+                output_path, section_num = futures[future]
+                result = future.result()
+                if result:
+                    sections[output_path][section_num] = result
+                remaining[output_path] -= 1
+                if remaining[output_path] == 0:
+                    structured = dict(sorted(sections.pop(output_path).items()))
+                    if structured and self.save_questions(structured, output_path):
+                        summary["saved"] += 1
+                    else:
+                        summary["failed"] += 1
+
+        usage = self.usage_report()
+        print(f"Structured {summary['saved']} of {summary['transcripts']} transcripts "
+              f"({summary['failed']} failed) in {time.perf_counter() - started:.1f}s, "
+              f"sent {usage['input_chars']} of {usage['full_transcript_chars']} transcript chars "
+              f"({usage['input_reduction']:.0%} saved), {usage['avg_seconds']:.1f}s per call")
+        return summary
 
     def save_questions(self, structured_sections: Dict[int, str], base_filename: str) -> bool:
         """Save each section to a separate file"""
@@ -199,6 +401,15 @@ class TranscriptStructurer:
 if __name__ == "__main__":
     # Make sure you have configured the environment variable GROQ_API_KEY
     structurer = TranscriptStructurer()
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        # Structure a whole directory:
+        #   python structured_data.py batch [./data/transcripts] [./data/questions]
+        structurer.structure_directory(
+            sys.argv[2] if len(sys.argv) > 2 else "./data/transcripts",
+            sys.argv[3] if len(sys.argv) > 3 else "./data/questions"
+        )
+        sys.exit(0)
+
     transcript_path = "./data/transcripts/JNaUeTxSgqQ.txt"
     print(f"Loading transcript from {transcript_path}")
     transcript = structurer.load_transcript(transcript_path)
@@ -0,0 +1,167 @@
+"""
+Content-addressed cache of synthesized speech clips, shared by every AudioGenerator.
+
+Clips are stored as <sha256(engine, voice, text)>.mp3 under frontend/static/audio/cache.
+A hit refreshes the file's modification time, and the oldest files are evicted once the
+directory grows past TTS_CACHE_MAX_MB.
+
+From listening-comp/:
+
+    python backend/tts_cache.py stats
+    python backend/tts_cache.py prewarm    # synthesize the fixed announcer phrases
+    python backend/tts_cache.py clear
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+TTS_CACHE_ENABLED = os.getenv('TTS_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+TTS_CACHE_DIR = os.getenv('TTS_CACHE_DIR', os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "frontend/static/audio/cache"
+))
+TTS_CACHE_MAX_MB = float(os.getenv('TTS_CACHE_MAX_MB', '200'))
+
+# Announcer lines that open or close almost every question, synthesized ahead of time by `prewarm`
+ANNOUNCER_PHRASES = [
+    "次の会話を聞いて、質問に答えてください。",
+    "次の会話を聞いて、正しい答えを選んでください。",
+    "最もよいものを一つ選んでください。",
+    "では、始めます。",
+]
+
+
+def clip_key(engine: str, voice: str, text: str) -> str:
+    return hashlib.sha256(f"{engine}\0{voice}\0{text}".encode('utf-8')).hexdigest()
+
+
+class ClipCache:
+    """Size-bounded LRU of MP3 clips on disk, recency is the file modification time"""
+
+    def __init__(self, directory: str = TTS_CACHE_DIR, max_bytes: int = int(TTS_CACHE_MAX_MB * 1024 * 1024)):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        # Size of every cached clip, so eviction does not rescan the directory
+        self._sizes: Dict[str, int] = {}
+        for name in os.listdir(directory):
+            if name.endswith('.mp3'):
+                self._sizes[name[:-4]] = os.path.getsize(os.path.join(directory, name))
+        self._total = sum(self._sizes.values())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def get(self, engine: str, voice: str, text: str) -> Optional[bytes]:
+        key = clip_key(engine, voice, text)
+        try:
+            with open(self._path(key), 'rb') as f:
+                data = f.read()
+            os.utime(self._path(key))
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, engine: str, voice: str, text: str, data: bytes):
+        key = clip_key(engine, voice, text)
+        tmp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+        with self._lock:
+            self._total += len(data) - self._sizes.get(key, 0)
+            self._sizes[key] = len(data)
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Delete least recently used clips until the cache is back under 90% of max_bytes"""
+        by_age = []
+        for key in self._sizes:
+            try:
+                by_age.append((os.path.getmtime(self._path(key)), key))
+            except OSError:
+                by_age.append((0, key))
+        for _, key in sorted(by_age):
+            if self._total <= self.max_bytes * 0.9:
+                break
+            try:
+                os.unlink(self._path(key))
+            except OSError:
+                pass
+            self._total -= self._sizes.pop(key)
+            self.evictions += 1
+
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._sizes)
+            for key in list(self._sizes):
+                try:
+                    os.unlink(self._path(key))
+                except OSError:
+                    pass
+            self._sizes.clear()
+            self._total = 0
+        return count
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "directory": self.directory,
+                "clips": len(self._sizes),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+_default_cache: Optional[ClipCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def default_clip_cache() -> Optional[ClipCache]:
+    """Process-wide clip cache at TTS_CACHE_DIR, None when TTS_CACHE_ENABLED is off"""
+    global _default_cache
+    if not TTS_CACHE_ENABLED:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ClipCache()
+        return _default_cache
+
+
+if __name__ == "__main__":
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["stats", "prewarm", "clear"])
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        print(json.dumps(ClipCache().stats(), indent=2))
+    elif args.command == "prewarm":
+        from backend.audio_generator import AudioGenerator
+        started = time.perf_counter()
+        generator = AudioGenerator()
+        synthesized = generator.prewarm_clip_cache()
+        print(f"Pre-warmed {synthesized} clips in {time.perf_counter() - started:.1f}s")
+        print(json.dumps(generator.clip_cache.stats(), indent=2))
+    else:
+        print(f"Deleted {ClipCache().clear()} clips")
@@ -0,0 +1,135 @@
+"""
+Text-to-speech providers for AudioGenerator, behind a registry that imports each SDK and builds
+its client only when a provider is first asked for.
+
+Every provider returns MP3 at 24 kHz mono, so clips from different providers can be joined
+frame by frame (see backend.mp3.join).
+"""
+import importlib
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+# Provider used when a call does not name one
+TTS_PROVIDER = os.getenv('TTS_PROVIDER', 'aws')
+
+
+class PollyProvider:
+    """Amazon Polly neural voices"""
+    engine = 'polly-neural'
+
+    def __init__(self, client=None):
+        if client is None:
+            from backend.resources import aws_client
+            client = aws_client('polly')
+        self.client = client
+
+    def synthesize(self, text: str, voice: str) -> bytes:
+        response = self.client.synthesize_speech(
+            Text=text,
+            OutputFormat='mp3',
+            VoiceId=voice,
+            Engine='neural',
+            LanguageCode='ja-JP'
+        )
+        return response['AudioStream'].read()
+
+
+class GoogleProvider:
+    """Google Cloud Text-to-Speech, credentials come from GOOGLE_APPLICATION_CREDENTIALS"""
+    engine = 'google-standard'
+
+    def __init__(self, client=None):
+        from google.cloud import texttospeech
+        self.texttospeech = texttospeech
+        self.client = client or texttospeech.TextToSpeechClient()
+
+    def synthesize(self, text: str, voice: str) -> bytes:
+        texttospeech = self.texttospeech
+        response = self.client.synthesize_speech(
+            input=texttospeech.SynthesisInput(text=text),
+            voice=texttospeech.VoiceSelectionParams(language_code='ja-JP', name=voice),
+            audio_config=texttospeech.AudioConfig(
+                audio_encoding=texttospeech.AudioEncoding.MP3,
+                sample_rate_hertz=24000
+            )
+        )
+        return response.audio_content
+
+
+class AzureProvider:
+    """Azure neural voices, keyed by AZURE_SPEECH_KEY and AZURE_SPEECH_REGION"""
+    engine = 'azure-neural'
+
+    def __init__(self):
+        from azure.cognitiveservices import speech
+        self.speech = speech
+        self.config = speech.SpeechConfig(
+            subscription=os.getenv('AZURE_SPEECH_KEY'),
+            region=os.getenv('AZURE_SPEECH_REGION')
+        )
+        self.config.set_speech_synthesis_output_format(speech.SpeechSynthesisOutputFormat.Audio24Khz48KBitRateMonoMp3)
+
+    def synthesize(self, text: str, voice: str) -> bytes:
+        # A synthesizer per call, so concurrent parts do not share one; audio_config=None keeps the audio in memory
+        synthesizer = self.speech.SpeechSynthesizer(speech_config=self.config, audio_config=None)
+        ssml = f"<speak version='1.0' xml:lang='ja-JP'><voice name='{voice}'>{escape(text)}</voice></speak>"
+        result = synthesizer.speak_ssml_async(ssml).get()
+        if result.reason != self.speech.ResultReason.SynthesizingAudioCompleted:
+            raise Exception(f"Azure synthesis failed: {result.cancellation_details.error_details}")
+        return result.audio_data
+
+
+# name -> (factory, modules the factory imports), the modules are timed separately from the factory
+PROVIDERS: Dict[str, Tuple[Callable, Sequence[str]]] = {
+    'aws': (PollyProvider, ('boto3',)),
+    'google': (GoogleProvider, ('google.cloud.texttospeech',)),
+    'azure': (AzureProvider, ('azure.cognitiveservices.speech',)),
+}
+
+
+class TTSRegistry:
+    """
+    Providers by name, each constructed once on first `get`.
+    `timings` records the SDK import and client construction seconds of every provider loaded so far.
+    """
+
+    def __init__(self, providers: Dict[str, Tuple[Callable, Sequence[str]]] = None):
+        self._factories = dict(PROVIDERS if providers is None else providers)
+        self._providers = {}
+        self._lock = threading.Lock()
+        self.timings: Dict[str, Dict[str, float]] = {}
+
+    def register(self, name: str, factory: Callable, modules: Sequence[str] = ()):
+        """Add or replace a provider; a replaced one that was already built is dropped"""
+        with self._lock:
+            self._factories[name] = (factory, modules)
+            self._providers.pop(name, None)
+
+    def names(self) -> List[str]:
+        return list(self._factories)
+
+    def loaded(self) -> List[str]:
+        return list(self._providers)
+
+    def get(self, name: str = None):
+        name = name or TTS_PROVIDER
+        provider = self._providers.get(name)
+        if provider is not None:
+            return provider
+        if name not in self._factories:
+            raise ValueError(f"Unknown TTS provider: {name} (available: {', '.join(self._factories)})")
+        with self._lock:
+            if name not in self._providers:
+                factory, modules = self._factories[name]
+                started = time.perf_counter()
+                for module in modules:
+                    importlib.import_module(module)
+                imported = time.perf_counter()
+                # Kept even when the factory raises, e.g. for missing credentials
+                self.timings[name] = {"import_s": imported - started}
+                self._providers[name] = factory()
+                self.timings[name]["init_s"] = time.perf_counter() - imported
+            return self._providers[name]
@@ -1,46 +1,502 @@
 import chromadb
 from chromadb.utils import embedding_functions
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
+import hashlib
+import itertools
 import json
 import os
-import boto3
-from typing import Dict, List, Optional
+import random
+import threading
+import time
+import numpy as np
+import re
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, keep one process per cache directory
+    fcntl = None
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.resources import aws_client, embedding_limiter
+
+# Upper bound on concurrent invoke_model calls; the limiter backs off below it when Bedrock throttles
+EMBEDDING_MAX_IN_FLIGHT = int(os.environ.get("EMBEDDING_MAX_IN_FLIGHT", "8"))
+# Error codes worth retrying, everything else fails the text immediately
+RETRYABLE_ERROR_CODES = {"ThrottlingException", "TooManyRequestsException", "ServiceUnavailableException",
+                         "ModelNotReadyException", "ModelTimeoutException"}
+THROTTLING_ERROR_CODES = {"ThrottlingException", "TooManyRequestsException"}
+# Question files written by TranscriptStructurer.save_questions: <video_id>_section<n>.txt
+QUESTION_FILE_PATTERN = re.compile(r"^(.+)_section(\d+)\.txt$")
+# Field headers of a <question> block, and "1. ..." option lines
+QUESTION_FIELDS = ("Introduction", "Conversation", "Situation", "Question", "Options")
+# Fields a question needs to be indexed in each section
+SECTION_FIELDS = {2: ("Introduction", "Conversation", "Question"), 3: ("Situation", "Question")}
+OPTION_PATTERN = re.compile(r"^\d+[.)]\s*(.*)$")
+# Questions embedded and upserted per Chroma call when indexing a file
+INDEX_BATCH_SIZE = int(os.environ.get("INDEX_BATCH_SIZE", "64"))
+# Rows in the on-disk embedding cache (1536 float32 each, ~6 KiB per entry)
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.environ.get("EMBEDDING_CACHE_MAX_ENTRIES", "20000"))
+
+
+class EmbeddingError(Exception):
+    """Raised when some texts could not be embedded, instead of indexing placeholder vectors"""
+
+    def __init__(self, failures: Dict[int, str], total: int):
+        self.failures = failures
+        self.total = total
+        first = ", ".join(f"#{idx}: {error}" for idx, error in list(failures.items())[:3])
+        super().__init__(f"Failed to embed {len(failures)} of {total} texts ({first})")
+
+
+def _error_code(error: Exception) -> Optional[str]:
+    """Error code of a botocore ClientError (or anything shaped like one)"""
+    return getattr(error, "response", {}).get("Error", {}).get("Code")
+
+
+class AdaptiveLimiter:
+    """
+    Caps concurrent calls with additive-increase / multiplicative-decrease:
+    each throttle halves the limit, each `limit` successes in a row raise it by one up to `max_limit`.
+    """
+
+    def __init__(self, max_limit: int):
+        self.max_limit = max(1, max_limit)
+        self.limit = self.max_limit
+        self.in_flight = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+
+    def __enter__(self):
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            self.in_flight += 1
+        return self
+
+    def __exit__(self, *exc):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    def on_success(self):
+        with self._condition:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.max_limit:
+                self.limit += 1
+                self._successes = 0
+                self._condition.notify()
+
+    def on_throttle(self):
+        with self._condition:
+            self.limit = max(1, self.limit // 2)
+            self._successes = 0
+
 
 class BedrockEmbeddingFunction(embedding_functions.EmbeddingFunction):
-    def __init__(self, model_id="amazon.titan-embed-text-v1"):
-        """Initialize Bedrock embedding function"""
-        self.bedrock_client = boto3.client('bedrock-runtime', region_name="us-east-1")
+    def __init__(self, model_id="amazon.titan-embed-text-v1", client=None,
+                 max_in_flight: int = EMBEDDING_MAX_IN_FLIGHT, max_retries: int = 6,
+                 base_delay: float = 0.5, max_delay: float = 20.0, limiter: Optional[AdaptiveLimiter] = None):
+        """
+        Initialize Bedrock embedding function.
+        `client` is anything with bedrock-runtime's invoke_model, e.g. backend.fake_clients.FakeEmbeddingClient
+        for offline benchmarks; by default the process-wide bedrock-runtime client is used.
+        Every call draws from one limiter, so max_in_flight and throttle backoff hold across calls;
+        with the default client that limiter is shared by the whole process.
+        """
+        if limiter is None:
+            limiter = embedding_limiter(max_in_flight) if client is None else AdaptiveLimiter(max_in_flight)
+        self.bedrock_client = client or aws_client('bedrock-runtime', region_name="us-east-1")
         self.model_id = model_id
+        self.max_in_flight = max_in_flight
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.last_stats: Dict[str, float] = {}
+        self._counters_lock = threading.Lock()
 
-    def __call__(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for a list of texts using Bedrock"""
-        embeddings = []
-        for text in texts:
+    def _embed_one(self, text: str, limiter: AdaptiveLimiter, counters: Dict[str, int]) -> List[float]:
+        """Embed a single text, retrying throttling and transient errors with jittered exponential backoff"""
+        for attempt in range(self.max_retries + 1):
             try:
-                response = self.bedrock_client.invoke_model(
-                    modelId=self.model_id,
-                    body=json.dumps({
-                        "inputText": text
-                    })
-                )
-                response_body = json.loads(response['body'].read())
-                embedding = response_body['embedding']
-                embeddings.append(embedding)
+                with limiter:
+                    response = self.bedrock_client.invoke_model(
+                        modelId=self.model_id,
+                        body=json.dumps({
+                            "inputText": text
+                        })
+                    )
+                    response_body = json.loads(response['body'].read())
+                limiter.on_success()
+                return response_body['embedding']
             except Exception as e:
-                print(f"Error generating embedding: {str(e)}")
-                # Return a zero vector as fallback
-                embeddings.append([0.0] * 1536)  # Titan model uses 1536 dimensions
+                code = _error_code(e)
+                if code not in RETRYABLE_ERROR_CODES or attempt == self.max_retries:
+                    raise
+                with self._counters_lock:
+                    counters["retries"] += 1
+                    if code in THROTTLING_ERROR_CODES:
+                        counters["throttles"] += 1
+                if code in THROTTLING_ERROR_CODES:
+                    limiter.on_throttle()
+                delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+                time.sleep(random.uniform(delay / 2, delay))
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for a list of texts using Bedrock, with up to max_in_flight concurrent calls.
+        Raises EmbeddingError if any text still fails after retries.
+        """
+        started = time.perf_counter()
+        limiter = self.limiter
+        counters = {"throttles": 0, "retries": 0}
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        failures: Dict[int, str] = {}
+
+        # Threads beyond the limiter's current limit wait for a free call slot
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_in_flight, len(texts)))) as executor:
+            futures = {executor.submit(self._embed_one, text, limiter, counters): idx for idx, text in enumerate(texts)}
+            for future, idx in futures.items():
+                try:
+                    embeddings[idx] = future.result()
+                except Exception as e:
+                    failures[idx] = str(e)
+
+        elapsed = time.perf_counter() - started
+        self.last_stats = {
+            "texts": len(texts),
+            "failed": len(failures),
+            "seconds": elapsed,
+            "texts_per_second": len(texts) / elapsed if elapsed else 0.0,
+            "throttles": counters["throttles"],
+            "retries": counters["retries"],
+            "final_limit": limiter.limit,
+        }
+        if failures:
+            print(f"Error generating embeddings: {len(failures)} of {len(texts)} texts failed")
+            raise EmbeddingError(failures, len(texts))
         return embeddings
 
+
+def question_fingerprint(question: Dict) -> str:
+    """Stable hash of a parsed question, independent of key order"""
+    return hashlib.sha256(json.dumps(question, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def embedding_key(model_id: str, text: str) -> str:
+    """Content address of an embedding: the same model and text always map to the same key"""
+    return hashlib.sha256(f"{model_id}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent LRU of embeddings.
+    Vectors live in a memory-mapped float32 matrix (vectors.f32, one row per slot) and
+    index.json maps each key to its row, in least- to most-recently-used order.
+    When all max_entries rows are taken the least recently used row is reused.
+
+    The vector size is taken from an existing index or the first vector stored, unless `dimensions`
+    fixes it; vectors of another size are simply not cached. Processes sharing the directory
+    serialize through an flock on cache.lock and reload index.json when another one has replaced it.
+    """
+
+    def __init__(self, directory: str, dimensions: Optional[int] = None,
+                 max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES):
+        self.directory = directory
+        self.dimensions = dimensions
+        self.max_entries = max_entries
+        self.index_path = os.path.join(directory, "index.json")
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.lock_path = os.path.join(directory, "cache.lock")
+        self._slots: "OrderedDict[str, int]" = OrderedDict()
+        self._vectors = None
+        # (inode, mtime, size) of the index.json last read or written by this process
+        self._index_signature = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(directory, exist_ok=True)
+        with self._file_lock(exclusive=False):
+            self._refresh()
+
+    @contextlib.contextmanager
+    def _file_lock(self, exclusive: bool):
+        with open(self.lock_path, 'a') as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _current_signature(self):
+        try:
+            stat = os.stat(self.index_path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _refresh(self):
+        """Reload index.json if it changed since this process last read or wrote it. Callers hold the file lock."""
+        signature = self._current_signature()
+        if signature is not None and signature == self._index_signature:
+            return
+        self._index_signature = signature
+
+        index = None
+        if signature is not None and os.path.exists(self.vectors_path):
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error reading embedding cache index, starting empty: {str(e)}")
+
+        # A cache built for another shape cannot be reused
+        if (index and index.get("max_entries") == self.max_entries
+                and self.dimensions in (None, index.get("dimensions"))):
+            if self._vectors is None or self.dimensions != index["dimensions"]:
+                self.dimensions = index["dimensions"]
+                self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+",
+                                          shape=(self.max_entries, self.dimensions))
+            self._slots = OrderedDict((key, slot) for key, slot in index["entries"])
+        else:
+            self._slots = OrderedDict()
+            self._vectors = None
+
+    def _open_vectors(self):
+        """Create the vector file for an empty cache, once the vector size is known. Callers hold the file lock."""
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="w+",
+                                  shape=(self.max_entries, self.dimensions))
+
+    def _save_index(self):
+        self._vectors.flush()
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "dimensions": self.dimensions,
+                "max_entries": self.max_entries,
+                "entries": list(self._slots.items())
+            }, f)
+        os.replace(tmp_path, self.index_path)
+        self._index_signature = self._current_signature()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Return the cached vectors among `keys`, marking them as recently used"""
+        found = {}
+        with self._lock, self._file_lock(exclusive=False):
+            self._refresh()
+            for key in keys:
+                slot = self._slots.get(key)
+                if slot is None:
+                    self.misses += 1
+                    continue
+                self._slots.move_to_end(key)
+                found[key] = self._vectors[slot].tolist()
+                self.hits += 1
+        return found
+
+    def put_many(self, vectors: Dict[str, List[float]]):
+        """Store vectors by key, evicting the least recently used rows when full, and persist the index"""
+        if not vectors:
+            return
+        with self._lock, self._file_lock(exclusive=True):
+            self._refresh()
+            if self.dimensions is None:
+                self.dimensions = len(next(iter(vectors.values())))
+            if self._vectors is None:
+                self._open_vectors()
+
+            accepted = {key: vector for key, vector in vectors.items() if len(vector) == self.dimensions}
+            if len(accepted) < len(vectors):
+                print(f"Not caching {len(vectors) - len(accepted)} embeddings that are not {self.dimensions}-dim")
+
+            # Rows that already belong to a saved key are dropped from the index before they are
+            # overwritten, so a crash in between loses those entries instead of mislabeling a vector
+            pending = []
+            reused = False
+            # New keys take rows no saved key points at; after a crash between the two index saves
+            # below, the index can hold fewer keys than there are written rows, so its size says nothing
+            free = sorted(set(range(self.max_entries)) - set(self._slots.values()), reverse=True)
+            for key, vector in accepted.items():
+                slot = self._slots.pop(key, None)
+                if slot is not None:
+                    reused = True
+                else:
+                    if free:
+                        slot = free.pop()
+                    elif self._slots:
+                        _, slot = self._slots.popitem(last=False)
+                        self.evictions += 1
+                        reused = True
+                    else:
+                        # More new vectors than max_entries in one batch
+                        break
+                pending.append((key, slot, vector))
+            if reused:
+                self._save_index()
+
+            for key, slot, vector in pending:
+                self._vectors[slot] = np.asarray(vector, dtype=np.float32)
+                self._slots[key] = slot
+            self._save_index()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._slots),
+                "max_entries": self.max_entries,
+                "dimensions": self.dimensions,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+class CachedEmbeddingFunction(embedding_functions.EmbeddingFunction):
+    def __init__(self, embedding_fn, cache: EmbeddingCache, model_id: Optional[str] = None):
+        """Serve embeddings from `cache` and only send texts it has not seen to `embedding_fn`"""
+        self.embedding_fn = embedding_fn
+        self.cache = cache
+        self.model_id = model_id or getattr(embedding_fn, "model_id", type(embedding_fn).__name__)
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        keys = [embedding_key(self.model_id, text) for text in texts]
+        found = self.cache.get_many(keys)
+
+        # Embed each missing text once, even if it repeats within the batch
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if missing:
+            computed = dict(zip(missing, self.embedding_fn(list(missing.values()))))
+            self.cache.put_many(computed)
+            found.update(computed)
+
+        return [found[key] for key in keys]
+
+
+class QuestionParseError(ValueError):
+    """A malformed <question> block, with the line it starts on"""
+
+    def __init__(self, line_number: int, message: str):
+        self.line_number = line_number
+        self.message = message
+        super().__init__(f"line {line_number}: {message}")
+
+
+def _finish_question(question: Dict, start_line: int, required: Sequence[str] = ()) -> Dict:
+    if "Question" not in question:
+        raise QuestionParseError(start_line, "missing Question field")
+    if "Situation" not in question and not ("Introduction" in question and "Conversation" in question):
+        raise QuestionParseError(start_line, "needs either Situation or Introduction and Conversation")
+    missing = [field for field in required if field not in question]
+    if missing:
+        raise QuestionParseError(start_line, f"missing {', '.join(missing)} field")
+    return question
+
+
+def iter_questions(lines: Iterable[str], errors: Optional[List[QuestionParseError]] = None,
+                   required: Sequence[str] = ()) -> Iterator[Dict]:
+    """
+    Parse <question> blocks from the lines of a structured question file, one question at a time.
+    Fields may span several lines (multi-line Conversation blocks are kept whole) or start on the
+    header line itself. A malformed block, or one without every `required` field, is skipped and
+    reported in `errors`, or printed if None.
+    """
+    def report(error: QuestionParseError):
+        if errors is None:
+            print(f"Error parsing question: {error}")
+        else:
+            errors.append(error)
+
+    question = None
+    field = None
+    start_line = 0
+    broken = None
+    line_number = 0
+
+    for line_number, raw in enumerate(lines, 1):
+        line = raw.strip()
+
+        if line.startswith('<question>'):
+            if question is not None:
+                report(QuestionParseError(start_line, "missing </question>"))
+            question, field, start_line, broken = {}, None, line_number, None
+            continue
+        if question is None:
+            # Text between questions is ignored
+            continue
+
+        if line.startswith('</question>'):
+            if broken:
+                report(broken)
+            else:
+                try:
+                    yield _finish_question(question, start_line, required)
+                except QuestionParseError as e:
+                    report(e)
+            question, field = None, None
+            continue
+        if broken:
+            continue
+
+        header, colon, rest = line.partition(':')
+        if colon and header in QUESTION_FIELDS:
+            if header in question:
+                broken = QuestionParseError(line_number, f"duplicate {header} field")
+                continue
+            field = header
+            question[field] = [] if field == 'Options' else ''
+            line = rest.strip()
+            if not line:
+                continue
+        if not line:
+            continue
+        if field is None:
+            broken = QuestionParseError(line_number, "text before the first field")
+        elif field == 'Options':
+            option = OPTION_PATTERN.match(line)
+            if option:
+                question['Options'].append(option.group(1))
+            elif question['Options']:
+                question['Options'][-1] += f"\n{line}"
+            else:
+                broken = QuestionParseError(line_number, f"expected a numbered option, got {line[:40]!r}")
+        else:
+            question[field] = f"{question[field]}\n{line}" if question[field] else line
+
+    if question is not None:
+        report(QuestionParseError(start_line, "missing </question> at end of file"))
+
+
+def iter_questions_from_file(filename: str, errors: Optional[List[QuestionParseError]] = None,
+                             required: Sequence[str] = ()) -> Iterator[Dict]:
+    """Stream the questions of a structured question file without reading it whole"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        yield from iter_questions(f, errors, required)
+
+
 class QuestionVectorStore:
-    def __init__(self, persist_directory: str = "backend/data/vectorstore"):
+    def __init__(self, persist_directory: str = "backend/data/vectorstore", embedding_fn=None):
         """Initialize the vector store for JLPT listening questions"""
         self.persist_directory = persist_directory
         
         # Initialize ChromaDB client
         self.client = chromadb.PersistentClient(path=persist_directory)
         
-        # Use Bedrock's Titan embedding model
-        self.embedding_fn = BedrockEmbeddingFunction()
+        # Use Bedrock's Titan embedding model unless another embedding function is given,
+        # behind an on-disk cache so repeated documents and queries skip the network call
+        self.embedding_cache = EmbeddingCache(os.path.join(persist_directory, "embedding_cache"))
+        self.embedding_fn = CachedEmbeddingFunction(embedding_fn or BedrockEmbeddingFunction(), self.embedding_cache)
         
         # Create or get collections for each section type
         self.collections = {
@@ -56,28 +512,29 @@ class QuestionVectorStore:
             )
         }
 
-    def add_questions(self, section_num: int, questions: List[Dict], video_id: str):
-        """Add questions to the vector store"""
-        if section_num not in [2, 3]:
-            raise ValueError("Only sections 2 and 3 are currently supported")
-            
-        collection = self.collections[f"section{section_num}"]
-        
+    def _question_records(self, section_num: int, questions: List[Dict], video_id: str, start: int = 0):
+        """
+        Build the ids, documents and metadatas stored for a file's questions, numbered from `start`.
+        Ids are keyed on the question's content, so inserting or removing a question leaves the ids of
+        the others alone; the position is only metadata.
+        """
         ids = []
         documents = []
         metadatas = []
         
-        for idx, question in enumerate(questions):
-            # Create a unique ID for each question
-            question_id = f"{video_id}_{section_num}_{idx}"
+        for idx, question in enumerate(questions, start):
+            fingerprint = question_fingerprint(question)
+            question_id = f"{video_id}_{section_num}_{fingerprint[:16]}"
             ids.append(question_id)
             
             # Store the full question structure as metadata
+            full_structure = json.dumps(question)
             metadatas.append({
                 "video_id": video_id,
                 "section": section_num,
                 "question_index": idx,
-                "full_structure": json.dumps(question)
+                "full_structure": full_structure,
+                "fingerprint": fingerprint
             })
             
             # Create a searchable document from the question content
@@ -93,12 +550,27 @@ class QuestionVectorStore:
                 Question: {question['Question']}
                 """
             documents.append(document)
+        return ids, documents, metadatas
+
+    def add_questions(self, section_num: int, questions: List[Dict], video_id: str):
+        """Add questions to the vector store"""
+        if section_num not in [2, 3]:
+            raise ValueError("Only sections 2 and 3 are currently supported")
+            
+        collection = self.collections[f"section{section_num}"]
+        for idx, question in enumerate(questions):
+            missing = [field for field in SECTION_FIELDS[section_num] if field not in question]
+            if missing:
+                raise ValueError(f"Question {idx} is missing {', '.join(missing)}")
+        ids, documents, metadatas = self._question_records(section_num, questions, video_id)
+        # The same question twice maps to one id
+        records = {question_id: record for question_id, *record in zip(ids, documents, metadatas)}
         
         # Add to collection
         collection.add(
-            ids=ids,
-            documents=documents,
-            metadatas=metadatas
+            ids=list(records),
+            documents=[document for document, _ in records.values()],
+            metadatas=[metadata for _, metadata in records.values()]
         )
 
     def search_similar_questions(
@@ -145,68 +617,141 @@ class QuestionVectorStore:
 
     def parse_questions_from_file(self, filename: str) -> List[Dict]:
         """Parse questions from a structured text file"""
-        questions = []
-        current_question = {}
-        
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                
-            i = 0
-            while i < len(lines):
-                line = lines[i].strip()
-                
-                if line.startswith('<question>'):
-                    current_question = {}
-                elif line.startswith('Introduction:'):
-                    i += 1
-                    if i < len(lines):
-                        current_question['Introduction'] = lines[i].strip()
-                elif line.startswith('Conversation:'):
-                    i += 1
-                    if i < len(lines):
-                        current_question['Conversation'] = lines[i].strip()
-                elif line.startswith('Situation:'):
-                    i += 1
-                    if i < len(lines):
-                        current_question['Situation'] = lines[i].strip()
-                elif line.startswith('Question:'):
-                    i += 1
-                    if i < len(lines):
-                        current_question['Question'] = lines[i].strip()
-                elif line.startswith('Options:'):
-                    options = []
-                    for _ in range(4):
-                        i += 1
-                        if i < len(lines):
-                            option = lines[i].strip()
-                            if option.startswith('1.') or option.startswith('2.') or option.startswith('3.') or option.startswith('4.'):
-                                options.append(option[2:].strip())
-                    current_question['Options'] = options
-                elif line.startswith('</question>'):
-                    if current_question:
-                        questions.append(current_question)
-                        current_question = {}
-                i += 1
-            return questions
+            return list(iter_questions_from_file(filename))
         except Exception as e:
             print(f"Error parsing questions from {filename}: {str(e)}")
             return []
 
-    def index_questions_file(self, filename: str, section_num: int):
-        """Index all questions from a file into the vector store"""
+    def index_questions_file(self, filename: str, section_num: int) -> Dict[str, int]:
+        """
+        Bring the stored questions of a file up to date: embed and upsert only new or edited
+        questions, INDEX_BATCH_SIZE at a time as the file is parsed, and delete the ones no longer
+        in the file. Ids follow each question's content, so an edited question is added under a new id
+        and its old entry deleted, while questions that only moved get their position updated without
+        being embedded again. Blocks that do not parse, or lack a field the section needs, are skipped
+        and reported before anything is written for them. Safe to re-run.
+        Returns the number of added, updated (moved), unchanged, deleted and unparseable questions.
+        """
+        if section_num not in [2, 3]:
+            raise ValueError("Only sections 2 and 3 are currently supported")
+
         # Extract video ID from filename
         video_id = os.path.basename(filename).split('_section')[0]
-        
-        # Parse questions from file
-        questions = self.parse_questions_from_file(filename)
-        
-        # Add to vector store
-        if questions:
-            self.add_questions(section_num, questions, video_id)
-            print(f"Indexed {len(questions)} questions from {filename}")
+
+        collection = self.collections[f"section{section_num}"]
+        stored = collection.get(where={"video_id": video_id}, include=['metadatas'])
+        stored_positions = {
+            question_id: metadata.get("question_index")
+            for question_id, metadata in zip(stored['ids'], stored['metadatas'])
+        }
+
+        counts = {"added": 0, "updated": 0, "unchanged": 0, "deleted": 0, "errors": 0}
+        errors: List[QuestionParseError] = []
+        seen_ids = set()
+        pending = ([], [], [])
+        moved = ([], [])
+
+        def flush():
+            if pending[0]:
+                collection.upsert(ids=pending[0], documents=pending[1], metadatas=pending[2])
+            if moved[0]:
+                # Metadata only, so nothing is embedded again
+                collection.update(ids=moved[0], metadatas=moved[1])
+            for batch in pending + moved:
+                batch.clear()
+
+        questions = iter_questions_from_file(filename, errors, SECTION_FIELDS[section_num])
+        start = 0
+        while True:
+            chunk = list(itertools.islice(questions, INDEX_BATCH_SIZE))
+            if not chunk:
+                break
+            ids, documents, metadatas = self._question_records(section_num, chunk, video_id, start)
+            start += len(chunk)
+            for question_id, document, metadata in zip(ids, documents, metadatas):
+                if question_id in seen_ids:
+                    # The same question twice in one file is stored once
+                    continue
+                seen_ids.add(question_id)
+                if question_id not in stored_positions:
+                    counts["added"] += 1
+                    for batch, value in zip(pending, (question_id, document, metadata)):
+                        batch.append(value)
+                elif stored_positions[question_id] != metadata["question_index"]:
+                    counts["updated"] += 1
+                    moved[0].append(question_id)
+                    moved[1].append(metadata)
+                else:
+                    counts["unchanged"] += 1
+            if len(pending[0]) + len(moved[0]) >= INDEX_BATCH_SIZE:
+                flush()
+        flush()
+
+        for error in errors:
+            print(f"Error parsing {filename}: {error}")
+        counts["errors"] = len(errors)
+        if errors:
+            # A broken block may be a question being edited, keep its stored entry until the file is fixed
+            print(f"Skipped deleting stale questions of {filename} because of parse errors")
+        else:
+            stale = sorted(set(stored_positions) - seen_ids)
+            if stale:
+                collection.delete(ids=stale)
+            counts["deleted"] = len(stale)
+
+        print(f"Indexed {filename}: {counts['added']} added, {counts['updated']} moved, "
+              f"{counts['unchanged']} unchanged, {counts['deleted']} deleted, {counts['errors']} unparseable")
+        return counts
+
+    def sync(self, directory: str = "backend/data/questions", max_workers: int = 4, prune: bool = True) -> Dict[str, int]:
+        """
+        Incrementally index every `<video_id>_section<n>.txt` file of sections 2 and 3 under `directory`,
+        several files at a time. With `prune`, questions of videos whose file is gone are deleted too.
+        """
+        files = []
+        for name in sorted(os.listdir(directory)):
+            match = QUESTION_FILE_PATTERN.match(name)
+            if match and int(match.group(2)) in (2, 3):
+                files.append((os.path.join(directory, name), match.group(1), int(match.group(2))))
+
+        totals = {"files": len(files), "failed": 0, "added": 0, "updated": 0, "unchanged": 0, "deleted": 0, "errors": 0}
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {executor.submit(self.index_questions_file, filename, section_num): filename
+                       for filename, _, section_num in files}
+            for future, filename in futures.items():
+                try:
+                    for key, count in future.result().items():
+                        totals[key] += count
+                except Exception as e:
+                    totals["failed"] += 1
+                    print(f"Error indexing {filename}: {str(e)}")
+
+        if prune:
+            for section_num in (2, 3):
+                present = {video_id for _, video_id, section in files if section == section_num}
+                collection = self.collections[f"section{section_num}"]
+                stored = collection.get(include=['metadatas'])
+                gone = [
+                    question_id for question_id, metadata in zip(stored['ids'], stored['metadatas'])
+                    if metadata.get("video_id") not in present
+                ]
+                if gone:
+                    collection.delete(ids=gone)
+                    totals["deleted"] += len(gone)
+
+        print(f"Synced {totals['files']} files: {totals['added']} added, {totals['updated']} moved, "
+              f"{totals['unchanged']} unchanged, {totals['deleted']} deleted, {totals['errors']} unparseable, "
+              f"{totals['failed']} failed")
+        return totals
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "sync":
+        # Incremental re-index of a whole directory, run from listening-comp/:
+        #   python backend/vector_store.py sync [backend/data/questions]
+        QuestionVectorStore().sync(sys.argv[2] if len(sys.argv) > 2 else "backend/data/questions")
+        sys.exit(0)
+
     # Example usage
     store = QuestionVectorStore()
     
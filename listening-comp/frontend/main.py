@@ -1,12 +1,11 @@
 import streamlit as st
 import sys
 import os
-import json
-from datetime import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from backend.question_generator import QuestionGenerator
-from backend.audio_generator import AudioGenerator
+from backend.question_pipeline import SECTION_BY_PRACTICE_TYPE
+from backend.resources import default_audio_generator, default_question_generator, default_question_pipeline
+from backend.question_store import default_question_store
 
 # Page config
 st.set_page_config(
@@ -15,56 +14,47 @@ st.set_page_config(
     layout="wide"
 )
 
-def load_stored_questions():
-    """Load previously stored questions from JSON file"""
-    questions_file = os.path.join(
-        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-        "backend/data/stored_questions.json"
-    )
-    if os.path.exists(questions_file):
-        with open(questions_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {}
+# Saved questions shown per sidebar page
+SAVED_QUESTIONS_PAGE_SIZE = 20
 
 def save_question(question, practice_type, topic, audio_file=None):
-    """Save a generated question to JSON file"""
-    questions_file = os.path.join(
-        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-        "backend/data/stored_questions.json"
-    )
-    
-    # Load existing questions
-    stored_questions = load_stored_questions()
-    
-    # Create a unique ID for the question using timestamp
-    question_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-    
-    # Add metadata
-    question_data = {
-        "question": question,
-        "practice_type": practice_type,
-        "topic": topic,
-        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "audio_file": audio_file
-    }
-    
-    # Add to stored questions
-    stored_questions[question_id] = question_data
-    
-    # Save back to file
-    os.makedirs(os.path.dirname(questions_file), exist_ok=True)
-    with open(questions_file, 'w', encoding='utf-8') as f:
-        json.dump(stored_questions, f, ensure_ascii=False, indent=2)
-    
-    return question_id
+    """Save a generated question, returns its id"""
+    return default_question_store().add(question, practice_type, topic, audio_file)
+
+def stream_question(practice_type, topic):
+    """Generate a question in the foreground, showing each field as the model writes it"""
+    placeholder = st.empty()
+    fields = {}
+    question = None
+    for event, payload in st.session_state.question_generator.generate_similar_question_stream(
+        SECTION_BY_PRACTICE_TYPE[practice_type], topic
+    ):
+        if event == 'done':
+            question = payload
+            break
+        field, value = payload
+        fields[field] = value
+        with placeholder.container():
+            st.subheader("Practice Scenario")
+            for name, text in fields.items():
+                st.write(f"**{name}:**")
+                if isinstance(text, list):
+                    for i, option in enumerate(text, 1):
+                        st.write(f"{i}. {option}")
+                else:
+                    st.write(text)
+    placeholder.empty()
+    return question
 
 def render_interactive_stage():
     """Render the interactive learning stage"""
-    # Initialize session state
+    # Initialize session state; generators, vector store and SDK clients are shared by all sessions
     if 'question_generator' not in st.session_state:
-        st.session_state.question_generator = QuestionGenerator()
+        st.session_state.question_generator = default_question_generator()
     if 'audio_generator' not in st.session_state:
-        st.session_state.audio_generator = AudioGenerator()
+        st.session_state.audio_generator = default_audio_generator()
+    if 'question_pipeline' not in st.session_state:
+        st.session_state.question_pipeline = default_question_pipeline()
     if 'current_question' not in st.session_state:
         st.session_state.current_question = None
     if 'feedback' not in st.session_state:
@@ -75,26 +65,10 @@ def render_interactive_stage():
         st.session_state.current_topic = None
     if 'current_audio' not in st.session_state:
         st.session_state.current_audio = None
-        
-    # Load stored questions for sidebar
-    stored_questions = load_stored_questions()
-    
-    # Create sidebar
-    with st.sidebar:
-        st.header("Saved Questions")
-        if stored_questions:
-            for qid, qdata in stored_questions.items():
-                # Create a button for each question
-                button_label = f"{qdata['practice_type']} - {qdata['topic']}\n{qdata['created_at']}"
-                if st.button(button_label, key=qid):
-                    st.session_state.current_question = qdata['question']
-                    st.session_state.current_practice_type = qdata['practice_type']
-                    st.session_state.current_topic = qdata['topic']
-                    st.session_state.current_audio = qdata.get('audio_file')
-                    st.session_state.feedback = None
-                    st.rerun()
-        else:
-            st.info("No saved questions yet. Generate some questions to see them here!")
+    if 'current_question_id' not in st.session_state:
+        st.session_state.current_question_id = None
+    if 'saved_questions_page' not in st.session_state:
+        st.session_state.saved_questions_page = 0
     
     # Practice type selection
     practice_type = st.selectbox(
@@ -113,20 +87,77 @@ def render_interactive_stage():
         topics[practice_type]
     )
     
+    # Sidebar pages through saved questions, newest first
+    store = default_question_store()
+    with st.sidebar:
+        st.header("Saved Questions")
+        only_selected = st.checkbox("Only the selected topic")
+        filters = (practice_type, topic) if only_selected else (None, None)
+        total = store.count(*filters)
+        pages = max(1, -(-total // SAVED_QUESTIONS_PAGE_SIZE))
+        page = min(st.session_state.saved_questions_page, pages - 1)
+        stored_questions = store.list(
+            *filters, limit=SAVED_QUESTIONS_PAGE_SIZE, offset=page * SAVED_QUESTIONS_PAGE_SIZE
+        )
+        if stored_questions:
+            for qdata in stored_questions:
+                # Create a button for each question
+                button_label = f"{qdata['practice_type']} - {qdata['topic']}\n{qdata['created_at']}"
+                if st.button(button_label, key=qdata['id']):
+                    st.session_state.current_question = qdata['question']
+                    st.session_state.current_question_id = qdata['id']
+                    st.session_state.current_practice_type = qdata['practice_type']
+                    st.session_state.current_topic = qdata['topic']
+                    st.session_state.current_audio = qdata.get('audio_file')
+                    st.session_state.feedback = None
+                    st.rerun()
+            if pages > 1:
+                newer, position, older = st.columns([1, 2, 1])
+                if newer.button("‹", disabled=page == 0):
+                    st.session_state.saved_questions_page = page - 1
+                    st.rerun()
+                position.caption(f"Page {page + 1} of {pages}")
+                if older.button("›", disabled=page >= pages - 1):
+                    st.session_state.saved_questions_page = page + 1
+                    st.rerun()
+        else:
+            st.info("No saved questions yet. Generate some questions to see them here!")
+    
+    # Keep questions for the selected practice type and topic ready in the background; after the first
+    # prefill every pop tops the queue up, so reruns for the same selection need not ask again
+    pipeline = st.session_state.question_pipeline
+    if st.session_state.get('prefilled_for') != (practice_type, topic):
+        pipeline.prefill(practice_type, topic)
+        st.session_state.prefilled_for = (practice_type, topic)
+    
+    with st.sidebar:
+        with st.expander("Question queue"):
+            for queue_name, queue_metrics in pipeline.metrics().items():
+                latency = queue_metrics['refill_p50_s']
+                st.caption(
+                    f"{queue_name}: {queue_metrics['depth']} ready, {queue_metrics['in_flight']} generating, "
+                    f"{queue_metrics['hits']}/{queue_metrics['hits'] + queue_metrics['misses']} served from queue"
+                    + (f", refill p50 {latency:.1f}s" if latency is not None else "")
+                )
+    
     # Generate new question button
     if st.button("Generate New Question"):
-        section_num = 2 if practice_type == "Dialogue Practice" else 3
-        new_question = st.session_state.question_generator.generate_similar_question(
-            section_num, topic
-        )
+        item = pipeline.pop(practice_type, topic)
+        if item:
+            new_question = item['question']
+            audio_file = item['audio_file']
+        else:
+            # Queue still empty, generate this one in the foreground
+            new_question = stream_question(practice_type, topic)
+            audio_file = None
         st.session_state.current_question = new_question
         st.session_state.current_practice_type = practice_type
         st.session_state.current_topic = topic
         st.session_state.feedback = None
         
         # Save the generated question
-        save_question(new_question, practice_type, topic)
-        st.session_state.current_audio = None
+        st.session_state.current_question_id = save_question(new_question, practice_type, topic, audio_file)
+        st.session_state.current_audio = audio_file
     
     if st.session_state.current_question:
         st.subheader("Practice Scenario")
@@ -228,12 +259,15 @@ def render_interactive_stage():
                             st.session_state.current_audio = audio_file
                             
                             # Update stored question with audio file
-                            save_question(
-                                st.session_state.current_question,
-                                st.session_state.current_practice_type,
-                                st.session_state.current_topic,
-                                audio_file
-                            )
+                            if st.session_state.current_question_id:
+                                default_question_store().set_audio(st.session_state.current_question_id, audio_file)
+                            else:
+                                st.session_state.current_question_id = save_question(
+                                    st.session_state.current_question,
+                                    st.session_state.current_practice_type,
+                                    st.session_state.current_topic,
+                                    audio_file
+                                )
                             st.rerun()
                         except Exception as e:
                             st.error(f"Error generating audio: {str(e)}")
@@ -0,0 +1,14 @@
+import os
+import sys
+import tempfile
+
+# Keep the default caches and stores out of backend/data while the tests run
+_data_dir = tempfile.mkdtemp(prefix="listening-comp-tests-")
+os.environ.setdefault("LLM_CACHE_PATH", os.path.join(_data_dir, "llm_cache.sqlite3"))
+os.environ.setdefault("TTS_CACHE_DIR", os.path.join(_data_dir, "tts_cache"))
+os.environ.setdefault("QUESTION_STORE_PATH", os.path.join(_data_dir, "questions.sqlite3"))
+os.environ.setdefault("VECTOR_STORE_DIR", os.path.join(_data_dir, "vectorstore"))
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
+
+# Tests import the app as `backend.*`, like the scripts run from listening-comp/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
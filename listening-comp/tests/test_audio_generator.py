@@ -0,0 +1,75 @@
+import pytest
+
+from backend.audio_generator import AudioGenerator, parse_conversation_locally
+from backend.fake_clients import FakePollyClient
+from backend.tts_cache import ClipCache
+
+
+class FakeGoogleProvider:
+    engine = 'google-standard'
+
+    def __init__(self):
+        self.calls = []
+        self.polly = FakePollyClient(latency=0.0)
+
+    def synthesize(self, text: str, voice: str) -> bytes:
+        self.calls.append((text, voice))
+        return self.polly.synthesize_speech(Text=text, VoiceId=voice)['AudioStream'].read()
+
+
+@pytest.fixture
+def generator(tmp_path):
+    return AudioGenerator(polly_client=FakePollyClient(latency=0.0), clip_cache=ClipCache(str(tmp_path / "clips")))
+
+
+@pytest.mark.parametrize("service", ["aws", "google"])
+def test_prewarmed_announcer_clips_are_hit_when_rendering(generator, service):
+    google = FakeGoogleProvider()
+    generator.tts.register('google', lambda: google)
+    phrase = "次の会話を聞いて、質問に答えてください。"
+    assert generator.prewarm_clip_cache([phrase], service) == 1
+
+    steps = generator.plan_audio([('Announcer', phrase, 'male')], service)
+    text, voice, step_service = steps[0][1]
+    hits = generator.clip_cache.hits
+    generator.synthesize_part(text, voice, step_service)
+    assert generator.clip_cache.hits == hits + 1
+
+
+INTRODUCTION = "次の会話を聞いて、質問に答えてください。男の人と女の人が話しています。"
+
+
+def conversation_parts(conversation: str, introduction: str = INTRODUCTION):
+    parts = parse_conversation_locally({
+        "Introduction": introduction, "Conversation": conversation, "Question": "何時ですか。"
+    })
+    return None if parts is None else [part for part in parts if part[0] != 'Announcer']
+
+
+def test_local_parse_splits_labelled_turns():
+    assert conversation_parts("男性: 会議は何時からですか。 女性：10時からです。") == [
+        ("男性", "会議は何時からですか。", "male"),
+        ("女性", "10時からです。", "female"),
+    ]
+
+
+def test_local_parse_keeps_times_inside_a_turn():
+    assert conversation_parts("男の人: 何時に出ますか。 女の人: 朝の電車です。時間は10:30です。") == [
+        ("男の人", "何時に出ますか。", "male"),
+        ("女の人", "朝の電車です。時間は10:30です。", "female"),
+    ]
+
+
+def test_local_parse_ignores_unknown_tokens_before_a_colon():
+    assert conversation_parts("A: どうしましたか。 B: 理由：電車が遅れました。") == [
+        ("A", "どうしましたか。", "male"),
+        ("B", "理由：電車が遅れました。", "female"),
+    ]
+
+
+def test_local_parse_accepts_names_from_the_introduction():
+    introduction = "次の会話を聞いて、質問に答えてください。男の人の田中さんと女の人の山田さんが話しています。"
+    assert conversation_parts("田中: 行きますか。 山田: はい。", introduction) == [
+        ("田中", "行きますか。", "male"),
+        ("山田", "はい。", "female"),
+    ]
@@ -0,0 +1,62 @@
+import pytest
+
+from backend.vector_store import EmbeddingCache
+
+
+def vector(value: float):
+    return [value, value, value, value]
+
+
+class Crash(Exception):
+    pass
+
+
+def test_put_and_get_many_survive_reopening(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), max_entries=3)
+    cache.put_many({"a": vector(1), "b": vector(2)})
+
+    reopened = EmbeddingCache(str(tmp_path), max_entries=3)
+    assert reopened.get_many(["a", "b", "x"]) == {"a": vector(1), "b": vector(2)}
+    assert reopened.stats()["dimensions"] == 4
+
+
+def test_full_cache_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), max_entries=2)
+    cache.put_many({"a": vector(1), "b": vector(2)})
+    cache.get_many(["a"])
+    cache.put_many({"c": vector(3)})
+
+    assert cache.get_many(["a", "b", "c"]) == {"a": vector(1), "c": vector(3)}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_vectors_of_another_size_are_not_cached(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), dimensions=4, max_entries=2)
+    cache.put_many({"a": vector(1), "short": [1.0]})
+    assert cache.get_many(["a", "short"]) == {"a": vector(1)}
+
+
+def test_crash_between_index_saves_never_mislabels_a_row(tmp_path, monkeypatch):
+    cache = EmbeddingCache(str(tmp_path), max_entries=3)
+    cache.put_many({"a": vector(1), "b": vector(2), "c": vector(3)})
+
+    # Evicting "a" saves the index without it, then the process dies before the second save
+    save_index = EmbeddingCache._save_index
+    saves = []
+
+    def crash_on_second_save(self):
+        saves.append(self)
+        if len(saves) == 2:
+            raise Crash()
+        save_index(self)
+
+    monkeypatch.setattr(EmbeddingCache, "_save_index", crash_on_second_save)
+    with pytest.raises(Crash):
+        cache.put_many({"d": vector(4)})
+    monkeypatch.setattr(EmbeddingCache, "_save_index", save_index)
+
+    # The index has fewer keys than written rows; a new key must not take a row "b" or "c" still uses
+    reopened = EmbeddingCache(str(tmp_path), max_entries=3)
+    assert reopened.get_many(["a", "d"]) == {}
+    reopened.put_many({"e": vector(5)})
+    assert reopened.get_many(["b", "c", "e"]) == {"b": vector(2), "c": vector(3), "e": vector(5)}
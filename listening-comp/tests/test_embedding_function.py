@@ -0,0 +1,41 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.fake_clients import FakeEmbeddingClient, FakeThrottlingError
+from backend.vector_store import BedrockEmbeddingFunction
+
+
+def test_concurrent_calls_share_one_in_flight_limit():
+    client = FakeEmbeddingClient(dimensions=4, latency=0.02)
+    embed = BedrockEmbeddingFunction(client=client, max_in_flight=3)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        batches = list(executor.map(embed, [[f"text {batch} {i}" for i in range(6)] for batch in range(4)]))
+
+    assert [len(batch) for batch in batches] == [6, 6, 6, 6]
+    assert client.peak_in_flight <= 3
+
+
+class ThrottleFirstCalls(FakeEmbeddingClient):
+    def __init__(self, throttles: int):
+        super().__init__(dimensions=4, latency=0.0)
+        self.remaining_throttles = throttles
+
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> dict:
+        with self._lock:
+            throttle = self.remaining_throttles > 0
+            self.remaining_throttles -= 1
+        if throttle:
+            raise FakeThrottlingError()
+        return super().invoke_model(modelId, body, **kwargs)
+
+
+def test_throttle_backoff_carries_over_to_the_next_call():
+    embed = BedrockEmbeddingFunction(client=ThrottleFirstCalls(2), max_in_flight=8, base_delay=0.001, max_delay=0.002)
+
+    embed(["a"])
+    assert embed.last_stats["throttles"] == 2
+    assert embed.last_stats["final_limit"] == 2
+
+    # A new call starts from the backed-off limit and grows it by one, instead of starting over at max_in_flight
+    embed(["b"])
+    assert embed.last_stats["final_limit"] == 3
@@ -0,0 +1,54 @@
+from backend import mp3
+from backend.audio_generator import AudioGenerator
+from backend.fake_clients import FakePollyClient
+from backend.tts_cache import ClipCache
+
+# MPEG-2 Layer III, 24 kHz mono, the format every TTS provider returns
+REFERENCE = mp3.parse_header(FakePollyClient.REFERENCE_HEADER + bytes(4))
+
+
+def frames(data: bytes):
+    return list(mp3.iter_frames(data))
+
+
+def test_silent_frames_match_the_reference_format_and_duration():
+    silence = mp3.silent_frames(1000, REFERENCE)
+    decoded = frames(silence)
+
+    assert len(decoded) == round(24000 / 576)
+    assert all(mp3.parse_header(frame)[:5] == REFERENCE[:5] for frame in decoded)
+    assert b"".join(decoded) == silence
+
+
+def test_join_drops_tags_vbr_headers_and_garbage():
+    audio = mp3.silent_frames(200, REFERENCE)
+    frame = frames(audio)[0]
+    vbr_header = frame[:8] + b"Xing" + frame[12:]
+    id3v2 = b"ID3\x04\x00\x00\x00\x00\x00\x05" + b"title"
+    id3v1 = b"TAG" + bytes(125)
+
+    joined = mp3.join([id3v2 + vbr_header + audio + id3v1, b"junk" + audio])
+
+    assert joined == audio + audio
+    assert mp3.first_header(joined)[:5] == REFERENCE[:5]
+
+
+def test_rendered_question_is_its_clips_and_pauses_in_order(tmp_path):
+    generator = AudioGenerator(polly_client=FakePollyClient(latency=0.0), clip_cache=ClipCache(str(tmp_path / "clips")))
+    parts = [
+        ("Announcer", "次の会話を聞いて、質問に答えてください。", "male"),
+        ("男性", "会議は何時からですか。", "male"),
+        ("女性", "10時からです。", "female"),
+    ]
+    output_file = str(tmp_path / "question.mp3")
+    generator.render_audio(parts, output_file, "aws")
+
+    with open(output_file, "rb") as f:
+        rendered = f.read()
+    expected = []
+    for kind, args in generator.plan_audio(parts, "aws"):
+        if kind == "speech":
+            expected.append(generator.synthesize_part(*args))
+        else:
+            expected.append(generator.generate_silence(args, REFERENCE))
+    assert rendered == mp3.join(expected)
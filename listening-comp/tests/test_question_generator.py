@@ -0,0 +1,49 @@
+import pytest
+
+from backend.fake_clients import FakeStreamingBedrockClient
+from backend.question_generator import QuestionGenerator, QuestionTextParser, parse_question_text
+
+REPLY = FakeStreamingBedrockClient.DEFAULT_REPLY
+
+
+class ExampleStore:
+    def search_similar_questions(self, section_num, query, n_results=5):
+        return [{"Situation": "駅で", "Question": "何と言いますか。", "Options": ["a", "b", "c", "d"]}]
+
+
+@pytest.mark.parametrize("chunk_chars", [1, 3, 7, len(REPLY)])
+def test_any_chunking_parses_like_the_whole_text(chunk_chars):
+    parser = QuestionTextParser()
+    completed = []
+    for start in range(0, len(REPLY), chunk_chars):
+        completed.extend(parser.feed(REPLY[start:start + chunk_chars]))
+    completed.extend(parser.close())
+
+    assert parser.question == parse_question_text(REPLY)
+    assert [field for field, _ in completed] == ["Introduction", "Conversation", "Question", "Options"]
+    assert parser.question["Options"] == ["3分です。", "5分です。", "10分です。", "15分です。"]
+
+
+def test_partial_reports_the_field_being_written():
+    parser = QuestionTextParser()
+    assert parser.feed("Introduction: 次の会話を") == []
+    assert parser.partial() == ("Introduction", "次の会話を")
+    assert parser.feed("聞いて\nQuest") == []
+    assert parser.partial() == ("Introduction", "次の会話を聞いて Quest")
+    assert parser.feed("ion: 何分") == []
+    assert parser.partial() == ("Question", "何分")
+
+
+def test_stream_yields_fields_then_the_same_question_as_converse():
+    client = FakeStreamingBedrockClient(ttft=0.0, chars_per_second=1e9)
+    generator = QuestionGenerator(vector_store=ExampleStore(), bedrock_client=client)
+
+    events = list(generator.generate_similar_question_stream(3, "Travel"))
+
+    kinds = [kind for kind, _ in events]
+    assert kinds[-1] == "done"
+    assert [payload[0] for kind, payload in events if kind == "field"] == [
+        "Introduction", "Conversation", "Question", "Options"
+    ]
+    assert kinds.index("partial") < kinds.index("field")
+    assert events[-1][1] == generator.generate_similar_question(3, "Travel")
@@ -0,0 +1,110 @@
+import json
+
+import pytest
+
+from backend.vector_store import QuestionParseError, QuestionVectorStore, iter_questions
+
+
+def block(situation: str, question: str = "何と言いますか。") -> str:
+    return f"<question>\nSituation:\n{situation}\n\nQuestion:\n{question}\n\nOptions:\n1. はい\n2. いいえ\n</question>\n"
+
+
+class CountingEmbeddings:
+    """Deterministic offline embeddings that record every text sent to them"""
+
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, texts):
+        self.texts.extend(texts)
+        return [[float(len(text)), float(sum(map(ord, text)) % 997), 1.0] for text in texts]
+
+
+@pytest.fixture
+def store(tmp_path):
+    embeddings = CountingEmbeddings()
+    store = QuestionVectorStore(str(tmp_path / "vectorstore"), embedding_fn=embeddings)
+    store.embedded = embeddings.texts
+    return store
+
+
+def write(path, *blocks):
+    path.write_text("".join(blocks), encoding="utf-8")
+    return str(path)
+
+
+def test_iter_questions_keeps_multiline_fields_and_reports_bad_blocks():
+    lines = (
+        "<question>\nIntroduction: 次の会話を聞いて\nConversation:\n男: こんにちは\n女: こんにちは\n"
+        "Question: だれですか\nOptions:\n1. 先生\n2) 学生\n</question>\n"
+        "<question>\nQuestion: 何ですか\n</question>\n"
+    ).splitlines()
+    errors = []
+    questions = list(iter_questions(lines, errors))
+
+    assert questions == [{
+        "Introduction": "次の会話を聞いて",
+        "Conversation": "男: こんにちは\n女: こんにちは",
+        "Question": "だれですか",
+        "Options": ["先生", "学生"],
+    }]
+    assert [error.line_number for error in errors] == [11]
+
+
+def test_iter_questions_reports_missing_required_fields():
+    errors = []
+    questions = list(iter_questions(block("駅で").splitlines(), errors, required=("Introduction", "Conversation")))
+    assert questions == []
+    assert isinstance(errors[0], QuestionParseError)
+    assert "Introduction, Conversation" in errors[0].message
+
+
+def ids_by_situation(store):
+    stored = store.collections["section3"].get()
+    return {
+        json.loads(metadata["full_structure"])["Situation"]: question_id
+        for question_id, metadata in zip(stored["ids"], stored["metadatas"])
+    }
+
+
+def test_inserting_a_question_keeps_the_ids_of_the_others(store, tmp_path):
+    path = tmp_path / "video_section3.txt"
+    store.index_questions_file(write(path, block("駅で"), block("店で"), block("学校で")), 3)
+    before = ids_by_situation(store)
+    embedded = len(store.embedded)
+
+    counts = store.index_questions_file(write(path, block("空港で"), block("駅で"), block("店で"), block("学校で")), 3)
+
+    assert counts == {"added": 1, "updated": 3, "unchanged": 0, "deleted": 0, "errors": 0}
+    after = ids_by_situation(store)
+    assert {situation: after[situation] for situation in before} == before
+    assert len(after) == 4
+    assert len(store.embedded) == embedded + 1
+
+
+def test_edited_question_replaces_its_old_entry(store, tmp_path):
+    path = tmp_path / "video_section3.txt"
+    store.index_questions_file(write(path, block("駅で"), block("店で")), 3)
+
+    counts = store.index_questions_file(write(path, block("駅で"), block("本屋で")), 3)
+
+    assert counts == {"added": 1, "updated": 0, "unchanged": 1, "deleted": 1, "errors": 0}
+    situations = sorted(
+        json.loads(metadata["full_structure"])["Situation"]
+        for metadata in store.collections["section3"].get()["metadatas"]
+    )
+    assert situations == ["本屋で", "駅で"]
+
+
+def test_section2_block_without_conversation_is_skipped_not_fatal(store, tmp_path):
+    dialogue = (
+        "<question>\nIntroduction:\n次の会話を聞いて\nConversation:\n男: 行きますか\n女: はい\n"
+        "Question:\n行きますか\n</question>\n"
+    )
+    path = write(tmp_path / "video_section2.txt", dialogue, block("駅で"), dialogue.replace("はい", "いいえ"))
+
+    counts = store.index_questions_file(path, 2)
+
+    assert counts["added"] == 2
+    assert counts["errors"] == 1
+    assert store.collections["section2"].count() == 2
@@ -0,0 +1,52 @@
+from backend.vector_store import iter_questions, iter_questions_from_file
+
+
+def test_fields_can_start_on_the_header_line_or_below_it():
+    lines = [
+        "<question>",
+        "Situation: 駅で",
+        "友だちを待っています。",
+        "Question:",
+        "何と言いますか。",
+        "Options:",
+        "1. おはよう",
+        "ございます",
+        "2. こんばんは",
+        "</question>",
+    ]
+    assert list(iter_questions(lines)) == [{
+        "Situation": "駅で\n友だちを待っています。",
+        "Question": "何と言いますか。",
+        "Options": ["おはよう\nございます", "こんばんは"],
+    }]
+
+
+def test_malformed_blocks_are_skipped_and_reported_with_their_line():
+    lines = [
+        "<question>", "Situation: 駅で", "Situation: 店で", "Question: 何ですか", "</question>",
+        "<question>", "いきなり本文", "Question: 何ですか", "</question>",
+        "<question>", "Situation: 店で", "Question: いくらですか", "Options:", "はい", "</question>",
+        "<question>", "Situation: 学校で", "Question: だれですか", "</question>",
+        "<question>", "Situation: 空港で",
+    ]
+    errors = []
+    questions = list(iter_questions(lines, errors))
+
+    assert questions == [{"Situation": "学校で", "Question": "だれですか"}]
+    assert [(error.line_number, error.message.split(" ")[0]) for error in errors] == [
+        (3, "duplicate"), (7, "text"), (14, "expected"), (20, "missing"),
+    ]
+
+
+def test_questions_are_yielded_before_the_rest_of_the_file_is_read():
+    def lines():
+        yield from ["<question>", "Situation: 駅で", "Question: 何ですか", "</question>"]
+        raise AssertionError("read past the first question")
+
+    assert next(iter_questions(lines())) == {"Situation": "駅で", "Question": "何ですか"}
+
+
+def test_iter_questions_from_file(tmp_path):
+    path = tmp_path / "video_section3.txt"
+    path.write_text("前置き\n<question>\nSituation: 駅で\nQuestion: 何ですか\n</question>\n", encoding="utf-8")
+    assert list(iter_questions_from_file(str(path))) == [{"Situation": "駅で", "Question": "何ですか"}]
@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+
+from backend.question_pipeline import QuestionPipeline
+
+
+class FakeQuestionGenerator:
+    def __init__(self, gate: threading.Event = None):
+        self.gate = gate
+        self.calls = 0
+
+    def generate_similar_question(self, section_num, topic):
+        if self.gate:
+            self.gate.wait(5)
+        self.calls += 1
+        return {"Situation": topic, "Question": f"#{self.calls}"}
+
+
+class FakeAudioGenerator:
+    def __init__(self, directory):
+        self.directory = directory
+        self.files = []
+
+    def generate_audio(self, question):
+        path = os.path.join(self.directory, f"{len(self.files)}.mp3")
+        with open(path, "wb") as f:
+            f.write(b"mp3")
+        self.files.append(path)
+        return path
+
+
+def wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_pop_serves_prefilled_items_and_refills(tmp_path):
+    pipeline = QuestionPipeline(FakeQuestionGenerator(), FakeAudioGenerator(str(tmp_path)), depth=2)
+    try:
+        pipeline.prefill("Phrase Matching", "Travel")
+        queue = "Phrase Matching / Travel"
+        wait_for(lambda: pipeline.metrics()[queue]["depth"] == 2)
+
+        item = pipeline.pop("Phrase Matching", "Travel")
+        assert item["question"]["Situation"] == "Travel"
+        assert os.path.exists(item["audio_file"])
+        wait_for(lambda: pipeline.metrics()[queue]["depth"] == 2)
+        assert pipeline.metrics()[queue]["hits"] == 1
+    finally:
+        pipeline.shutdown()
+
+
+def test_empty_queue_counts_a_miss(tmp_path):
+    gate = threading.Event()
+    pipeline = QuestionPipeline(FakeQuestionGenerator(gate), FakeAudioGenerator(str(tmp_path)), depth=1)
+    try:
+        assert pipeline.pop("Phrase Matching", "Travel") is None
+        assert pipeline.metrics()["Phrase Matching / Travel"]["misses"] == 1
+    finally:
+        gate.set()
+        pipeline.shutdown(wait=True)
+
+
+def test_shutdown_deletes_the_audio_of_unserved_items(tmp_path):
+    gate = threading.Event()
+    audio = FakeAudioGenerator(str(tmp_path))
+    pipeline = QuestionPipeline(FakeQuestionGenerator(gate), audio, depth=2, max_workers=1)
+    pipeline.prefill("Phrase Matching", "Travel")
+    gate.set()
+    wait_for(lambda: pipeline.metrics()["Phrase Matching / Travel"]["depth"] >= 1)
+
+    pipeline.shutdown(wait=True)
+
+    assert audio.files and not any(os.path.exists(path) for path in audio.files)
+    assert pipeline.metrics()["Phrase Matching / Travel"]["depth"] == 0
+
+
+def test_prefill_racing_shutdown_does_not_raise(tmp_path):
+    pipeline = QuestionPipeline(FakeQuestionGenerator(), FakeAudioGenerator(str(tmp_path)), depth=1)
+    errors = []
+
+    def prefill_many():
+        try:
+            for topic in range(200):
+                pipeline.prefill("Phrase Matching", str(topic))
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=prefill_many)
+    thread.start()
+    pipeline.shutdown()
+    thread.join()
+
+    assert errors == []
@@ -0,0 +1,57 @@
+import json
+import os
+
+from backend.question_store import QuestionStore
+
+
+def test_ids_are_unique_within_a_second(tmp_path):
+    store = QuestionStore(str(tmp_path / "questions.sqlite3"), legacy_json=None)
+    ids = {store.add({"Question": str(i)}, "Phrase Matching", "Travel") for i in range(50)}
+    assert len(ids) == 50
+
+
+def test_list_pages_newest_first_per_type_and_topic(tmp_path):
+    store = QuestionStore(str(tmp_path / "questions.sqlite3"), legacy_json=None)
+    for i in range(5):
+        store.add({"Question": f"travel {i}"}, "Phrase Matching", "Travel")
+        store.add({"Question": f"school {i}"}, "Dialogue Practice", "School")
+
+    first = store.list("Phrase Matching", "Travel", limit=2)
+    second = store.list("Phrase Matching", "Travel", limit=2, offset=2)
+
+    assert [item["question"]["Question"] for item in first] == ["travel 4", "travel 3"]
+    assert [item["question"]["Question"] for item in second] == ["travel 2", "travel 1"]
+    assert store.count("Phrase Matching", "Travel") == 5
+    assert store.count() == 10
+    assert len(store.list(limit=100)) == 10
+
+
+def test_set_audio_and_get(tmp_path):
+    store = QuestionStore(str(tmp_path / "questions.sqlite3"), legacy_json=None)
+    question_id = store.add({"Question": "何ですか"}, "Phrase Matching", "Travel")
+
+    assert store.set_audio(question_id, "question.mp3")
+    assert not store.set_audio("missing", "question.mp3")
+    saved = store.get(question_id)
+    assert saved["audio_file"] == "question.mp3"
+    assert saved["question"] == {"Question": "何ですか"}
+    assert store.get("missing") is None
+
+
+def test_legacy_json_is_imported_once_and_renamed(tmp_path):
+    legacy = tmp_path / "stored_questions.json"
+    legacy.write_text(json.dumps({
+        "20240102_000000": {"question": {"Question": "新"}, "practice_type": "Phrase Matching",
+                            "topic": "Travel", "created_at": "2024-01-02 00:00:00"},
+        "20240101_000000": {"question": {"Question": "旧"}, "practice_type": "Phrase Matching",
+                            "topic": "Travel", "created_at": "2024-01-01 00:00:00", "audio_file": "old.mp3"},
+    }, ensure_ascii=False), encoding="utf-8")
+
+    store = QuestionStore(str(tmp_path / "questions.sqlite3"), legacy_json=str(legacy))
+
+    assert not legacy.exists()
+    assert os.path.exists(f"{legacy}.migrated")
+    assert [item["id"] for item in store.list()] == ["20240102_000000", "20240101_000000"]
+    assert store.get("20240101_000000")["audio_file"] == "old.mp3"
+    # Importing again skips the ids already stored
+    assert store.migrate_json(f"{legacy}.migrated") == 0
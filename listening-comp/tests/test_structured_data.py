@@ -0,0 +1,28 @@
+from backend.structured_data import segment_transcript
+
+
+def test_sections_are_split_and_their_examples_dropped():
+    transcript = (
+        "はじめに\n問題1\n説明です。\n例\n例えばこれは練習です。\n1番\n男の人が一番いいと言いました。\n"
+        "問題２\n説明。\n例\n練習。\n一番\n本番。\n問題三\n最後。"
+    )
+    assert segment_transcript(transcript) == {
+        1: "問題1\n説明です。\n1番\n男の人が一番いいと言いました。\n",
+        2: "問題２\n説明。\n一番\n本番。\n",
+        3: "問題三\n最後。",
+    }
+
+
+def test_example_words_inside_the_text_do_not_cut_the_section():
+    transcript = "問題1\n例えば、例のところで待ちます。どれが一番いいですか。\n11番の答えです。"
+    assert segment_transcript(transcript) == {1: transcript}
+
+
+def test_example_without_a_first_question_is_kept():
+    transcript = "問題3\n例\n練習の会話です。"
+    assert segment_transcript(transcript) == {3: transcript}
+
+
+def test_missing_sections_are_left_out():
+    assert segment_transcript("問題2\n会話です。") == {2: "問題2\n会話です。"}
+    assert segment_transcript("見出しのない文字起こし") == {}
@@ -0,0 +1,44 @@
+import os
+import time
+
+from backend.tts_cache import ClipCache, clip_key
+
+
+def test_clips_are_keyed_by_engine_voice_and_text(tmp_path):
+    cache = ClipCache(str(tmp_path))
+    cache.put("polly-neural", "Takumi", "こんにちは", b"takumi")
+
+    assert cache.get("polly-neural", "Takumi", "こんにちは") == b"takumi"
+    assert cache.get("polly-neural", "Kazuha", "こんにちは") is None
+    assert cache.get("google-standard", "Takumi", "こんにちは") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_least_recently_used_clips_are_evicted_below_the_size_limit(tmp_path):
+    cache = ClipCache(str(tmp_path), max_bytes=300)
+    for text in ("a", "b", "c"):
+        cache.put("polly-neural", "Takumi", text, bytes(100))
+    # Recency is the file modification time; make it explicit instead of relying on timer resolution
+    now = time.time()
+    for age, text in ((30, "a"), (20, "b"), (10, "c")):
+        path = os.path.join(str(tmp_path), f"{clip_key('polly-neural', 'Takumi', text)}.mp3")
+        os.utime(path, (now - age, now - age))
+    cache.get("polly-neural", "Takumi", "a")
+
+    cache.put("polly-neural", "Takumi", "d", bytes(100))
+
+    assert cache.get("polly-neural", "Takumi", "b") is None
+    assert cache.get("polly-neural", "Takumi", "c") is None
+    assert cache.get("polly-neural", "Takumi", "a") == bytes(100)
+    assert cache.get("polly-neural", "Takumi", "d") == bytes(100)
+    assert cache.evictions == 2
+
+
+def test_sizes_are_picked_up_from_an_existing_directory(tmp_path):
+    ClipCache(str(tmp_path)).put("polly-neural", "Takumi", "a", bytes(250))
+
+    reopened = ClipCache(str(tmp_path), max_bytes=300)
+    reopened.put("polly-neural", "Takumi", "b", bytes(100))
+
+    assert reopened.evictions == 1
+    assert (reopened.stats()["clips"], reopened.stats()["bytes"]) == (1, 100)